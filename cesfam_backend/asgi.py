@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cesfam_backend.settings')
+# settings.py ajusta las conexiones a la BD según el servidor (ver CONN_MAX_AGE)
+os.environ.setdefault('CESFAM_SERVIDOR', 'asgi')
 
 application = get_asgi_application()
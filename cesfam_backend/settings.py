@@ -23,9 +23,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-o6-9wm^n5=%h(urd3#e@3s2h14wrm*4*&yl5t2q8=g3ze#9(l)'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# En producción: CESFAM_DEBUG=0 y CESFAM_HOSTS con los nombres del servidor separados por coma
+DEBUG = os.environ.get('CESFAM_DEBUG', '1') != '0'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('CESFAM_HOSTS', '').split(',') if host.strip()]
 
 
 # Application definition
@@ -41,11 +42,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'intranet.middleware.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'intranet.middleware.AuditoriaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -73,16 +76,95 @@ WSGI_APPLICATION = 'cesfam_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'cesfam_intranet_db',       # El nombre de tu DB
-        'USER': 'cesfam_user',                # Tu usuario de Postgres
-        'PASSWORD': '1234', # La contraseña que pusiste al instalar
-        'HOST': 'localhost',               # El servidor (tu PC)
-        'PORT': '5432',                    # El puerto por defecto
+# Perfil por variable de entorno: CESFAM_BD=postgresql (por defecto) o CESFAM_BD=sqlite
+# (pruebas y benchmarks locales). Los datos de conexión también se leen del entorno.
+
+PERFIL_BD = os.environ.get('CESFAM_BD', 'postgresql')
+
+if PERFIL_BD == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('CESFAM_BD_NOMBRE', os.path.join(BASE_DIR, 'db.sqlite3')),
+            'OPTIONS': {
+                # WAL: las lecturas no esperan a la escritura en curso. synchronous=NORMAL es
+                # seguro con WAL (solo se pierde la última transacción si se corta la luz).
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-65536;'         # 64 MB de caché de páginas
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA mmap_size=268435456;'       # 256 MB leídos con mmap
+                ),
+                # Las transacciones toman el bloqueo de escritura al empezar: sin "database is locked"
+                # a mitad de transacción; se espera hasta 'timeout' segundos por el bloqueo.
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('CESFAM_BD_NOMBRE', 'cesfam_intranet_db'),
+            'USER': os.environ.get('CESFAM_BD_USUARIO', 'cesfam_user'),
+            'PASSWORD': os.environ.get('CESFAM_BD_CLAVE', '1234'),
+            'HOST': os.environ.get('CESFAM_BD_HOST', 'localhost'),
+            'PORT': os.environ.get('CESFAM_BD_PUERTO', '5432'),
+            # Conexión persistente por thread (segundos; evita conectar en cada petición).
+            # Antes de reutilizarla se verifica que siga viva. Bajo ASGI (asgi.py fija
+            # CESFAM_SERVIDOR=asgi) el ORM corre en un thread nuevo por petición: una conexión
+            # persistente no se reutiliza y se acumulan hasta que el recolector las cierra.
+            # Ahí el valor por defecto es 0 y conviene usar CESFAM_BD_POOL.
+            'CONN_MAX_AGE': int(os.environ.get(
+                'CESFAM_BD_CONN_MAX_AGE', 0 if os.environ.get('CESFAM_SERVIDOR') == 'asgi' else 600
+            )),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    # CESFAM_BD_POOL=<máximo>: pool de conexiones compartido por los threads del worker
+    # (requiere psycopg[pool]). Reemplaza a la conexión persistente; es lo recomendado con ASGI.
+    if os.environ.get('CESFAM_BD_POOL'):
+        from psycopg_pool import ConnectionPool
+
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': 2,
+            'max_size': int(os.environ['CESFAM_BD_POOL']),
+            'timeout': 10,
+            'max_idle': 300,
+            # Verifica cada conexión al sacarla del pool
+            'check': ConnectionPool.check_connection,
+        }
+
+# Cache
+# CESFAM_CACHE=locmem (por defecto) o CESFAM_CACHE=file.
+# locmem es por proceso: con varios workers la invalidación no llega a los otros
+# procesos (solo los acotan DASHBOARD_CACHE_TIMEOUT y FERIADOS_CACHE_TIMEOUT). Con varios workers usar 'file'.
+
+if os.environ.get('CESFAM_CACHE', 'locmem') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CESFAM_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'cesfam-intranet',
+        }
+    }
+
+# Segundos máximos que un dato del dashboard puede quedar en caché
+DASHBOARD_CACHE_TIMEOUT = 3600
+
+# Segundos máximos que la lista de feriados queda en caché. Es más corto que el del
+# dashboard: un feriado viejo en otro worker cambia los días que se descuentan.
+FERIADOS_CACHE_TIMEOUT = 300
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -128,8 +210,47 @@ AUTH_USER_MODEL = 'intranet.Funcionarios'
 AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
 
 STATIC_URL = 'static/'
+
+# Los archivos subidos se guardan una sola vez por contenido (intranet/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'intranet.storage.AlmacenamientoDeduplicado',
+    },
+    # En producción (CESFAM_DEBUG=0) collectstatic agrega el hash al nombre, precomprime
+    # en .gz/.br y exige FullCalendar en intranet/static/vendor/ (intranet/estaticos.py);
+    # en desarrollo runserver los sirve tal cual.
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'intranet.estaticos.EstaticosComprimidos'
+        ),
+    },
+}
+
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'intranet/static'),
 ]
-
-LOGIN_URL = 'login'
\ No newline at end of file
+# Destino de collectstatic. El servidor web sirve /static/ desde aquí con caché de un año
+# (los nombres llevan hash) y gzip_static/brotli_static para las versiones precomprimidas.
+STATIC_ROOT = os.environ.get('CESFAM_STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+
+LOGIN_URL = 'login'
+
+# Auditoría (RF18): los logs se guardan en lotes con bulk_create
+AUDITORIA_LOTE = 50         # se guarda al juntar esta cantidad de acciones
+AUDITORIA_INTERVALO = 10    # o cuando pasan estos segundos desde el último guardado
+
+# Miniaturas de fotos y documentos (intranet/miniaturas.py), generadas en segundo plano
+MINIATURAS_PROCESOS = int(os.environ.get('CESFAM_MINIATURAS_PROCESOS', 2))
+MINIATURAS_ASINCRONAS = True    # False: se generan en la misma petición (útil en pruebas)
+
+# Descarga de archivos protegidos (intranet/descargas.py). Con un servidor web delante
+# se le delega el envío: 'x-accel-redirect' (nginx, con una location internal que apunte
+# a MEDIA_ROOT en DESCARGAS_ACCEL_PREFIJO) o 'x-sendfile' (Apache mod_xsendfile).
+DESCARGAS_SENDFILE = os.environ.get('CESFAM_SENDFILE') or None
+DESCARGAS_ACCEL_PREFIJO = '/protegido/'
+
+# Métricas por vista (intranet/metricas.py), publicadas para Prometheus en /metricas/ (solo admin).
+# Con METRICAS_LENTAS_MS se registra el SQL de las peticiones que tardan más que ese valor.
+METRICAS_LENTAS_MS = float(os.environ['CESFAM_LENTAS_MS']) if os.environ.get('CESFAM_LENTAS_MS') else None
+METRICAS_LENTAS_GUARDAR = 10    # peores peticiones que se conservan en memoria con su SQL
@@ -0,0 +1,133 @@
+# intranet/acumulacion.py
+
+# Acumulación anual de días (comando acumular_dias, programado para el
+# 1 de enero). Para cada regla (por rol y antigüedad) se ejecuta un solo
+# UPDATE sobre Dias_Administrativos, así la cantidad de consultas es la
+# misma con 10 o con 10.000 funcionarios.
+#
+# Vacaciones: se conserva el saldo anterior hasta el tope de arrastre y se
+# suman los días del año. Administrativos: no se acumulan, se reinician.
+#
+# Cada año se registra en EjecucionAcumulacion dentro de la misma
+# transacción: si el año ya está registrado no se vuelve a aplicar.
+
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from . import auditoria
+from .cache import invalidar_balances
+from .models import Dias_Administrativos, EjecucionAcumulacion, Funcionarios
+
+Regla = namedtuple('Regla', ['nombre', 'roles', 'antiguedad_minima', 'vacaciones', 'administrativos', 'arrastre'])
+
+# Se aplica la primera regla que calza con cada funcionario: las más específicas primero.
+# roles=None: cualquier rol. antiguedad_minima en años cumplidos al 1 de enero (según date_joined).
+# arrastre: máximo de días de vacaciones del año anterior que se conservan (0 = se reinician).
+REGLAS = [
+    Regla('20 o más años de servicio', None, 20, 30, 5, 30),
+    Regla('15 o más años de servicio', None, 15, 25, 5, 25),
+    Regla('General', None, 0, 20, 5, 20),
+]
+
+
+def reglas():
+    """Reglas de settings.ACUMULACION_REGLAS (lista de dicts) o las de este módulo."""
+    configuradas = getattr(settings, 'ACUMULACION_REGLAS', None)
+    if configuradas is None:
+        return REGLAS
+    return [Regla(**{'roles': None, 'antiguedad_minima': 0, **regla}) for regla in configuradas]
+
+
+def _condicion(regla, corte):
+    condicion = Q(is_active=True)
+    if regla.roles:
+        condicion &= Q(id_rol__nombre_rol__in=regla.roles)
+    if regla.antiguedad_minima:
+        limite = corte.replace(year=corte.year - regla.antiguedad_minima)
+        condicion &= Q(date_joined__lt=limite)
+    return condicion
+
+
+def _crear_balances_faltantes():
+    """
+    Un INSERT ... SELECT para los funcionarios activos que aún no tienen balance.
+    Parten en 0: el UPDATE de su regla les suma los días del año una sola vez
+    (con los valores por defecto del modelo recibirían el año dos veces).
+    """
+    quote = connection.ops.quote_name
+    dias = quote(Dias_Administrativos._meta.db_table)
+    funcionarios = quote(Funcionarios._meta.db_table)
+    columna = quote(Dias_Administrativos._meta.get_field('id_funcionario').column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {dias} ({columna}, vacaciones_restantes, admin_restantes) "
+            f"SELECT f.id, %s, %s FROM {funcionarios} f "
+            f"WHERE f.is_active = %s AND NOT EXISTS (SELECT 1 FROM {dias} d WHERE d.{columna} = f.id)",
+            [0, 0, True],
+        )
+        return cursor.rowcount
+
+
+def simular(anio):
+    """{nombre de regla: funcionarios} que se verían afectados, sin modificar nada."""
+    corte = timezone.make_aware(datetime(anio, 1, 1))
+    resultado = {}
+    ya_asignados = Q()
+    for regla in reglas():
+        condicion = _condicion(regla, corte)
+        resultado[regla.nombre] = Funcionarios.objects.filter(condicion & ~ya_asignados).count()
+        ya_asignados |= condicion
+    return resultado
+
+
+def acumular(anio, usuario=None):
+    """
+    Aplica la acumulación del año `anio`. Retorna la EjecucionAcumulacion
+    creada, o None si ese año ya se había aplicado.
+    """
+    corte = timezone.make_aware(datetime(anio, 1, 1))
+    try:
+        with transaction.atomic():
+            # 1. El registro va primero: otra ejecución del mismo año choca con la restricción única
+            ejecucion = EjecucionAcumulacion.objects.create(periodo=anio, ejecutado_por=usuario)
+
+            # 2. Quien no tenía balance parte desde cero y recibe solo los días del año
+            creados = _crear_balances_faltantes()
+
+            # 3. Un UPDATE por regla; cada funcionario queda solo en la primera que le corresponde
+            detalle = {}
+            ya_asignados = Q()
+            for regla in reglas():
+                condicion = _condicion(regla, corte)
+                funcionarios = Funcionarios.objects.filter(condicion & ~ya_asignados).values('pk')
+                detalle[regla.nombre] = Dias_Administrativos.objects.filter(id_funcionario__in=funcionarios).update(
+                    vacaciones_restantes=Least(F('vacaciones_restantes'), Value(regla.arrastre)) + regla.vacaciones,
+                    admin_restantes=regla.administrativos,
+                )
+                ya_asignados |= condicion
+
+            ejecucion.funcionarios_afectados = sum(detalle.values())
+            ejecucion.detalle = json.dumps({'balances_creados': creados, 'reglas': detalle}, ensure_ascii=False)
+            ejecucion.save(update_fields=['funcionarios_afectados', 'detalle'])
+
+            # 4. update() no dispara señales: caché del dashboard y auditoría a mano
+            invalidar_balances(
+                Dias_Administrativos.objects.filter(id_funcionario__is_active=True).values_list('pk', flat=True)
+            )
+            auditoria.registrar(
+                auditoria.ACUMULACION_DIAS,
+                f"Período {anio}: {ejecucion.funcionarios_afectados} funcionarios ({ejecucion.detalle})",
+                actor=usuario,
+            )
+    except IntegrityError:
+        if EjecucionAcumulacion.objects.filter(periodo=anio).exists():
+            return None
+        raise
+    return ejecucion
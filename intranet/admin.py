@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Funcionarios, Dias_Administrativos, Comunicados, Documentos, Logs_Auditoria, Licencias, Roles, Logs_Auditoria, Eventos_Calendario, SolicitudesPermiso
+from .models import Funcionarios, Dias_Administrativos, Comunicados, Documentos, Logs_Auditoria, Licencias, Roles, Logs_Auditoria, Eventos_Calendario, SolicitudesPermiso, ResumenLicencias, ArchivoAlmacenado, EjecucionAcumulacion
 
 # --- 1. El Panel de Admin para tu Usuario Personalizado ---
 # Le decimos a Django que use el panel de admin de usuarios, 
@@ -25,4 +25,7 @@ admin.site.register(Comunicados)
 admin.site.register(Eventos_Calendario)
 admin.site.register(Licencias)
 admin.site.register(Logs_Auditoria)
-admin.site.register(SolicitudesPermiso)
\ No newline at end of file
+admin.site.register(SolicitudesPermiso)
+admin.site.register(ResumenLicencias)
+admin.site.register(ArchivoAlmacenado)
+admin.site.register(EjecucionAcumulacion)
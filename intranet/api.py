@@ -0,0 +1,136 @@
+# intranet/api.py
+
+# API JSON de solo lectura para los clientes kiosco y móviles (rutas api/...).
+# Las filas salen de consultas .values() (sin instanciar modelos) y se
+# reducen a los campos pedidos con ?campos=a,b,c. Las listas se paginan por
+# cursor (intranet/paginacion.py): ?limite=N y luego ?cursor=<siguiente>.
+#
+# Si orjson está instalado se usa para serializar; si no, json con el
+# codificador de Django. En ambos casos la salida va sin espacios.
+#
+# Sin sesión o sin permiso se responde 401/403 en JSON (requiere_usuario), no
+# la redirección a la página de login que usan las vistas HTML.
+
+import json
+from collections import namedtuple
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from .paginacion import paginar_keyset
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+
+# campos: {nombre en la API: campo de .values()}. orden: campo del cursor (de más nuevo a más antiguo)
+Recurso = namedtuple('Recurso', ['campos', 'por_defecto', 'orden'])
+
+COMUNICADOS = Recurso(
+    campos={
+        'id': 'id', 'titulo': 'titulo', 'cuerpo': 'cuerpo', 'fecha_publicacion': 'fecha_publicacion',
+        'autor': 'id_autor__username',
+    },
+    por_defecto=('id', 'titulo', 'cuerpo', 'fecha_publicacion'),
+    orden='fecha_publicacion',
+)
+
+SOLICITUDES = Recurso(
+    campos={
+        'id': 'id', 'tipo': 'tipo_permiso', 'fecha_inicio': 'fecha_inicio', 'fecha_fin': 'fecha_fin',
+        'dias': 'dias_solicitados', 'estado': 'estado', 'fecha_solicitud': 'fecha_solicitud',
+    },
+    por_defecto=('id', 'tipo', 'fecha_inicio', 'fecha_fin', 'dias', 'estado', 'fecha_solicitud'),
+    orden='fecha_solicitud',
+)
+
+LICENCIAS = Recurso(
+    campos={
+        'id': 'id', 'fecha_inicio': 'fecha_inicio', 'fecha_fin': 'fecha_fin', 'fecha_registro': 'fecha_registro',
+        'cargada_por': 'id_subdireccion_carga__username',
+    },
+    por_defecto=('id', 'fecha_inicio', 'fecha_fin'),
+    orden='fecha_inicio',
+)
+
+PENDIENTES = Recurso(
+    campos={
+        'id': 'id', 'funcionario_id': 'id_funcionario_solicitante_id',
+        'funcionario': 'id_funcionario_solicitante__username',
+        'nombre': 'id_funcionario_solicitante__first_name', 'apellido': 'id_funcionario_solicitante__last_name',
+        'tipo': 'tipo_permiso', 'fecha_inicio': 'fecha_inicio', 'fecha_fin': 'fecha_fin',
+        'dias': 'dias_solicitados', 'fecha_solicitud': 'fecha_solicitud',
+    },
+    por_defecto=('id', 'funcionario', 'tipo', 'fecha_inicio', 'fecha_fin', 'dias', 'fecha_solicitud'),
+    orden='fecha_solicitud',
+)
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def _campos(recurso, texto):
+    if not texto:
+        return recurso.por_defecto
+    nombres = [nombre.strip() for nombre in texto.split(',') if nombre.strip()]
+    desconocidos = [nombre for nombre in nombres if nombre not in recurso.campos]
+    if desconocidos:
+        raise ParametroInvalido(
+            f"Campos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(recurso.campos)}."
+        )
+    return nombres
+
+
+def _limite(texto):
+    if not texto:
+        return LIMITE_POR_DEFECTO
+    try:
+        return min(max(int(texto), 1), LIMITE_MAXIMO)
+    except ValueError:
+        raise ParametroInvalido("'limite' debe ser un número entero.")
+
+
+def pagina(recurso, queryset, parametros):
+    """
+    {'datos': [...], 'siguiente': cursor o None} con los campos pedidos en
+    parametros['campos']. Solo se leen de la BD esos campos (y los del cursor).
+    """
+    nombres = _campos(recurso, parametros.get('campos'))
+    columnas = {recurso.campos[nombre] for nombre in nombres} | {recurso.orden, 'id'}
+    filas, siguiente = paginar_keyset(
+        queryset.values(*columnas), parametros.get('cursor'), _limite(parametros.get('limite')),
+        campo=recurso.orden,
+    )
+    proyeccion = [(nombre, recurso.campos[nombre]) for nombre in nombres]
+    return {
+        'datos': [{nombre: fila[columna] for nombre, columna in proyeccion} for fila in filas],
+        'siguiente': siguiente,
+    }
+
+
+def respuesta(datos, status=200):
+    if orjson is not None:
+        contenido = orjson.dumps(datos)
+    else:
+        contenido = json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+    return HttpResponse(contenido, status=status, content_type='application/json')
+
+
+def requiere_usuario(prueba=None):
+    """login_required (y user_passes_test si se da `prueba`) para la API: 401/403 en JSON."""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return respuesta({'error': 'Se requiere iniciar sesión.'}, status=401)
+            if prueba is not None and not prueba(request.user):
+                return respuesta({'error': 'No tiene permiso para este recurso.'}, status=403)
+            return vista(request, *args, **kwargs)
+        return envoltura
+    return decorador
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class IntranetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'intranet'
+
+    def ready(self):
+        # Conecta los receptores de señales (auditoría, etc.)
+        from . import signals  # noqa: F401
+
+        # Tiempo de renderizado de plantillas para MetricasMiddleware
+        from django.conf import settings
+        if 'intranet.middleware.MetricasMiddleware' in settings.MIDDLEWARE:
+            from . import metricas
+            metricas.instalar()
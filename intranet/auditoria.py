@@ -0,0 +1,147 @@
+# intranet/auditoria.py
+
+# Escritura de Logs_Auditoria (RF18) en lotes.
+# Las acciones se acumulan en memoria y se guardan con un solo bulk_create
+# cuando el buffer se llena, cuando pasa el intervalo máximo o al apagar el
+# proceso. Así ninguna vista paga un INSERT extra por cada acción auditada.
+
+import atexit
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Acciones registradas (se muestran tal cual en el visor de logs)
+CAMBIO_ROL = 'Cambio de Rol'
+APROBACION_SOLICITUD = 'Aprobación de Solicitud'
+RECHAZO_SOLICITUD = 'Rechazo de Solicitud'
+MODIFICACION_DIAS = 'Modificación de Días'
+CARGA_DOCUMENTO = 'Carga de Documento'
+CARGA_LICENCIA = 'Carga de Licencia'
+CARGA_JUSTIFICATIVO = 'Carga de Justificativo'
+ACUMULACION_DIAS = 'Acumulación Anual de Días'
+
+# Petición en curso (la fija AuditoriaMiddleware). Se guarda la petición y no request.user:
+# el usuario es perezoso y asgiref inspecciona los ContextVar al pasar entre async y sync,
+# lo que lo cargaría con una consulta desde el event loop.
+peticion_actual = ContextVar('peticion_actual', default=None)
+
+_buffer = []
+_lock = threading.Lock()
+_ultimo_vaciado = time.monotonic()
+
+
+def _lote():
+    return getattr(settings, 'AUDITORIA_LOTE', 50)
+
+
+def _intervalo():
+    return getattr(settings, 'AUDITORIA_INTERVALO', 10)
+
+
+def registrar(accion, detalle='', actor=None):
+    """
+    Agrega una acción al buffer. Si hay una transacción abierta, la acción
+    se encola solo cuando ésta se confirma (un rollback no deja log).
+    """
+    from .models import Logs_Auditoria
+
+    if actor is None:
+        actor = getattr(peticion_actual.get(), 'user', None)
+    if actor is not None and not actor.is_authenticated:
+        actor = None
+
+    log = Logs_Auditoria(
+        fecha_hora=timezone.now(),
+        id_usuario_actor=actor,
+        accion=accion,
+        detalle=detalle,
+    )
+    transaction.on_commit(lambda: _encolar(log))
+
+
+def detalle_solicitud(solicitud, estado_anterior, estado_nuevo):
+    return (
+        f"Solicitud {solicitud.pk} ({solicitud.tipo_permiso}, {solicitud.dias_solicitados} días) "
+        f"de funcionario {solicitud.id_funcionario_solicitante_id}: {estado_anterior} -> {estado_nuevo}"
+    )
+
+
+def detalle_licencia(licencia):
+    return (
+        f"Licencia {licencia.pk} de funcionario {licencia.id_funcionario_id}: "
+        f"{licencia.fecha_inicio} a {licencia.fecha_fin}"
+    )
+
+
+def detalle_dias(funcionario_id, anteriores, actuales):
+    """anteriores/actuales: (vacaciones_restantes, admin_restantes)."""
+    return (
+        f"Funcionario {funcionario_id}: vacaciones {anteriores[0]} -> {actuales[0]}, "
+        f"administrativos {anteriores[1]} -> {actuales[1]}"
+    )
+
+
+def _encolar(log):
+    with _lock:
+        _buffer.append(log)
+        lleno = len(_buffer) >= _lote()
+    if lleno:
+        vaciar()
+
+
+def pendientes():
+    """Cantidad de acciones que aún no se escriben en la base de datos."""
+    with _lock:
+        return len(_buffer)
+
+
+def vaciar():
+    """Escribe todo el buffer con un bulk_create. Retorna cuántos logs se guardaron."""
+    global _ultimo_vaciado
+    from .models import Logs_Auditoria
+
+    with _lock:
+        lote = _buffer[:]
+        _buffer.clear()
+        _ultimo_vaciado = time.monotonic()
+    if not lote:
+        return 0
+
+    try:
+        Logs_Auditoria.objects.bulk_create(lote, batch_size=_lote())
+    except Exception:
+        # No se pierden los logs: vuelven al buffer para el próximo intento
+        logger.exception("No se pudieron guardar %s logs de auditoría", len(lote))
+        with _lock:
+            _buffer[:0] = lote
+        return 0
+    return len(lote)
+
+
+def vaciar_si_corresponde(**kwargs):
+    """
+    Receptor de request_finished: vacía el buffer si ya pasó el intervalo.
+    Corre después de enviar la respuesta, fuera del tiempo de la petición.
+    """
+    with _lock:
+        vencido = _buffer and time.monotonic() - _ultimo_vaciado >= _intervalo()
+    if vencido:
+        vaciar()
+        close_old_connections()
+
+
+def _vaciar_al_salir():
+    try:
+        vaciar()
+    except Exception:
+        logger.exception("Error al vaciar los logs de auditoría al apagar el proceso")
+
+
+atexit.register(_vaciar_al_salir)
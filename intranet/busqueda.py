@@ -0,0 +1,206 @@
+# intranet/busqueda.py
+
+# Búsqueda de texto completo sobre Documentos (titulo, categoria) y
+# Comunicados (titulo, cuerpo). El índice vive en la tabla intranet_busqueda
+# (migración 0012) y depende del motor:
+#   - SQLite: tabla virtual FTS5 con tokenizador unicode61 sin tildes.
+#   - PostgreSQL: columna tsvector ('spanish' + unaccent) con índice GIN.
+# En otros motores se busca con icontains sobre los modelos, sin ranking.
+# Las señales (intranet/signals.py) actualizan el índice fila a fila.
+
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+
+from .models import Comunicados, Documentos
+
+TABLA = 'intranet_busqueda'
+
+DOCUMENTO = 'documento'
+COMUNICADO = 'comunicado'
+
+Resultado = namedtuple('Resultado', ['tipo', 'objeto', 'rango', 'fragmento'])
+
+# Marcas del fragmento destacado; se reemplazan por <mark> después de escapar el texto
+_INICIO, _FIN = '\x02', '\x03'
+
+_PALABRA = re.compile(r'\w+', re.UNICODE)
+
+# Peso del título frente al cuerpo en el ranking
+PESO_TITULO = 10.0
+PESO_CUERPO = 1.0
+
+
+def _campos(instance):
+    """(tipo, titulo, cuerpo) que se indexan para una instancia."""
+    if isinstance(instance, Documentos):
+        return DOCUMENTO, instance.titulo or '', instance.categoria or ''
+    return COMUNICADO, instance.titulo or '', instance.cuerpo or ''
+
+
+def disponible():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def indexar(instance):
+    """Agrega o actualiza una fila del índice (en la misma transacción que el guardado)."""
+    if not disponible():
+        return
+    tipo, titulo, cuerpo = _campos(instance)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # FTS5 no tiene restricciones únicas: se reemplaza borrando e insertando
+            cursor.execute(f"DELETE FROM {TABLA} WHERE tipo = %s AND objeto_id = %s", [tipo, instance.pk])
+            cursor.execute(
+                f"INSERT INTO {TABLA} (tipo, objeto_id, titulo, cuerpo) VALUES (%s, %s, %s, %s)",
+                [tipo, instance.pk, titulo, cuerpo],
+            )
+        else:
+            cursor.execute(
+                f"""
+                INSERT INTO {TABLA} (tipo, objeto_id, titulo, cuerpo, vector)
+                VALUES (%s, %s, %s, %s,
+                        setweight(to_tsvector('spanish', unaccent(%s)), 'A') ||
+                        setweight(to_tsvector('spanish', unaccent(%s)), 'D'))
+                ON CONFLICT (tipo, objeto_id) DO UPDATE
+                SET titulo = EXCLUDED.titulo, cuerpo = EXCLUDED.cuerpo, vector = EXCLUDED.vector
+                """,
+                [tipo, instance.pk, titulo, cuerpo, titulo, cuerpo],
+            )
+
+
+def quitar(instance):
+    if not disponible():
+        return
+    tipo = _campos(instance)[0]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA} WHERE tipo = %s AND objeto_id = %s", [tipo, instance.pk])
+
+
+def reindexar():
+    """Reconstruye el índice completo desde las tablas de origen. Retorna las filas indexadas."""
+    if not disponible():
+        return 0
+    documentos = Documentos._meta.db_table
+    comunicados = Comunicados._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA}")
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"INSERT INTO {TABLA} (tipo, objeto_id, titulo, cuerpo) "
+                f"SELECT %s, id, titulo, COALESCE(categoria, '') FROM {documentos} "
+                f"UNION ALL SELECT %s, id, titulo, cuerpo FROM {comunicados}",
+                [DOCUMENTO, COMUNICADO],
+            )
+        else:
+            cursor.execute(
+                f"""
+                INSERT INTO {TABLA} (tipo, objeto_id, titulo, cuerpo, vector)
+                SELECT tipo, id, titulo, cuerpo,
+                       setweight(to_tsvector('spanish', unaccent(titulo)), 'A') ||
+                       setweight(to_tsvector('spanish', unaccent(cuerpo)), 'D')
+                FROM (SELECT %s AS tipo, id, titulo, COALESCE(categoria, '') AS cuerpo FROM {documentos}
+                      UNION ALL SELECT %s, id, titulo, cuerpo FROM {comunicados}) AS origen
+                """,
+                [DOCUMENTO, COMUNICADO],
+            )
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLA}")
+        return cursor.fetchone()[0]
+
+
+def palabras(texto):
+    return _PALABRA.findall(texto or '')[:10]
+
+
+def _consulta_sqlite(terminos, tipos, limite, desplazamiento):
+    # Cada palabra como prefijo entre comillas: el texto del usuario no se interpreta como sintaxis FTS5
+    expresion = ' '.join(f'"{p}"*' for p in terminos)
+    filtro_tipo = f"AND tipo IN ({', '.join(['%s'] * len(tipos))})"
+    sql = f"""
+        SELECT tipo, objeto_id, bm25({TABLA}, 0, 0, {PESO_TITULO}, {PESO_CUERPO}) AS rango,
+               snippet({TABLA}, 3, '{_INICIO}', '{_FIN}', '…', 16)
+        FROM {TABLA}
+        WHERE {TABLA} MATCH %s {filtro_tipo}
+        ORDER BY rango
+        LIMIT %s OFFSET %s
+    """
+    # bm25 es menor mientras más relevante; se invierte el signo para que "mayor es mejor"
+    return sql, [expresion, *tipos, limite, desplazamiento], lambda rango: -rango
+
+
+def _consulta_postgresql(terminos, tipos, limite, desplazamiento):
+    expresion = ' & '.join(f'{p}:*' for p in terminos)
+    filtro_tipo = f"AND tipo IN ({', '.join(['%s'] * len(tipos))})"
+    sql = f"""
+        SELECT tipo, objeto_id, ts_rank(vector, consulta) AS rango,
+               ts_headline('spanish', cuerpo, consulta,
+                           'StartSel={_INICIO}, StopSel={_FIN}, MaxWords=30, MinWords=10')
+        FROM {TABLA}, to_tsquery('spanish', unaccent(%s)) AS consulta
+        WHERE vector @@ consulta {filtro_tipo}
+        ORDER BY rango DESC, objeto_id DESC
+        LIMIT %s OFFSET %s
+    """
+    return sql, [expresion, *tipos, limite, desplazamiento], lambda rango: rango
+
+
+def _fragmento(texto):
+    return escape(texto or '').replace(_INICIO, '<mark>').replace(_FIN, '</mark>')
+
+
+def _sin_indice(terminos, tipos, limite, desplazamiento):
+    # Motor sin índice de texto: coincidencia simple, ordenada por fecha
+    resultados = []
+    if DOCUMENTO in tipos:
+        filtro = Q()
+        for p in terminos:
+            filtro &= Q(titulo__icontains=p) | Q(categoria__icontains=p)
+        for doc in Documentos.objects.filter(filtro).order_by('-fecha_carga')[:desplazamiento + limite]:
+            resultados.append(Resultado(DOCUMENTO, doc, 0, escape(doc.categoria or '')))
+    if COMUNICADO in tipos:
+        filtro = Q()
+        for p in terminos:
+            filtro &= Q(titulo__icontains=p) | Q(cuerpo__icontains=p)
+        for com in Comunicados.objects.filter(filtro).order_by('-fecha_publicacion')[:desplazamiento + limite]:
+            resultados.append(Resultado(COMUNICADO, com, 0, escape(com.cuerpo[:200])))
+    return resultados[desplazamiento:desplazamiento + limite]
+
+
+def buscar(texto, tipos=(DOCUMENTO, COMUNICADO), limite=20, desplazamiento=0):
+    """
+    Busca `texto` en el índice y retorna una lista de Resultado ordenada por
+    relevancia. Dos o tres consultas: la del índice y una por tipo de objeto.
+    El fragmento viene ya escapado, con las coincidencias en <mark>.
+    """
+    terminos = palabras(texto)
+    if not terminos or not tipos:
+        return []
+    if not disponible():
+        return _sin_indice(terminos, tipos, limite, desplazamiento)
+
+    armar = _consulta_sqlite if connection.vendor == 'sqlite' else _consulta_postgresql
+    sql, parametros, normalizar = armar(terminos, list(tipos), limite, desplazamiento)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        filas = cursor.fetchall()
+
+    # 2. Se cargan los objetos de cada tipo en una sola consulta
+    ids = {DOCUMENTO: [], COMUNICADO: []}
+    for tipo, objeto_id, _, _ in filas:
+        ids[tipo].append(objeto_id)
+    objetos = {
+        DOCUMENTO: Documentos.objects.in_bulk(ids[DOCUMENTO]) if ids[DOCUMENTO] else {},
+        COMUNICADO: Comunicados.objects.in_bulk(ids[COMUNICADO]) if ids[COMUNICADO] else {},
+    }
+
+    resultados = []
+    for tipo, objeto_id, rango, fragmento in filas:
+        objeto = objetos[tipo].get(objeto_id)
+        if objeto is None:
+            continue  # borrado entre ambas consultas
+        if not fragmento or _INICIO not in fragmento:
+            fragmento = objeto.categoria if tipo == DOCUMENTO else objeto.cuerpo[:200]
+        resultados.append(Resultado(tipo, objeto, normalizar(rango), _fragmento(fragmento)))
+    return resultados
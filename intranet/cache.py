@@ -0,0 +1,78 @@
+# intranet/cache.py
+
+# Caché de los datos del dashboard (la página de inicio de cada login).
+# Los valores se invalidan desde intranet/signals.py cuando cambian
+# Comunicados o Dias_Administrativos, y desde intranet/solicitudes.py
+# cuando una aprobación descuenta días con update().
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Comunicados, Dias_Administrativos
+
+CLAVE_COMUNICADOS = 'dashboard:comunicados'
+CLAVE_BALANCE = 'dashboard:balance:{}'
+
+# Cantidad de comunicados que muestra el dashboard
+ULTIMOS_COMUNICADOS = 3
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600)
+
+
+def ultimos_comunicados():
+    """Lista de los últimos comunicados (compartida por todos los usuarios)."""
+    comunicados = cache.get(CLAVE_COMUNICADOS)
+    if comunicados is None:
+        comunicados = list(Comunicados.objects.order_by('-fecha_publicacion')[:ULTIMOS_COMUNICADOS])
+        cache.set(CLAVE_COMUNICADOS, comunicados, _timeout())
+    return comunicados
+
+
+def balance(funcionario):
+    """
+    (admin_restantes, vacaciones_restantes) del funcionario.
+    Si aún no tiene registro de días, se crea con los valores por defecto.
+    """
+    clave = CLAVE_BALANCE.format(funcionario.pk)
+    valores = cache.get(clave)
+    if valores is None:
+        dias, created = Dias_Administrativos.objects.get_or_create(id_funcionario=funcionario)
+        valores = (dias.admin_restantes, dias.vacaciones_restantes)
+        cache.set(clave, valores, _timeout())
+    return valores
+
+
+# Versiones async de lo anterior, para las vistas async (ASGI). Misma clave y mismo contenido.
+
+async def aultimos_comunicados():
+    comunicados = await cache.aget(CLAVE_COMUNICADOS)
+    if comunicados is None:
+        comunicados = [c async for c in Comunicados.objects.order_by('-fecha_publicacion')[:ULTIMOS_COMUNICADOS]]
+        await cache.aset(CLAVE_COMUNICADOS, comunicados, _timeout())
+    return comunicados
+
+
+async def abalance(funcionario):
+    clave = CLAVE_BALANCE.format(funcionario.pk)
+    valores = await cache.aget(clave)
+    if valores is None:
+        dias, created = await Dias_Administrativos.objects.aget_or_create(id_funcionario=funcionario)
+        valores = (dias.admin_restantes, dias.vacaciones_restantes)
+        await cache.aset(clave, valores, _timeout())
+    return valores
+
+
+# La invalidación espera al commit: si se borrara antes, otra petición podría
+# volver a guardar en caché el valor viejo mientras la transacción sigue abierta.
+
+def invalidar_comunicados():
+    transaction.on_commit(lambda: cache.delete(CLAVE_COMUNICADOS))
+
+
+def invalidar_balances(funcionario_ids):
+    claves = [CLAVE_BALANCE.format(pk) for pk in funcionario_ids]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
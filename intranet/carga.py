@@ -0,0 +1,178 @@
+# intranet/carga.py
+
+# Prueba de carga ASGI contra WSGI (comando prueba_carga).
+# Levanta la intranet con un servidor ASGI (uvicorn) y con uno WSGI
+# (gunicorn con threads), con la misma cantidad de workers, y golpea las
+# vistas async (dashboard, documentos, historial, eventos) con N clientes
+# concurrentes con keep-alive. Por servidor y vista se informa: peticiones
+# por segundo, p50/p95 y errores.
+#
+# Los servidores usan la base de datos configurada (CESFAM_BD): para una
+# prueba local conviene el perfil sqlite con datos de generar_datos.
+# Con PostgreSQL, el servidor ASGI conecta por petición (CONN_MAX_AGE=0, ver
+# settings.py) y el WSGI reutiliza conexiones persistentes: para comparar en
+# igualdad de condiciones, ambos con CESFAM_BD_POOL.
+
+import asyncio
+import math
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.urls import reverse
+
+# Comandos por servidor; {puerto}, {workers} y {hilos} se reemplazan al lanzarlos
+SERVIDORES = {
+    'asgi': (
+        f'{sys.executable} -m uvicorn cesfam_backend.asgi:application --host 127.0.0.1 --port {{puerto}} '
+        '--workers {workers} --log-level warning --no-access-log'
+    ),
+    'wsgi': (
+        f'{sys.executable} -m gunicorn cesfam_backend.wsgi:application --bind 127.0.0.1:{{puerto}} '
+        '--workers {workers} --worker-class gthread --threads {hilos} --log-level warning'
+    ),
+}
+
+ESPERA_ARRANQUE = 30    # segundos máximos para que el servidor acepte conexiones
+
+
+def rutas():
+    """Vistas async que se comparan: {nombre: ruta con query string}."""
+    mes = date.today().replace(day=1)
+    ventana = f"start={mes.isoformat()}&end={(mes + timedelta(days=42)).isoformat()}"
+    return {
+        'dashboard': reverse('dashboard'),
+        'documentos': reverse('documentos'),
+        'historial_personal': reverse('historial_personal'),
+        'eventos_json': f"{reverse('eventos_json')}?{ventana}",
+    }
+
+
+def crear_sesion(usuario):
+    """Sesión ya autenticada (como la que deja el login) para no medir el login. Retorna la clave."""
+    sesion = SessionStore()
+    sesion[SESSION_KEY] = str(usuario.pk)
+    sesion[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    sesion[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+    sesion.create()
+    return sesion.session_key
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def servidor(comando, workers=4, hilos=8):
+    """Lanza el servidor en un puerto libre y entrega el puerto cuando ya acepta conexiones."""
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen(
+        shlex.split(comando.format(puerto=puerto, workers=workers, hilos=hilos)),
+        cwd=settings.BASE_DIR,
+    )
+    try:
+        limite = time.monotonic() + ESPERA_ARRANQUE
+        while True:
+            if proceso.poll() is not None:
+                raise RuntimeError(f"El servidor terminó al arrancar (código {proceso.returncode}): {comando}")
+            try:
+                socket.create_connection(('127.0.0.1', puerto), timeout=0.5).close()
+                break
+            except OSError:
+                if time.monotonic() > limite:
+                    raise RuntimeError(f"El servidor no respondió en {ESPERA_ARRANQUE} s: {comando}")
+                time.sleep(0.2)
+        yield puerto
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+
+# --- Cliente HTTP/1.1 mínimo con keep-alive (asyncio) ---
+
+async def _leer_respuesta(lector):
+    estado = int((await lector.readline()).split()[1])
+    cabeceras = {}
+    while (linea := await lector.readline()) not in (b'\r\n', b''):
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    if cabeceras.get('transfer-encoding') == 'chunked':
+        while tamano := int((await lector.readline()).split(b';')[0], 16):
+            await lector.readexactly(tamano + 2)
+        await lector.readline()
+    else:
+        await lector.readexactly(int(cabeceras.get('content-length', 0)))
+    return estado, cabeceras.get('connection', '').lower() != 'close'
+
+
+async def _cliente(puerto, peticion, pendientes, tiempos, errores):
+    lector = escritor = None
+    while pendientes[0] > 0:
+        pendientes[0] -= 1
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            escritor.write(peticion)
+            await escritor.drain()
+            estado, seguir = await _leer_respuesta(lector)
+            if not seguir:
+                escritor.close()
+                escritor = None
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            errores.append('conexión')
+            if escritor is not None:
+                escritor.close()
+            escritor = None
+            continue
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        # Un 302 al login también es error: la sesión no sirvió y se estaría midiendo otra cosa
+        if estado != 200:
+            errores.append(estado)
+    if escritor is not None:
+        escritor.close()
+
+
+async def _golpear(puerto, ruta, sesion, concurrencia, peticiones):
+    peticion = (
+        f"GET {ruta} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: keep-alive\r\n"
+        f"Cookie: {settings.SESSION_COOKIE_NAME}={sesion}\r\n\r\n"
+    ).encode()
+    pendientes, tiempos, errores = [peticiones], [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(puerto, peticion, pendientes, tiempos, errores) for _ in range(concurrencia)
+    ))
+    return time.perf_counter() - inicio, tiempos, errores
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)] if ordenados else 0.0
+
+
+def cargar(puerto, ruta, sesion, concurrencia=50, peticiones=1000, calentamiento=20):
+    """Métricas de `peticiones` GET a `ruta` con `concurrencia` clientes simultáneos."""
+    asyncio.run(_golpear(puerto, ruta, sesion, min(concurrencia, calentamiento), calentamiento))
+    segundos, tiempos, errores = asyncio.run(_golpear(puerto, ruta, sesion, concurrencia, peticiones))
+    return {
+        'peticiones': peticiones,
+        'errores': len(errores),
+        'rps': round(len(tiempos) / segundos, 1) if segundos else 0.0,
+        'p50_ms': round(_percentil(tiempos, 50), 2),
+        'p95_ms': round(_percentil(tiempos, 95), 2),
+        'media_ms': round(statistics.fmean(tiempos), 2) if tiempos else 0.0,
+    }
@@ -0,0 +1,251 @@
+# intranet/contadores.py
+
+# Contadores del panel de la Subdirección (ContadorPanel): solicitudes
+# pendientes por tipo, licencias activas hoy y documentos cargados esta
+# semana. Se leen con una sola consulta agrupada sobre una tabla de pocas
+# filas, en vez de contar SolicitudesPermiso, Licencias y Documentos en cada
+# carga del dashboard.
+#
+# Las señales (intranet/signals.py) los mueven en la misma transacción que
+# el cambio que los origina, y las operaciones en lote lo hacen a mano
+# (procesar_solicitudes, datos_sinteticos). El comando reconciliar_contadores
+# los recalcula desde las tablas originales, corrige cualquier desviación y
+# compacta las filas por día que ya no hacen falta.
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ContadorPanel, Documentos, Licencias, SolicitudesPermiso
+
+PENDIENTES = 'pendientes:'
+LICENCIAS = 'licencias'
+DOCUMENTOS = 'documentos'
+
+PENDIENTE = 'Pendiente'
+
+
+def _fecha(valor):
+    # Las vistas crean Licencias con fechas en texto ('2025-10-20')
+    if isinstance(valor, str):
+        return date.fromisoformat(valor)
+    return valor
+
+
+def _inicio_semana(hoy):
+    return hoy - timedelta(days=hoy.weekday())
+
+
+def _sumar_fila(clave, dia, cantidad):
+    filas = ContadorPanel.objects.filter(clave=clave, dia=dia)  # dia=None es IS NULL
+    if filas.update(valor=F('valor') + cantidad):
+        return
+    try:
+        with transaction.atomic():
+            ContadorPanel.objects.create(clave=clave, dia=dia, valor=cantidad)
+    except IntegrityError:
+        # Otra petición creó la fila entre el UPDATE y el INSERT
+        filas.update(valor=F('valor') + cantidad)
+
+
+def _aplicar(deltas):
+    """
+    deltas: {(clave, dia o None): cantidad}. Mismas sentencias para un cambio que
+    para un lote, como en intranet/resumen.py: lectura, UPDATE ... CASE y bulk_create.
+    """
+    deltas = {clave: cantidad for clave, cantidad in deltas.items() if cantidad}
+    if not deltas:
+        return
+    dias = {dia for _, dia in deltas}
+    condicion = Q(dia__in=[dia for dia in dias if dia is not None])
+    if None in dias:
+        condicion |= Q(dia__isnull=True)
+    filas = ContadorPanel.objects.filter(condicion, clave__in={clave for clave, _ in deltas}).values_list(
+        'pk', 'clave', 'dia'
+    )
+    existentes = {(clave, dia): pk for pk, clave, dia in filas if (clave, dia) in deltas}
+    if existentes:
+        ContadorPanel.objects.filter(pk__in=existentes.values()).update(valor=F('valor') + Case(
+            *[When(pk=pk, then=Value(deltas[clave])) for clave, pk in existentes.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+
+    nuevas = {clave: cantidad for clave, cantidad in deltas.items() if clave not in existentes}
+    if not nuevas:
+        return
+    try:
+        with transaction.atomic():
+            ContadorPanel.objects.bulk_create([
+                ContadorPanel(clave=clave, dia=dia, valor=cantidad) for (clave, dia), cantidad in nuevas.items()
+            ])
+    except IntegrityError:
+        # Otra petición creó alguna de las filas entre la lectura y el INSERT
+        for (clave, dia), cantidad in nuevas.items():
+            _sumar_fila(clave, dia, cantidad)
+
+
+# --- Deltas por tabla ---
+
+def _deltas_licencias(licencias, signo):
+    deltas = defaultdict(int)
+    for licencia in licencias:
+        inicio, fin = _fecha(licencia.fecha_inicio), _fecha(licencia.fecha_fin)
+        # Un período al revés no cuenta como activo ningún día (igual que en _esperados)
+        if inicio is None or fin is None or fin < inicio:
+            continue
+        deltas[(LICENCIAS, inicio)] += signo
+        deltas[(LICENCIAS, fin + timedelta(days=1))] -= signo
+    return deltas
+
+
+def cambiar_solicitud(anterior, actual):
+    """
+    anterior/actual: (estado, tipo_permiso) antes y después del cambio, o None
+    si la solicitud no existía (creación) o ya no existe (eliminación).
+    """
+    deltas = defaultdict(int)
+    if anterior is not None and anterior[0] == PENDIENTE:
+        deltas[(PENDIENTES + anterior[1], None)] -= 1
+    if actual is not None and actual[0] == PENDIENTE:
+        deltas[(PENDIENTES + actual[1], None)] += 1
+    _aplicar(deltas)
+
+
+def sumar_solicitudes(solicitudes, signo=1):
+    """Suma (o resta con signo=-1) solicitudes pendientes: después de bulk_create o update()."""
+    deltas = defaultdict(int)
+    for solicitud in solicitudes:
+        deltas[(PENDIENTES + solicitud.tipo_permiso, None)] += signo
+    _aplicar(deltas)
+
+
+def sumar_licencias(licencias, signo=1):
+    _aplicar(_deltas_licencias(licencias, signo))
+
+
+def cambiar_licencia(licencia, inicio_anterior, fin_anterior):
+    anterior = Licencias(fecha_inicio=inicio_anterior, fecha_fin=fin_anterior)
+    deltas = _deltas_licencias([anterior], -1)
+    for clave, cantidad in _deltas_licencias([licencia], 1).items():
+        deltas[clave] += cantidad
+    _aplicar(deltas)
+
+
+def sumar_documentos(documentos, signo=1):
+    deltas = defaultdict(int)
+    for documento in documentos:
+        deltas[(DOCUMENTOS, timezone.localdate(documento.fecha_carga))] += signo
+    _aplicar(deltas)
+
+
+# --- Lectura ---
+
+def _consulta(hoy):
+    return ContadorPanel.objects.filter(
+        Q(clave__startswith=PENDIENTES, dia__isnull=True)
+        | Q(clave=LICENCIAS, dia__lte=hoy)
+        | Q(clave=DOCUMENTOS, dia__gte=_inicio_semana(hoy), dia__lte=hoy)
+    ).values('clave').annotate(total=Sum('valor')).order_by('clave')
+
+
+def _panel(filas):
+    pendientes = {}
+    panel = {'licencias_activas': 0, 'documentos_semana': 0}
+    for fila in filas:
+        if fila['clave'].startswith(PENDIENTES):
+            if fila['total']:
+                pendientes[fila['clave'][len(PENDIENTES):]] = fila['total']
+        elif fila['clave'] == LICENCIAS:
+            panel['licencias_activas'] = fila['total']
+        else:
+            panel['documentos_semana'] = fila['total']
+    panel['pendientes'] = pendientes
+    panel['total_pendientes'] = sum(pendientes.values())
+    return panel
+
+
+def panel(hoy=None):
+    """
+    {'pendientes': {tipo: n}, 'total_pendientes', 'licencias_activas', 'documentos_semana'}
+    con una consulta. La semana empieza el lunes.
+    """
+    return _panel(_consulta(hoy or timezone.localdate()))
+
+
+async def apanel(hoy=None):
+    return _panel([fila async for fila in _consulta(hoy or timezone.localdate())])
+
+
+# --- Reconciliación ---
+
+def _esperados(hoy):
+    """Filas que deberían existir según las tablas originales: {(clave, dia): valor}."""
+    esperados = {}
+
+    pendientes = (
+        SolicitudesPermiso.objects.filter(estado=PENDIENTE)
+        .values_list('tipo_permiso').annotate(cantidad=Count('pk')).order_by()
+    )
+    for tipo, cantidad in pendientes:
+        esperados[(PENDIENTES + tipo, None)] = cantidad
+
+    # Todo lo anterior a hoy se resume en la fila de hoy (las activas); quedan por día
+    # solo los inicios y términos que aún no ocurren
+    licencias = defaultdict(int)
+    periodos = Licencias.objects.filter(fecha_fin__gte=hoy).filter(fecha_fin__gte=F('fecha_inicio'))
+    for inicio, fin in periodos.values_list('fecha_inicio', 'fecha_fin').iterator(chunk_size=2000):
+        licencias[max(inicio, hoy)] += 1
+        licencias[fin + timedelta(days=1)] -= 1
+    for dia, cantidad in licencias.items():
+        if cantidad:
+            esperados[(LICENCIAS, dia)] = cantidad
+
+    # Solo los días de esta semana: los anteriores ya no se leen
+    documentos = (
+        Documentos.objects.filter(fecha_carga__date__gte=_inicio_semana(hoy))
+        .annotate(dia=TruncDate('fecha_carga')).values_list('dia').annotate(cantidad=Count('pk')).order_by()
+    )
+    for dia, cantidad in documentos:
+        esperados[(DOCUMENTOS, dia)] = cantidad
+    return esperados
+
+
+@transaction.atomic
+def reconciliar(hoy=None):
+    """
+    Recalcula los contadores desde SolicitudesPermiso, Licencias y Documentos.
+    Retorna {indicador: (valor que tenía, valor corregido)} solo de los que estaban desviados.
+    Las filas existentes se bloquean mientras tanto: una señal que quiera moverlas espera al final.
+    """
+    hoy = hoy or timezone.localdate()
+    actuales = {(fila.clave, fila.dia): fila for fila in ContadorPanel.objects.select_for_update()}
+    antes = panel(hoy)
+
+    esperados = _esperados(hoy)
+    sobrantes = [fila.pk for clave, fila in actuales.items() if clave not in esperados]
+    ContadorPanel.objects.filter(pk__in=sobrantes).delete()
+    nuevas = []
+    for (clave, dia), valor in esperados.items():
+        fila = actuales.get((clave, dia))
+        if fila is None:
+            nuevas.append(ContadorPanel(clave=clave, dia=dia, valor=valor))
+        elif fila.valor != valor:
+            fila.valor = valor
+            fila.save(update_fields=['valor'])
+    ContadorPanel.objects.bulk_create(nuevas, batch_size=1000)
+
+    despues = panel(hoy)
+    desviados = {}
+    for indicador in ('licencias_activas', 'documentos_semana', 'total_pendientes'):
+        if antes[indicador] != despues[indicador]:
+            desviados[indicador] = (antes[indicador], despues[indicador])
+    for tipo in set(antes['pendientes']) | set(despues['pendientes']):
+        anterior, corregido = antes['pendientes'].get(tipo, 0), despues['pendientes'].get(tipo, 0)
+        if anterior != corregido:
+            desviados[PENDIENTES + tipo] = (anterior, corregido)
+    return desviados
@@ -0,0 +1,312 @@
+# intranet/datos_sinteticos.py
+
+# Generador de datos sintéticos de un CESFAM (comando generar_datos y el
+# benchmark de intranet/rendimiento.py): roles, funcionarios, balances,
+# solicitudes en todos sus estados, licencias, eventos (con feriados),
+# documentos, comunicados y logs de auditoría.
+#
+# Cada tabla se genera en bloques de LOTE filas. El contenido de un bloque
+# depende solo de (semilla, tabla, número de bloque), así el resultado es el
+# mismo con 1 o con N procesos; los bloques se insertan con bulk_create y,
+# en PostgreSQL, se pueden repartir entre varios procesos.
+#
+# bulk_create no dispara señales: al final se recalcula lo que ellas
+# mantienen (resumen de licencias, contadores del panel, índice de búsqueda,
+# caché de feriados).
+
+import multiprocessing
+import random
+from datetime import date, timedelta
+
+import django
+from django.db import connections, transaction
+from django.utils import timezone
+
+LOTE = 5000
+
+VOLUMENES = {
+    'funcionarios': 2000,
+    'solicitudes': 200000,
+    'licencias': 20000,
+    'logs': 1000000,
+    'documentos': 2000,
+    'comunicados': 500,
+    'eventos': 1000,
+}
+
+ROLES = ['Funcionario Administrativo', 'Subdirección', 'Dirección', 'Administrador del Sistema']
+# Proporción de funcionarios con rol de Subdirección (is_staff)
+PROPORCION_SUBDIRECCION = 0.03
+
+NOMBRES = ['Ana', 'Camila', 'Valentina', 'Francisca', 'Javiera', 'Catalina', 'Fernanda', 'Constanza', 'María',
+           'José', 'Juan', 'Diego', 'Matías', 'Felipe', 'Sebastián', 'Cristóbal', 'Pedro', 'Tomás', 'Luis']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez',
+             'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres', 'Araya', 'Flores']
+TITULOS = ['Protocolo', 'Formulario', 'Guía', 'Instructivo', 'Circular', 'Manual', 'Procedimiento']
+TEMAS = ['atención de urgencia', 'vacunación', 'licencias médicas', 'vacaciones', 'farmacia', 'esterilización',
+         'residuos clínicos', 'toma de muestras', 'salud mental', 'visitas domiciliarias', 'control de infecciones',
+         'programa cardiovascular', 'atención odontológica', 'entrega de alimentos PNAC']
+CATEGORIAS = ['Protocolos', 'Formularios', 'Guías Clínicas', 'Recursos Humanos', 'Calidad']
+TIPOS_EVENTO = ['Reunión', 'Capacitación', 'Operativo', 'Reunión']
+# Proporciones aproximadas de una bandeja real
+TIPOS_PERMISO = ['vacaciones'] * 5 + ['administrativo'] * 3 + ['licencia'] + ['otro']
+ESTADOS = ['Aprobado'] * 6 + ['Rechazado'] * 2 + ['Pendiente'] * 2
+ACCIONES = ['Cambio de Rol', 'Aprobación de Solicitud', 'Rechazo de Solicitud', 'Modificación de Días',
+            'Carga de Documento', 'Carga de Licencia', 'Carga de Justificativo']
+
+# Feriados fijos de Chile (mes, día, nombre); los móviles se omiten
+FERIADOS = [(1, 1, 'Año Nuevo'), (5, 1, 'Día del Trabajo'), (5, 21, 'Glorias Navales'),
+            (6, 20, 'Pueblos Indígenas'), (6, 29, 'San Pedro y San Pablo'), (7, 16, 'Virgen del Carmen'),
+            (8, 15, 'Asunción de la Virgen'), (9, 18, 'Fiestas Patrias'), (9, 19, 'Glorias del Ejército'),
+            (10, 12, 'Encuentro de Dos Mundos'), (10, 31, 'Iglesias Evangélicas'), (11, 1, 'Todos los Santos'),
+            (12, 8, 'Inmaculada Concepción'), (12, 25, 'Navidad')]
+
+# Años de historia que abarcan los datos (hacia atrás desde hoy)
+ANIOS = 3
+
+
+def _azar(semilla, tabla, bloque):
+    # Semilla en texto: Random la convierte con sha512, estable entre ejecuciones y procesos
+    return random.Random(f"{semilla}:{tabla}:{bloque}")
+
+
+def _periodo(azar, hoy, max_dias):
+    inicio = hoy - timedelta(days=azar.randint(-60, ANIOS * 365))
+    return inicio, inicio + timedelta(days=azar.randint(0, max_dias))
+
+
+def _filas_solicitudes(azar, cantidad, contexto):
+    from .dias_habiles import TIPOS_DIAS_HABILES, contar_dias_habiles_lote
+    from .models import SolicitudesPermiso
+
+    ahora = timezone.now()
+    filas = []
+    for _ in range(cantidad):
+        inicio, fin = _periodo(azar, contexto['hoy'], 14)
+        estado = azar.choice(ESTADOS)
+        # Las pendientes son recientes; las resueltas, de cualquier fecha
+        dias_atras = azar.randint(0, 30) if estado == 'Pendiente' else azar.randint(0, ANIOS * 365)
+        filas.append(SolicitudesPermiso(
+            id_funcionario_solicitante_id=azar.choice(contexto['funcionarios']),
+            tipo_permiso=azar.choice(TIPOS_PERMISO), fecha_inicio=inicio, fecha_fin=fin, estado=estado,
+            fecha_solicitud=ahora - timedelta(days=dias_atras, seconds=azar.randint(0, 86400)),
+        ))
+    # Días hábiles de todo el bloque en un solo cálculo vectorizado
+    habiles = [f for f in filas if f.tipo_permiso in TIPOS_DIAS_HABILES]
+    for fila, dias in zip(habiles, contar_dias_habiles_lote([f.fecha_inicio for f in habiles],
+                                                            [f.fecha_fin for f in habiles])):
+        fila.dias_solicitados = dias
+    for fila in filas:
+        if fila.tipo_permiso not in TIPOS_DIAS_HABILES:
+            fila.dias_solicitados = (fila.fecha_fin - fila.fecha_inicio).days + 1
+    return filas
+
+
+def _filas_licencias(azar, cantidad, contexto):
+    from .models import Licencias
+
+    filas = []
+    for _ in range(cantidad):
+        inicio, fin = _periodo(azar, contexto['hoy'], 30)
+        filas.append(Licencias(
+            id_funcionario_id=azar.choice(contexto['funcionarios']),
+            id_subdireccion_carga_id=azar.choice(contexto['subdireccion']),
+            fecha_inicio=inicio, fecha_fin=fin, ruta_foto_licencia='licencias/sintetica.jpg',
+        ))
+    return filas
+
+
+def _filas_eventos(azar, cantidad, contexto):
+    from .models import Eventos_Calendario
+
+    filas = []
+    for _ in range(cantidad):
+        inicio, fin = _periodo(azar, contexto['hoy'], 2)
+        tipo = azar.choice(TIPOS_EVENTO)
+        filas.append(Eventos_Calendario(
+            titulo=f"{tipo}: {azar.choice(TEMAS)}", fecha_inicio=inicio, fecha_fin=fin, tipo_evento=tipo,
+        ))
+    return filas
+
+
+def _filas_documentos(azar, cantidad, contexto):
+    from .models import Documentos
+
+    return [
+        Documentos(
+            titulo=f"{azar.choice(TITULOS)} de {azar.choice(TEMAS)} v{azar.randint(1, 9)}",
+            categoria=azar.choice(CATEGORIAS), ruta_archivo='documentos/sintetico.pdf',
+            id_autor_carga_id=azar.choice(contexto['subdireccion']),
+        )
+        for _ in range(cantidad)
+    ]
+
+
+def _filas_comunicados(azar, cantidad, contexto):
+    from .models import Comunicados
+
+    return [
+        Comunicados(
+            titulo=f"Comunicado: {azar.choice(TEMAS)}",
+            cuerpo=' '.join(f"Se informa sobre {azar.choice(TEMAS)}." for _ in range(azar.randint(3, 12))),
+            id_autor_id=azar.choice(contexto['subdireccion']),
+        )
+        for _ in range(cantidad)
+    ]
+
+
+def _filas_logs(azar, cantidad, contexto):
+    from .models import Logs_Auditoria
+
+    ahora = timezone.now()
+    return [
+        Logs_Auditoria(
+            fecha_hora=ahora - timedelta(seconds=azar.randint(0, ANIOS * 365 * 86400)),
+            id_usuario_actor_id=azar.choice(contexto['subdireccion']),
+            accion=azar.choice(ACCIONES),
+            detalle=f"Funcionario {azar.choice(contexto['funcionarios'])}: registro generado",
+        )
+        for _ in range(cantidad)
+    ]
+
+
+GENERADORES = {
+    'solicitudes': _filas_solicitudes,
+    'licencias': _filas_licencias,
+    'eventos': _filas_eventos,
+    'documentos': _filas_documentos,
+    'comunicados': _filas_comunicados,
+    'logs': _filas_logs,
+}
+
+
+def _insertar_bloque(tarea):
+    """Genera e inserta un bloque. Corre en el proceso principal o en un proceso del pool."""
+    semilla, tabla, bloque, cantidad, contexto = tarea
+    filas = GENERADORES[tabla](_azar(semilla, tabla, bloque), cantidad, contexto)
+    with transaction.atomic():
+        type(filas[0]).objects.bulk_create(filas)
+    return tabla, len(filas)
+
+
+def _bloques(total):
+    return [(i, min(LOTE, total - i * LOTE)) for i in range((total + LOTE - 1) // LOTE)]
+
+
+def _crear_roles():
+    from .models import Roles
+
+    return {nombre: Roles.objects.get_or_create(nombre_rol=nombre)[0] for nombre in ROLES}
+
+
+def _crear_funcionarios(semilla, total, roles, prefijo):
+    from .models import Funcionarios
+
+    ids, subdireccion = [], []
+    for bloque, cantidad in _bloques(total):
+        azar = _azar(semilla, 'funcionarios', bloque)
+        filas = []
+        for i in range(bloque * LOTE, bloque * LOTE + cantidad):
+            nombre, apellido = azar.choice(NOMBRES), azar.choice(APELLIDOS)
+            # El primero siempre es de Subdirección: con pocos funcionarios podría no salir ninguno,
+            # y ellos son los autores de licencias, documentos, comunicados y logs
+            es_subdireccion = azar.random() < PROPORCION_SUBDIRECCION or i == 0
+            usuario = f"{prefijo}{i:06d}@cesfam.cl"
+            filas.append(Funcionarios(
+                # '!' es una contraseña inutilizable: no se calcula ningún hash
+                username=usuario, email=usuario, password='!', first_name=nombre, last_name=apellido,
+                nombre=f"{nombre} {apellido}", is_staff=es_subdireccion,
+                id_rol=roles['Subdirección' if es_subdireccion else 'Funcionario Administrativo'],
+            ))
+        for funcionario in Funcionarios.objects.bulk_create(filas):
+            ids.append(funcionario.pk)
+            if funcionario.is_staff:
+                subdireccion.append(funcionario.pk)
+    return ids, subdireccion
+
+
+def _crear_balances(semilla, ids):
+    from .models import Dias_Administrativos
+
+    azar = _azar(semilla, 'balances', 0)
+    filas = [
+        Dias_Administrativos(id_funcionario_id=pk, vacaciones_restantes=azar.randint(0, 25),
+                             admin_restantes=azar.randint(0, 6))
+        for pk in ids
+    ]
+    Dias_Administrativos.objects.bulk_create(filas, batch_size=LOTE, ignore_conflicts=True)
+
+
+def _crear_feriados(hoy):
+    from .models import Eventos_Calendario
+
+    existentes = set(Eventos_Calendario.objects.filter(tipo_evento='Feriado').values_list('fecha_inicio', flat=True))
+    filas = []
+    for anio in range(hoy.year - ANIOS, hoy.year + 2):
+        for mes, dia, nombre in FERIADOS:
+            fecha = date(anio, mes, dia)
+            if fecha not in existentes:
+                filas.append(Eventos_Calendario(titulo=nombre, fecha_inicio=fecha, fecha_fin=fecha,
+                                                tipo_evento='Feriado'))
+    Eventos_Calendario.objects.bulk_create(filas)
+    return len(filas)
+
+
+def generar(volumenes=None, semilla=0, procesos=1, funcionarios_extra=(), subdireccion_extra=(),
+            prefijo=None, informar=None):
+    """
+    Genera los datos y retorna {tabla: filas creadas}.
+    `funcionarios_extra`/`subdireccion_extra`: ids de usuarios ya existentes que
+    también reciben solicitudes, licencias, etc. (p. ej. los del benchmark).
+    `procesos` > 1 reparte los bloques en un pool; solo se usa con PostgreSQL
+    porque SQLite no admite escrituras concurrentes.
+    """
+    from . import busqueda, contadores
+    from .dias_habiles import invalidar_feriados
+    from .resumen import recalcular_resumen
+
+    volumenes = {**VOLUMENES, **(volumenes or {})}
+    informar = informar or (lambda mensaje: None)
+    prefijo = prefijo if prefijo is not None else f"sint{semilla}-"
+    hoy = date.today()
+    creados = {}
+
+    # 1. Tablas base en el proceso principal: sus ids se reparten a los bloques
+    roles = _crear_roles()
+    creados['feriados'] = _crear_feriados(hoy)
+    ids, subdireccion = _crear_funcionarios(semilla, volumenes['funcionarios'], roles, prefijo)
+    creados['funcionarios'] = len(ids)
+    ids += list(funcionarios_extra)
+    subdireccion += list(subdireccion_extra)
+    if not subdireccion:
+        # Solo con --funcionarios 0 y sin usuarios extra de Subdirección
+        subdireccion = ids[:1]
+    _crear_balances(semilla, ids)
+    informar(f"Funcionarios: {len(ids)} (subdirección: {len(subdireccion)})")
+
+    # 2. Tablas grandes por bloques
+    contexto = {'hoy': hoy, 'funcionarios': ids, 'subdireccion': subdireccion}
+    tareas = [
+        (semilla, tabla, bloque, cantidad, contexto)
+        for tabla in GENERADORES
+        for bloque, cantidad in _bloques(volumenes[tabla])
+    ]
+    if procesos > 1 and connections['default'].vendor == 'postgresql':
+        # Cada proceso abre su propia conexión: se cierran las heredadas antes de crear el pool
+        connections.close_all()
+        with multiprocessing.get_context('spawn').Pool(procesos, initializer=django.setup) as pool:
+            resultados = pool.imap_unordered(_insertar_bloque, tareas)
+            for tabla, cantidad in resultados:
+                creados[tabla] = creados.get(tabla, 0) + cantidad
+    else:
+        for tarea in tareas:
+            tabla, cantidad = _insertar_bloque(tarea)
+            creados[tabla] = creados.get(tabla, 0) + cantidad
+    informar(f"Filas creadas: {creados}")
+
+    # 3. Lo que normalmente mantienen las señales
+    recalcular_resumen()
+    contadores.reconciliar()
+    busqueda.reindexar()
+    invalidar_feriados()
+    return creados
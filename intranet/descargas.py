@@ -0,0 +1,185 @@
+# intranet/descargas.py
+
+# Entrega de archivos subidos (documentos, licencias, justificativos) detrás
+# de la vista protegida descargar_archivo_view. Soporta:
+#   - GET condicional (If-None-Match / If-Modified-Since) -> 304
+#   - Range de un solo tramo (bytes=a-b, a-, -n) -> 206 / 416
+#   - Delegar el envío al servidor web (settings.DESCARGAS_SENDFILE):
+#       'x-accel-redirect' (nginx) o 'x-sendfile' (Apache/lighttpd).
+#     En ese modo Django solo valida permisos; el servidor atiende Range.
+# Sin servidor delante se usa FileResponse, que el servidor WSGI puede
+# enviar con sendfile() (wsgi.file_wrapper) sin copiar el archivo a Python.
+# Bajo ASGI, Django leería la FileResponse completa (sync_to_async(list))
+# antes de enviarla: ahí el archivo se entrega con un iterador async por
+# bloques, y la memoria por descarga queda en un BLOQUE.
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+from .storage import es_deduplicado
+
+BLOQUE = 64 * 1024
+
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _Tramo:
+    """Lector limitado a `restante` bytes desde la posición actual del archivo."""
+
+    def __init__(self, archivo, restante):
+        self.archivo = archivo
+        self.restante = restante
+
+    def read(self, tamano=-1):
+        if self.restante <= 0:
+            return b''
+        if tamano < 0 or tamano > self.restante:
+            tamano = self.restante
+        datos = self.archivo.read(tamano)
+        self.restante -= len(datos)
+        return datos
+
+    def close(self):
+        self.archivo.close()
+
+
+async def _bloques_async(archivo, restante):
+    """Entrega `restante` bytes desde la posición actual, leyendo cada bloque en un thread."""
+    leer = sync_to_async(archivo.read, thread_sensitive=False)
+    try:
+        while restante > 0:
+            datos = await leer(min(BLOQUE, restante))
+            if not datos:
+                break
+            restante -= len(datos)
+            yield datos
+    finally:
+        await sync_to_async(archivo.close, thread_sensitive=False)()
+
+
+def _etag(nombre, estado):
+    if es_deduplicado(nombre):
+        # El nombre ya es el sha256 del contenido
+        return quote_etag(os.path.splitext(os.path.basename(nombre))[0])
+    return quote_etag(f"{estado.st_mtime_ns:x}-{estado.st_size:x}")
+
+
+def _rango(request, tamano, etag, modificado):
+    """
+    (inicio, fin) inclusivo si hay que responder un tramo, None para el archivo
+    completo, o False si el rango no se puede satisfacer.
+    """
+    encabezado = request.META.get('HTTP_RANGE', '').strip()
+    if not encabezado or request.method != 'GET':
+        return None
+
+    # If-Range: si el archivo cambió desde que el cliente tiene su copia, va completo
+    si_rango = request.META.get('HTTP_IF_RANGE', '').strip()
+    if si_rango:
+        if si_rango.startswith(('"', 'W/')):
+            if si_rango != etag:
+                return None
+        elif parse_http_date_safe(si_rango) != modificado:
+            return None
+
+    # Varios tramos (bytes=0-1,5-9) no se soportan: se responde completo, como permite la RFC 9110
+    coincidencia = _RANGO.match(encabezado.replace(' ', ''))
+    if not coincidencia:
+        return None
+    desde, hasta = coincidencia.groups()
+    if not desde and not hasta:
+        return None
+    if not desde:
+        # Sufijo: los últimos N bytes
+        largo = int(hasta)
+        if largo == 0:
+            return False
+        return max(tamano - largo, 0), tamano - 1
+    inicio = int(desde)
+    fin = min(int(hasta), tamano - 1) if hasta else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        return False
+    return inicio, fin
+
+
+def _encabezados_comunes(respuesta, etag, modificado):
+    respuesta['ETag'] = etag
+    respuesta['Last-Modified'] = http_date(modificado)
+    # Archivos con datos personales: solo la caché del navegador, revalidando siempre
+    respuesta['Cache-Control'] = 'private, no-cache'
+    respuesta['Accept-Ranges'] = 'bytes'
+    return respuesta
+
+
+def servir_archivo(request, nombre, nombre_descarga=None, adjunto=False):
+    """
+    Respuesta para el archivo `nombre` del storage. Los permisos ya deben
+    estar validados por la vista.
+    """
+    try:
+        ruta = default_storage.path(nombre)
+        estado = os.stat(ruta)
+    except (OSError, ValueError):
+        raise Http404("Archivo no encontrado")
+
+    etag = _etag(nombre, estado)
+    modificado = int(estado.st_mtime)
+
+    # 1. GET condicional: si el navegador ya lo tiene, 304 sin abrir el archivo
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if no_modificado is not None:
+        return _encabezados_comunes(no_modificado, etag, modificado)
+
+    tipo_contenido = mimetypes.guess_type(nombre_descarga or nombre)[0] or 'application/octet-stream'
+    disposicion = content_disposition_header(adjunto, nombre_descarga or os.path.basename(nombre))
+
+    # 2. El servidor web hace el envío (y atiende Range por su cuenta)
+    modo = getattr(settings, 'DESCARGAS_SENDFILE', None)
+    if modo:
+        respuesta = HttpResponse(content_type=tipo_contenido)
+        if modo == 'x-accel-redirect':
+            prefijo = getattr(settings, 'DESCARGAS_ACCEL_PREFIJO', '/protegido/')
+            respuesta['X-Accel-Redirect'] = prefijo + quote(nombre)
+        else:
+            respuesta['X-Sendfile'] = ruta
+        respuesta['Content-Disposition'] = disposicion
+        return _encabezados_comunes(respuesta, etag, modificado)
+
+    # 3. Lo envía Django
+    rango = _rango(request, estado.st_size, etag, modificado)
+    if rango is False:
+        respuesta = HttpResponse(status=416)
+        respuesta['Content-Range'] = f"bytes */{estado.st_size}"
+        return _encabezados_comunes(respuesta, etag, modificado)
+
+    inicio, fin = rango or (0, estado.st_size - 1)
+    largo = fin - inicio + 1
+    codigo = 200 if rango is None else 206
+    archivo = open(ruta, 'rb')
+    archivo.seek(inicio)
+    if isinstance(request, ASGIRequest):
+        # Un bloque en memoria por descarga, no el archivo completo
+        respuesta = StreamingHttpResponse(_bloques_async(archivo, largo), content_type=tipo_contenido, status=codigo)
+        respuesta['Content-Length'] = largo
+    elif fin == estado.st_size - 1:
+        # Hasta el final: el archivo posicionado sigue sirviendo para sendfile()
+        respuesta = FileResponse(archivo, content_type=tipo_contenido, status=codigo)
+        respuesta.block_size = BLOQUE
+    else:
+        respuesta = FileResponse(_Tramo(archivo, largo), content_type=tipo_contenido, status=206)
+        respuesta['Content-Length'] = largo
+        respuesta.block_size = BLOQUE
+    if rango is not None:
+        respuesta['Content-Range'] = f"bytes {inicio}-{fin}/{estado.st_size}"
+    respuesta['Content-Disposition'] = disposicion
+    return _encabezados_comunes(respuesta, etag, modificado)
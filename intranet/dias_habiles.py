@@ -0,0 +1,136 @@
+# intranet/dias_habiles.py
+
+# Cálculo de días hábiles (lunes a viernes, sin feriados) para las
+# solicitudes de vacaciones y días administrativos.
+# Los feriados salen de Eventos_Calendario (tipo_evento 'Feriado') y se
+# guardan en caché; intranet/signals.py la invalida cuando cambia un evento.
+# Con caché locmem la invalidación solo llega al proceso que guardó el evento:
+# en los demás la lista se renueva al vencer FERIADOS_CACHE_TIMEOUT.
+
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Eventos_Calendario, SolicitudesPermiso
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él el modo lote usa la versión en Python
+    np = None
+
+CLAVE_FERIADOS = 'dias_habiles:feriados'
+
+# Tipos de permiso que se cuentan en días hábiles; el resto (licencia, otro) en días corridos
+TIPOS_DIAS_HABILES = ('vacaciones', 'administrativo')
+
+
+def _timeout():
+    return getattr(settings, 'FERIADOS_CACHE_TIMEOUT', 300)
+
+
+def feriados():
+    """Tupla ordenada con las fechas de feriado que caen de lunes a viernes."""
+    fechas = cache.get(CLAVE_FERIADOS)
+    if fechas is None:
+        dias = set()
+        eventos = Eventos_Calendario.objects.filter(tipo_evento__iexact='feriado').values_list(
+            'fecha_inicio', 'fecha_fin'
+        )
+        for fecha_inicio, fecha_fin in eventos:
+            # Un feriado puede abarcar varios días (ej: Fiestas Patrias)
+            actual = fecha_inicio
+            while actual <= (fecha_fin or fecha_inicio):
+                if actual.weekday() < 5:
+                    dias.add(actual)
+                actual += timedelta(days=1)
+        fechas = tuple(sorted(dias))
+        cache.set(CLAVE_FERIADOS, fechas, _timeout())
+    return fechas
+
+
+def invalidar_feriados():
+    transaction.on_commit(lambda: cache.delete(CLAVE_FERIADOS))
+
+
+def _dias_lunes_a_viernes(fecha_inicio, fecha_fin):
+    total = (fecha_fin - fecha_inicio).days + 1
+    if total <= 0:
+        return 0
+    semanas, resto = divmod(total, 7)
+    dia_semana = fecha_inicio.weekday()
+    return semanas * 5 + sum(1 for i in range(resto) if (dia_semana + i) % 7 < 5)
+
+
+def _contar(fecha_inicio, fecha_fin, lista_feriados):
+    if fecha_fin < fecha_inicio:
+        return 0
+    en_rango = bisect_right(lista_feriados, fecha_fin) - bisect_left(lista_feriados, fecha_inicio)
+    return _dias_lunes_a_viernes(fecha_inicio, fecha_fin) - en_rango
+
+
+def contar_dias_habiles(fecha_inicio, fecha_fin):
+    """Días hábiles entre ambas fechas, ambas inclusive."""
+    return _contar(fecha_inicio, fecha_fin, feriados())
+
+
+def contar_dias_habiles_lote(inicios, fines):
+    """
+    Días hábiles para muchos períodos de una vez (listas del mismo largo).
+    Con numpy usa busday_count vectorizado; sin numpy, el cálculo por
+    período es O(log feriados), así que sigue siendo rápido.
+    """
+    lista_feriados = feriados()
+    if np is not None and len(inicios):
+        inicio = np.array(inicios, dtype='datetime64[D]')
+        fin = np.array(fines, dtype='datetime64[D]') + np.timedelta64(1, 'D')  # busday_count excluye el final
+        conteo = np.busday_count(
+            inicio, np.maximum(fin, inicio), holidays=np.array(lista_feriados, dtype='datetime64[D]')
+        )
+        return conteo.tolist()
+    return [_contar(fecha_inicio, fecha_fin, lista_feriados) for fecha_inicio, fecha_fin in zip(inicios, fines)]
+
+
+def dias_solicitados(tipo_permiso, fecha_inicio, fecha_fin):
+    """Días que se descuentan por una solicitud según su tipo."""
+    if tipo_permiso in TIPOS_DIAS_HABILES:
+        return contar_dias_habiles(fecha_inicio, fecha_fin)
+    return (fecha_fin - fecha_inicio).days + 1 # +1 para incluir el día de inicio
+
+
+def recalcular_dias_solicitados(solo_pendientes=False, tamano_lote=2000):
+    """
+    Recalcula dias_solicitados de las solicitudes de vacaciones/administrativos
+    (por ejemplo, después de agregar un feriado). Recorre la tabla por bloques
+    de pk y solo escribe las filas que cambian, con bulk_update.
+    Retorna la cantidad de solicitudes modificadas.
+    Ojo: no ajusta los balances de solicitudes que ya fueron aprobadas.
+    """
+    solicitudes = SolicitudesPermiso.objects.filter(tipo_permiso__in=TIPOS_DIAS_HABILES)
+    if solo_pendientes:
+        solicitudes = solicitudes.filter(estado='Pendiente')
+
+    modificadas = 0
+    ultimo_pk = 0
+    while True:
+        bloque = list(
+            solicitudes.filter(pk__gt=ultimo_pk).order_by('pk').values_list(
+                'pk', 'fecha_inicio', 'fecha_fin', 'dias_solicitados'
+            )[:tamano_lote]
+        )
+        if not bloque:
+            break
+        ultimo_pk = bloque[-1][0]
+
+        pks, inicios, fines, actuales = zip(*bloque)
+        nuevos = contar_dias_habiles_lote(inicios, fines)
+        cambios = [
+            SolicitudesPermiso(pk=pk, dias_solicitados=nuevo)
+            for pk, actual, nuevo in zip(pks, actuales, nuevos)
+            if actual != nuevo
+        ]
+        SolicitudesPermiso.objects.bulk_update(cambios, ['dias_solicitados'], batch_size=500)
+        modificadas += len(cambios)
+    return modificadas
@@ -0,0 +1,82 @@
+# intranet/estaticos.py
+
+# Archivos estáticos para una red lenta o sin salida a internet.
+#
+# 1. FullCalendar se sirve desde intranet/static/vendor/ (solo el locale 'es')
+#    en vez del CDN. El comando vendorizar_fullcalendar lo descarga una vez (o lo
+#    copia con --desde de un paquete npm) y el resultado se sube al repositorio.
+#    En desarrollo, mientras no esté, la etiqueta {% fullcalendar %} usa el CDN y
+#    calendario.html lo carga sin bloquear la página, con un aviso si no llega;
+#    en producción collectstatic se detiene hasta que esté.
+# 2. EstaticosComprimidos (STORAGES['staticfiles'] con DEBUG=False): collectstatic
+#    agrega el hash del contenido al nombre (style.3f2a9c.css), así el servidor
+#    web puede cachearlos "para siempre", y deja al lado las versiones .gz y .br
+#    (brotli si está instalado) para que nginx las entregue sin comprimir en cada
+#    petición (gzip_static / brotli_static).
+
+import gzip
+import os
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FULLCALENDAR_VERSION = '5.11.3'
+FULLCALENDAR_CDN = f'https://cdn.jsdelivr.net/npm/fullcalendar@{FULLCALENDAR_VERSION}/'
+FULLCALENDAR_DIRECTORIO = f'vendor/fullcalendar-{FULLCALENDAR_VERSION}/'
+# Lo que usa calendario.html; locales-all.min.js (todos los idiomas) se reemplaza por locales/es.js
+FULLCALENDAR_ARCHIVOS = ('main.min.js', 'main.min.css', 'locales/es.js')
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.html', '.xml', '.ico')
+TAMANO_MINIMO = 512         # bytes: bajo esto la cabecera del compresor se come el ahorro
+AHORRO_MINIMO = 0.9         # solo se guarda la versión comprimida si pesa menos del 90 %
+
+
+@lru_cache(maxsize=None)
+def fullcalendar_vendorizado(nombre):
+    return finders.find(FULLCALENDAR_DIRECTORIO + nombre) is not None
+
+
+class EstaticosComprimidos(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage que además precomprime los archivos con hash."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Sin el paquete local, calendario.html quedaría apuntando al CDN en producción
+        faltantes = [
+            nombre for nombre in FULLCALENDAR_ARCHIVOS if FULLCALENDAR_DIRECTORIO + nombre not in paths
+        ]
+        if faltantes:
+            raise ImproperlyConfigured(
+                f"Faltan archivos de FullCalendar en intranet/static/{FULLCALENDAR_DIRECTORIO}: "
+                f"{', '.join(faltantes)}. Ejecutar 'manage.py vendorizar_fullcalendar' y hacer commit."
+            )
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nombre in set(self.hashed_files.values()):
+            if nombre.lower().endswith(EXTENSIONES_COMPRIMIBLES):
+                self._comprimir(nombre)
+
+    def _comprimir(self, nombre):
+        ruta = self.path(nombre)
+        compresores = [('.gz', lambda datos: gzip.compress(datos, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            compresores.append(('.br', lambda datos: brotli.compress(datos, quality=11)))
+
+        # El nombre lleva el hash del contenido: si la versión comprimida ya existe, está al día
+        pendientes = [(sufijo, comprimir) for sufijo, comprimir in compresores if not os.path.exists(ruta + sufijo)]
+        if not pendientes or os.path.getsize(ruta) < TAMANO_MINIMO:
+            return
+        with open(ruta, 'rb') as archivo:
+            datos = archivo.read()
+        for sufijo, comprimir in pendientes:
+            comprimido = comprimir(datos)
+            if len(comprimido) < len(datos) * AHORRO_MINIMO:
+                with open(ruta + sufijo, 'wb') as archivo:
+                    archivo.write(comprimido)
@@ -0,0 +1,180 @@
+# intranet/exportar.py
+
+# Generadores para exportar reportes a CSV y XLSX sin armar el archivo en memoria.
+# Cada generador produce bytes a medida que recibe filas, así se pueden
+# entregar directamente a un StreamingHttpResponse: la memoria usada es la
+# misma para 100 filas o para 500.000.
+#
+# Bajo ASGI, StreamingHttpResponse recorre un iterador síncrono con
+# sync_to_async(list), es decir, arma el archivo completo antes de enviar el
+# primer byte. Para ese caso los generadores se envuelven con en_async().
+
+import csv
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+# Cada cuántas filas se envía al cliente lo acumulado en el buffer
+FILAS_POR_ENVIO = 500
+
+
+class _Buffer:
+    """Archivo de solo escritura que acumula bytes hasta que se vacían."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        if isinstance(datos, str):
+            datos = datos.encode('utf-8')
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        # zipfile necesita la posición para escribir los encabezados locales
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        # .values_list() entrega las fechas en UTC; se muestran en hora de Chile
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime('%Y-%m-%d %H:%M')
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d')
+    return str(valor)
+
+
+def generar_csv(encabezados, filas):
+    """Genera el CSV por bloques. Incluye BOM para que Excel respete los acentos."""
+    buffer = _Buffer()
+    escritor = csv.writer(buffer, delimiter=';')
+    buffer.write('\ufeff')
+    escritor.writerow(encabezados)
+
+    for numero, fila in enumerate(filas, start=1):
+        escritor.writerow([_texto(valor) for valor in fila])
+        if numero % FILAS_POR_ENVIO == 0:
+            yield buffer.vaciar()
+    yield buffer.vaciar()
+
+
+# --- XLSX mínimo (Office Open XML) escrito directamente en un ZIP en streaming ---
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _celda(valor):
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c t="n"><v>{valor}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(_texto(valor))}</t></is></c>'
+
+
+def _fila_xml(valores):
+    return '<row>' + ''.join(_celda(valor) for valor in valores) + '</row>'
+
+
+def generar_xlsx(encabezados, filas, hoja='Reporte'):
+    """
+    Genera un XLSX de una hoja. La hoja se escribe con celdas inlineStr
+    (sin tabla de strings compartidos) para no tener que recordar nada entre filas.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archivo:
+        archivo.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archivo.writestr('_rels/.rels', _RELS)
+        archivo.writestr('xl/workbook.xml', _WORKBOOK.format(hoja=escape(hoja)))
+        archivo.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield buffer.vaciar()
+
+        # force_zip64: el tamaño final no se conoce de antemano
+        with archivo.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as hoja_xml:
+            hoja_xml.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            hoja_xml.write(_fila_xml(encabezados).encode('utf-8'))
+
+            for numero, fila in enumerate(filas, start=1):
+                hoja_xml.write(_fila_xml(fila).encode('utf-8'))
+                if numero % FILAS_POR_ENVIO == 0:
+                    yield buffer.vaciar()
+
+            hoja_xml.write(b'</sheetData></worksheet>')
+    yield buffer.vaciar()
+
+
+async def en_async(bloques):
+    """
+    Iterador async sobre un generador de bloques (generar_csv, generar_xlsx).
+    Cada bloque se pide por separado y en el thread de la petición
+    (thread_sensitive), que es el dueño de la conexión y del cursor de .iterator().
+    """
+    siguiente = sync_to_async(next)
+    try:
+        while True:
+            bloque = await siguiente(bloques, None)
+            if bloque is None:
+                break
+            yield bloque
+    finally:
+        # Si el cliente corta la descarga, el cursor se cierra ahora y no al recolectar basura
+        await sync_to_async(bloques.close)()
+
+
+FORMATOS = {
+    'csv': (generar_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (generar_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
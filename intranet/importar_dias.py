@@ -0,0 +1,285 @@
+# intranet/importar_dias.py
+
+# Carga masiva de balances de Dias_Administrativos desde CSV o XLSX
+# (gestion_dias_view y el comando importar_dias).
+#
+# Columnas (la primera fila es el encabezado; los nombres admiten variantes):
+#   funcionario              username, email o id del funcionario
+#   vacaciones_restantes     opcional: si falta, se mantiene el valor actual
+#   admin_restantes          opcional: si falta, se mantiene el valor actual
+#
+# Cada fila se valida con las reglas de DiasAdministrativosForm. Las filas con
+# error se informan y se omiten; el resto se aplica por bloques: dos consultas
+# de lectura por bloque, bulk_create para los balances que no existen y
+# bulk_update para los que cambian.
+
+import codecs
+import csv
+import re
+import unicodedata
+import zipfile
+from collections import namedtuple
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import auditoria
+from .cache import invalidar_balances
+from .forms import DiasAdministrativosForm
+from .models import Dias_Administrativos, Funcionarios
+
+TAMANO_LOTE = 1000
+ID_MAXIMO = 2 ** 63 - 1
+CAMPOS = ('vacaciones_restantes', 'admin_restantes')
+
+# Nombre normalizado de la columna -> campo
+COLUMNAS = {
+    'funcionario': 'funcionario', 'usuario': 'funcionario', 'username': 'funcionario', 'email': 'funcionario',
+    'correo': 'funcionario', 'id_funcionario': 'funcionario',
+    'vacaciones_restantes': 'vacaciones_restantes', 'vacaciones': 'vacaciones_restantes',
+    'dias_vacaciones': 'vacaciones_restantes',
+    'admin_restantes': 'admin_restantes', 'administrativos': 'admin_restantes',
+    'dias_administrativos': 'admin_restantes',
+}
+
+ErrorFila = namedtuple('ErrorFila', ['linea', 'funcionario', 'mensaje'])
+
+
+class Resultado:
+    def __init__(self):
+        self.creados = 0
+        self.actualizados = 0
+        self.sin_cambios = 0
+        self.errores = []
+
+    @property
+    def procesadas(self):
+        return self.creados + self.actualizados + self.sin_cambios + len(self.errores)
+
+
+class ArchivoInvalido(ValueError):
+    pass
+
+
+def _normalizar(nombre):
+    nombre = unicodedata.normalize('NFKD', str(nombre or '')).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', nombre.strip().lower()).strip('_')
+
+
+# --- Lectura de archivos ---
+
+def _validar_utf8(archivo):
+    # Se recorre el archivo completo antes de aplicar nada: un byte inválido al final
+    # no debe aparecer después de que los primeros bloques ya se guardaron
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        for bloque in iter(lambda: archivo.read(64 * 1024), b''):
+            decodificador.decode(bloque)
+        decodificador.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ArchivoInvalido("El CSV debe estar guardado en UTF-8.")
+    archivo.seek(0)
+
+
+def _filas_csv(archivo):
+    _validar_utf8(archivo)
+    # Acepta ';' (Excel en español, y el de exportar.py), ',' o tabulador
+    muestra = archivo.read(4096).decode('utf-8-sig', errors='ignore')
+    archivo.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=';,\t')
+    except csv.Error:
+        dialecto = csv.excel
+    yield from csv.reader(codecs.iterdecode(archivo, 'utf-8-sig'), dialecto)
+
+
+def _columna(referencia):
+    # 'AB12' -> 27 (base 0)
+    numero = 0
+    for letra in re.match(r'[A-Z]+', referencia).group():
+        numero = numero * 26 + ord(letra) - 64
+    return numero - 1
+
+
+def _filas_xlsx(archivo):
+    """Lee la primera hoja sin cargarla completa en memoria (sin dependencias externas)."""
+    try:
+        libro = zipfile.ZipFile(archivo)
+    except zipfile.BadZipFile:
+        raise ArchivoInvalido("El archivo no es un XLSX válido.")
+    ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+    compartidos = []
+    if 'xl/sharedStrings.xml' in libro.namelist():
+        with libro.open('xl/sharedStrings.xml') as xml:
+            for _, elemento in iterparse(xml):
+                if elemento.tag == f'{ns}si':
+                    compartidos.append(''.join(t.text or '' for t in elemento.iter(f'{ns}t')))
+                    elemento.clear()
+
+    hojas = sorted(n for n in libro.namelist() if re.match(r'xl/worksheets/sheet\d+\.xml$', n))
+    if not hojas:
+        raise ArchivoInvalido("El XLSX no tiene hojas.")
+    # Igual que _validar_utf8: la hoja se recorre completa antes de aplicar nada, así un
+    # XML o un ZIP dañado al final no aparece después de guardar los primeros bloques
+    with libro.open(hojas[0]) as xml:
+        for _ in _filas_hoja(xml, ns, compartidos):
+            pass
+    with libro.open(hojas[0]) as xml:
+        yield from _filas_hoja(xml, ns, compartidos)
+
+
+def _filas_hoja(xml, ns, compartidos):
+    try:
+        for _, elemento in iterparse(xml):
+            if elemento.tag != f'{ns}row':
+                continue
+            fila = []
+            for celda in elemento.iter(f'{ns}c'):
+                posicion = _columna(celda.get('r')) if celda.get('r') else len(fila)
+                fila.extend([''] * (posicion - len(fila)))
+                tipo = celda.get('t')
+                if tipo == 'inlineStr':
+                    valor = ''.join(t.text or '' for t in celda.iter(f'{ns}t'))
+                else:
+                    v = celda.find(f'{ns}v')
+                    valor = v.text if v is not None and v.text else ''
+                    if tipo == 's' and valor:
+                        valor = compartidos[int(valor)]
+                fila.append(valor)
+            elemento.clear()
+            yield fila
+    except (ParseError, IndexError, ValueError, zipfile.BadZipFile):
+        raise ArchivoInvalido("El XLSX está dañado o no se pudo leer completo.")
+
+
+def leer_filas(archivo, nombre):
+    """
+    Itera (línea, {campo: valor}) de un archivo CSV o XLSX abierto en modo binario.
+    Lanza ArchivoInvalido si el formato o el encabezado no sirven.
+    """
+    if nombre.lower().endswith('.xlsx'):
+        filas = _filas_xlsx(archivo)
+    elif nombre.lower().endswith(('.csv', '.txt')):
+        filas = _filas_csv(archivo)
+    else:
+        raise ArchivoInvalido("Formato no soportado: use CSV o XLSX.")
+
+    encabezado = next(filas, None)
+    if not encabezado:
+        raise ArchivoInvalido("El archivo está vacío.")
+    campos = [COLUMNAS.get(_normalizar(columna)) for columna in encabezado]
+    if 'funcionario' not in campos:
+        raise ArchivoInvalido("Falta la columna 'funcionario' (username, email o id).")
+    if not any(c in campos for c in CAMPOS):
+        raise ArchivoInvalido("Falta al menos una columna de días: 'vacaciones_restantes' o 'admin_restantes'.")
+
+    for linea, valores in enumerate(filas, start=2):
+        datos = {
+            campo: str(valor).strip() for campo, valor in zip(campos, valores) if campo and str(valor).strip()
+        }
+        if datos:
+            yield linea, datos
+
+
+# --- Aplicación ---
+
+def _buscar_funcionarios(claves):
+    """{clave del archivo: pk} buscando por username, email o id en una consulta."""
+    # Solo dígitos ASCII ('²'.isdigit() es True) y dentro de un entero de 64 bits (SQLite da OverflowError);
+    # el resto no puede ser un id y queda como "Funcionario no encontrado"
+    ids = [int(c) for c in claves if c.isascii() and c.isdigit() and int(c) <= ID_MAXIMO]
+    encontrados = list(Funcionarios.objects.filter(
+        Q(username__in=claves) | Q(email__in=claves) | Q(pk__in=ids)
+    ).values_list('pk', 'username', 'email'))
+    por_clave = {}
+    # El email podría repetirse: si es ambiguo queda en None. El id y el username (únicos) tienen prioridad
+    for pk, _, email in encontrados:
+        if email:
+            por_clave[email] = pk if por_clave.get(email, pk) == pk else None
+    for pk, username, _ in encontrados:
+        por_clave[str(pk)] = pk
+        por_clave[username] = pk
+    return por_clave
+
+
+def _errores_formulario(form):
+    return '; '.join(
+        f"{form.fields[campo].label if campo in form.fields else campo}: {' '.join(mensajes)}"
+        for campo, mensajes in form.errors.items()
+    )
+
+
+def _aplicar_lote(lote, vistos, resultado, usuario, simular):
+    claves = {datos.get('funcionario', '') for _, datos in lote}
+    por_clave = _buscar_funcionarios(claves)
+    existentes = Dias_Administrativos.objects.in_bulk(
+        [pk for pk in por_clave.values() if pk is not None]
+    )
+    por_defecto = Dias_Administrativos()
+
+    nuevos, cambios = [], []
+    for linea, datos in lote:
+        clave = datos.get('funcionario', '')
+        pk = por_clave.get(clave)
+        if not clave or pk is None:
+            resultado.errores.append(ErrorFila(linea, clave, "Funcionario no encontrado."))
+            continue
+        if pk in vistos:
+            resultado.errores.append(ErrorFila(linea, clave, "Funcionario repetido en el archivo."))
+            continue
+        vistos.add(pk)
+
+        actual = existentes.get(pk)
+        base = actual or por_defecto
+        form = DiasAdministrativosForm({campo: datos.get(campo, getattr(base, campo)) for campo in CAMPOS})
+        if not form.is_valid():
+            resultado.errores.append(ErrorFila(linea, clave, _errores_formulario(form)))
+            continue
+
+        valores = tuple(form.cleaned_data[campo] for campo in CAMPOS)
+        if actual is None:
+            nuevos.append(Dias_Administrativos(id_funcionario_id=pk, **dict(zip(CAMPOS, valores))))
+            continue
+        anteriores = tuple(getattr(actual, campo) for campo in CAMPOS)
+        if valores == anteriores:
+            resultado.sin_cambios += 1
+            continue
+        for campo, valor in zip(CAMPOS, valores):
+            setattr(actual, campo, valor)
+        cambios.append((actual, anteriores, valores))
+
+    if not simular:
+        with transaction.atomic():
+            Dias_Administrativos.objects.bulk_create(nuevos, batch_size=500)
+            Dias_Administrativos.objects.bulk_update([c[0] for c in cambios], CAMPOS, batch_size=500)
+            # bulk_update no dispara señales: auditoría e invalidación de caché aquí
+            for dias, anteriores, valores in cambios:
+                auditoria.registrar(
+                    auditoria.MODIFICACION_DIAS, auditoria.detalle_dias(dias.pk, anteriores, valores), actor=usuario
+                )
+            invalidar_balances([c[0].pk for c in cambios])
+    resultado.creados += len(nuevos)
+    resultado.actualizados += len(cambios)
+
+
+def importar(filas, usuario=None, simular=False, tamano_lote=TAMANO_LOTE):
+    """
+    Aplica las filas de leer_filas(). Cada bloque se guarda en su propia
+    transacción: un error en una fila no detiene el resto de la carga.
+    Un archivo dañado se rechaza entero (leer_filas lo valida completo
+    antes de entregar la primera fila).
+    Con simular=True valida y cuenta sin escribir nada.
+    """
+    resultado = Resultado()
+    vistos = set()
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == tamano_lote:
+            _aplicar_lote(lote, vistos, resultado, usuario, simular)
+            lote = []
+    if lote:
+        _aplicar_lote(lote, vistos, resultado, usuario, simular)
+    return resultado
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from intranet import acumulacion
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica la acumulación anual de días de vacaciones y administrativos según las reglas de "
+        "intranet/acumulacion.py. Cada año se aplica una sola vez, así que se puede programar sin riesgo "
+        "(ej. cron: 5 0 1 1 * python manage.py acumular_dias)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', type=int, default=None, help="Año a aplicar (por defecto el actual).")
+        parser.add_argument('--simular', action='store_true', help="Muestra cuántos funcionarios calzan con cada regla.")
+
+    def handle(self, *args, **options):
+        anio = options['anio'] or timezone.localdate().year
+
+        if options['simular']:
+            for regla, cantidad in acumulacion.simular(anio).items():
+                self.stdout.write(f"{regla}: {cantidad} funcionarios")
+            return
+
+        ejecucion = acumulacion.acumular(anio)
+        if ejecucion is None:
+            self.stdout.write(self.style.WARNING(f"La acumulación de {anio} ya fue aplicada; no se hizo nada."))
+            return
+        detalle = json.loads(ejecucion.detalle)
+        self.stdout.write(self.style.SUCCESS(
+            f"Acumulación {anio} aplicada a {ejecucion.funcionarios_afectados} funcionarios "
+            f"({detalle['balances_creados']} balances nuevos): {detalle['reglas']}"
+        ))
@@ -0,0 +1,21 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from intranet import miniaturas
+from intranet.models import ArchivoAlmacenado, Documentos, Licencias
+
+
+class Command(BaseCommand):
+    help = "Genera las miniaturas que falten de fotos de licencias y documentos (por ejemplo, archivos antiguos)."
+
+    def handle(self, *args, **options):
+        nombres = set(ArchivoAlmacenado.objects.values_list('ruta', flat=True))
+        nombres.update(Licencias.objects.exclude(ruta_foto_licencia='').values_list('ruta_foto_licencia', flat=True))
+        nombres.update(Documentos.objects.exclude(ruta_archivo='').values_list('ruta_archivo', flat=True))
+
+        pendientes = [f for f in map(miniaturas.encolar, sorted(n for n in nombres if n)) if f is not None]
+        futuros = [f for f in pendientes if hasattr(f, 'result')]
+        wait(futuros)
+        errores = sum(1 for f in futuros if f.exception() is not None)
+        self.stdout.write(self.style.SUCCESS(f"Miniaturas generadas: {len(pendientes) - errores} (errores: {errores})."))
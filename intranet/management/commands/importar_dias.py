@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from intranet.importar_dias import ArchivoInvalido, importar, leer_filas
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga balances de días (vacaciones/administrativos) desde un CSV o XLSX con las columnas "
+        "funcionario, vacaciones_restantes y admin_restantes. Las filas con error se informan y se omiten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--simular', action='store_true', help="Valida el archivo sin guardar cambios.")
+        parser.add_argument('--lote', type=int, default=1000, help="Filas por bloque (consultas y transacción).")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar(
+                    leer_filas(archivo, options['archivo']), simular=options['simular'], tamano_lote=options['lote']
+                )
+        except (OSError, ArchivoInvalido) as error:
+            raise CommandError(str(error))
+
+        for error in resultado.errores:
+            self.stderr.write(f"Línea {error.linea} ({error.funcionario or 'sin funcionario'}): {error.mensaje}")
+        prefijo = "[simulación] " if options['simular'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}{resultado.procesadas} filas: {resultado.creados} creados, {resultado.actualizados} "
+            f"actualizados, {resultado.sin_cambios} sin cambios, {len(resultado.errores)} con error."
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from intranet import rendimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el tiempo por petición abriendo una conexión nueva en cada una "
+        "(CONN_MAX_AGE=0) contra reutilizar la conexión, sobre la base de datos configurada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500, help="Peticiones simuladas por modo.")
+        parser.add_argument('--base', default=DEFAULT_DB_ALIAS, help="Alias de DATABASES a medir.")
+
+    def handle(self, *args, **options):
+        conexion = connections[options['base']]
+        pool = bool(conexion.settings_dict['OPTIONS'].get('pool'))
+        self.stdout.write(
+            f"Motor: {conexion.vendor} ({conexion.settings_dict['NAME']})"
+            + (" con pool de conexiones" if pool else "")
+        )
+
+        resultados = rendimiento.medir_conexiones(options['peticiones'], options['base'])
+
+        self.stdout.write(f"{'Modo':<15} {'Conexiones':>10} {'p50 ms':>9} {'p95 ms':>9} {'media ms':>9} {'ahorro ms':>10}")
+        for modo, m in resultados.items():
+            self.stdout.write(
+                f"{modo:<15} {m['conexiones']:>10} {m['p50_ms']:>9.3f} {m['p95_ms']:>9.3f} "
+                f"{m['media_ms']:>9.3f} {m['ahorro_ms']:>10.3f}"
+            )
+        persistente = resultados['persistente']
+        self.stdout.write(self.style.SUCCESS(
+            f"Reutilizar la conexión ahorra {persistente['ahorro_ms']:.3f} ms por petición "
+            f"({options['peticiones'] - persistente['conexiones']} conexiones menos cada {options['peticiones']} peticiones)."
+        ))
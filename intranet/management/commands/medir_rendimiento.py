@@ -0,0 +1,76 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from intranet import auditoria, rendimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (p50/p95), consultas SQL y memoria de cada vista de la intranet "
+        "sobre una base de datos temporal con datos sintéticos, y guarda el resultado en JSON."
+    )
+
+    def add_arguments(self, parser):
+        for nombre, valor in rendimiento.VOLUMENES.items():
+            parser.add_argument(f'--{nombre}', type=int, default=valor, help=f"Cantidad de {nombre} (defecto {valor}).")
+        parser.add_argument('--escala', type=float, default=1.0,
+                            help="Multiplica todos los volúmenes (ej: 0.01 para una corrida rápida).")
+        parser.add_argument('--repeticiones', type=int, default=20, help="Peticiones medidas por vista.")
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--salida', default='rendimiento.json', help="Archivo JSON de resultados.")
+        parser.add_argument('--comparar', help="JSON de una corrida anterior; falla si hay regresiones.")
+        parser.add_argument('--tolerancia', type=float, default=20.0,
+                            help="Porcentaje de aumento del p95 que se considera regresión.")
+        parser.add_argument('--mantener-bd', action='store_true',
+                            help="No borra la base de datos temporal al terminar (para inspeccionarla).")
+
+    def handle(self, *args, **options):
+        volumenes = {
+            nombre: max(int(options[nombre] * options['escala']), 1) for nombre in rendimiento.VOLUMENES
+        }
+        anterior = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+
+        # 1. Base de datos temporal (como la del test runner): nunca se tocan los datos reales
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+                self.stdout.write(f"Sembrando datos: {volumenes}")
+                usuarios = rendimiento.sembrar(volumenes, semilla=options['semilla'])
+
+                # 2. Medición de cada vista
+                self.stdout.write(f"Midiendo vistas ({options['repeticiones']} repeticiones)...")
+                resultados = rendimiento.medir(usuarios, repeticiones=options['repeticiones'])
+        finally:
+            # Los logs de auditoría pendientes van a la BD temporal, no a la real al apagar el proceso
+            auditoria.vaciar()
+            if not options['mantener_bd']:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        informe = rendimiento.informe(resultados, volumenes, options['repeticiones'])
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+
+        # 3. Resumen en consola
+        self.stdout.write(f"{'Vista':<40} {'Estado':>6} {'p50 ms':>9} {'p95 ms':>9} {'SQL':>5} {'Mem KB':>9}")
+        for nombre, m in resultados.items():
+            self.stdout.write(
+                f"{nombre:<40} {m['estado']:>6} {m['p50_ms']:>9.1f} {m['p95_ms']:>9.1f} "
+                f"{m['consultas']:>5} {m['memoria_pico_kb']:>9.0f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}."))
+
+        if anterior is not None:
+            regresiones = rendimiento.comparar(anterior, informe, tolerancia=options['tolerancia'])
+            if regresiones:
+                raise CommandError("Regresiones respecto de la corrida anterior:\n  " + "\n  ".join(regresiones))
+            self.stdout.write(self.style.SUCCESS("Sin regresiones respecto de la corrida anterior."))
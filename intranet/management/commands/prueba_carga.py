@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from intranet import carga
+from intranet.models import Funcionarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el rendimiento concurrente de las vistas async servidas por ASGI (uvicorn) "
+        "y por WSGI (gunicorn con threads), con la base de datos configurada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usuario', help="Username con el que se hacen las peticiones (debe existir).")
+        parser.add_argument('--concurrencia', type=int, default=50, help="Clientes simultáneos.")
+        parser.add_argument('--peticiones', type=int, default=1000, help="Peticiones por vista y servidor.")
+        parser.add_argument('--workers', type=int, default=4, help="Procesos de cada servidor.")
+        parser.add_argument('--hilos', type=int, default=8, help="Threads por proceso del servidor WSGI.")
+        parser.add_argument('--solo', choices=sorted(carga.SERVIDORES), help="Mide un solo servidor.")
+        for nombre, comando in carga.SERVIDORES.items():
+            parser.add_argument(f'--{nombre}-cmd', default=comando,
+                                help=f"Comando del servidor {nombre.upper()} ({{puerto}}, {{workers}}, {{hilos}}).")
+        parser.add_argument('--salida', help="Guarda los resultados en este JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            usuario = Funcionarios.objects.get(username=options['usuario'])
+        except Funcionarios.DoesNotExist:
+            raise CommandError(f"No existe el usuario '{options['usuario']}'.")
+
+        if connection.vendor == 'postgresql' and 'pool' not in connection.settings_dict['OPTIONS']:
+            self.stdout.write(self.style.WARNING(
+                "Sin CESFAM_BD_POOL el servidor ASGI conecta a la BD en cada petición y el WSGI reutiliza "
+                "conexiones persistentes: la comparación no es pareja."
+            ))
+        sesion = carga.crear_sesion(usuario)
+        servidores = [options['solo']] if options['solo'] else list(carga.SERVIDORES)
+        resultados = {}
+        try:
+            for nombre in servidores:
+                comando = options[f'{nombre}_cmd']
+                self.stdout.write(f"{nombre.upper()}: {comando}")
+                try:
+                    with carga.servidor(comando, options['workers'], options['hilos']) as puerto:
+                        resultados[nombre] = {
+                            vista: carga.cargar(puerto, ruta, sesion, options['concurrencia'], options['peticiones'])
+                            for vista, ruta in carga.rutas().items()
+                        }
+                except (OSError, RuntimeError) as error:
+                    raise CommandError(f"No se pudo levantar el servidor {nombre.upper()}: {error}")
+        finally:
+            carga.SessionStore(session_key=sesion).delete()
+
+        self.stdout.write(
+            f"\n{'Vista':<20} {'Servidor':<9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errores':>8}"
+        )
+        for vista in carga.rutas():
+            for nombre in resultados:
+                m = resultados[nombre][vista]
+                self.stdout.write(
+                    f"{vista:<20} {nombre.upper():<9} {m['rps']:>9.1f} {m['p50_ms']:>9.2f} "
+                    f"{m['p95_ms']:>9.2f} {m['errores']:>8}"
+                )
+            if len(resultados) == 2:
+                asgi, wsgi = resultados['asgi'][vista]['rps'], resultados['wsgi'][vista]['rps']
+                self.stdout.write(f"{'':<20} ASGI/WSGI: {asgi / wsgi if wsgi else 0:.2f}x")
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump({'opciones': {k: options[k] for k in ('concurrencia', 'peticiones', 'workers', 'hilos')},
+                           'resultados': resultados}, archivo, indent=2)
+        if any(m['errores'] for r in resultados.values() for m in r.values()):
+            raise CommandError("Hubo errores durante la prueba (ver columna 'errores').")
@@ -0,0 +1,61 @@
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from intranet.models import ArchivoAlmacenado
+from intranet.miniaturas import nombre_miniatura
+from intranet.storage import PREFIJO
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los archivos deduplicados que ya no tienen referencias. "
+        "Se deja un margen de tiempo para no borrar subidas que aún se están guardando."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutos', type=int, default=60, help="Antigüedad mínima del archivo sin referencias.")
+        parser.add_argument('--simular', action='store_true', help="Solo muestra lo que se borraría.")
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(minutes=options['minutos'])
+        huerfanos = ArchivoAlmacenado.objects.filter(referencias__lte=0, fecha_creacion__lt=limite)
+
+        borrados = 0
+        liberados = 0
+        for archivo in huerfanos.iterator():
+            if options['simular']:
+                self.stdout.write(f"Se borraría {archivo.ruta} ({archivo.tamano} bytes)")
+            elif not self._borrar(archivo, limite):
+                continue
+            borrados += 1
+            liberados += archivo.tamano
+
+        # Temporales que quedaron de subidas interrumpidas
+        directorio_tmp = default_storage.path(os.path.join(PREFIJO, 'tmp'))
+        if os.path.isdir(directorio_tmp) and not options['simular']:
+            for nombre in os.listdir(directorio_tmp):
+                ruta = os.path.join(directorio_tmp, nombre)
+                if os.path.getmtime(ruta) < limite.timestamp():
+                    os.remove(ruta)
+
+        self.stdout.write(self.style.SUCCESS(f"Archivos sin referencias: {borrados} ({liberados} bytes)."))
+
+    @staticmethod
+    @transaction.atomic
+    def _borrar(archivo, limite):
+        # Se vuelve a verificar con la fila bloqueada: una subida del mismo contenido renueva
+        # fecha_creacion (storage._save) y queda esperando hasta que el archivo ya no esté
+        vigente = ArchivoAlmacenado.objects.select_for_update().filter(
+            pk=archivo.pk, referencias__lte=0, fecha_creacion__lt=limite
+        )
+        if not vigente.exists():
+            return False
+        default_storage.delete(archivo.ruta)
+        default_storage.delete(nombre_miniatura(archivo.ruta))
+        vigente.delete()
+        return True
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from intranet.dias_habiles import recalcular_dias_solicitados
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula dias_solicitados (días hábiles, descontando feriados del calendario) "
+        "de las solicitudes de vacaciones y días administrativos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-pendientes', action='store_true',
+            help="Solo recalcula las solicitudes en estado Pendiente.",
+        )
+        parser.add_argument('--lote', type=int, default=2000, help="Solicitudes leídas por vuelta.")
+
+    def handle(self, *args, **options):
+        modificadas = recalcular_dias_solicitados(
+            solo_pendientes=options['solo_pendientes'], tamano_lote=options['lote']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Solicitudes actualizadas: {modificadas}."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from intranet.resumen import recalcular_resumen
+
+
+class Command(BaseCommand):
+    help = "Reconstruye ResumenLicencias (días de licencia por funcionario y mes) desde la tabla Licencias."
+
+    def handle(self, *args, **options):
+        filas = recalcular_resumen()
+        self.stdout.write(self.style.SUCCESS(f"Resumen de licencias recalculado: {filas} filas."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from intranet.contadores import reconciliar
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los contadores del panel de la Subdirección (ContadorPanel) desde SolicitudesPermiso, "
+        "Licencias y Documentos, corrige las desviaciones y compacta las filas de días pasados. "
+        "Conviene programarlo a diario después de medianoche (ej. cron: 10 0 * * * python manage.py reconciliar_contadores)."
+    )
+
+    def handle(self, *args, **options):
+        desviados = reconciliar()
+        if not desviados:
+            self.stdout.write(self.style.SUCCESS("Contadores al día: no había desviaciones."))
+            return
+        for indicador, (anterior, corregido) in sorted(desviados.items()):
+            self.stdout.write(self.style.WARNING(f"{indicador}: {anterior} -> {corregido}"))
+        self.stdout.write(self.style.SUCCESS(f"Contadores corregidos: {len(desviados)}."))
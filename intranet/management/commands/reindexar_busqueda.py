@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from intranet.busqueda import reindexar
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de Documentos y Comunicados."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            filas = reindexar()
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido: {filas} filas."))
@@ -0,0 +1,40 @@
+import os
+import shutil
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from intranet import estaticos
+
+
+class Command(BaseCommand):
+    help = (
+        f"Copia FullCalendar {estaticos.FULLCALENDAR_VERSION} (solo el locale 'es') a intranet/static/vendor/ "
+        "para no depender del CDN. Los archivos quedan en el repositorio: ejecutar una vez y hacer commit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help="Carpeta del paquete npm ya descargado (fullcalendar/), para equipos sin internet.",
+        )
+
+    def handle(self, *args, **options):
+        destino = os.path.join(settings.BASE_DIR, 'intranet', 'static', estaticos.FULLCALENDAR_DIRECTORIO)
+        for nombre in estaticos.FULLCALENDAR_ARCHIVOS + ('LICENSE.txt',):
+            ruta = os.path.join(destino, nombre)
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            try:
+                if options['desde']:
+                    shutil.copyfile(os.path.join(options['desde'], nombre), ruta)
+                else:
+                    with urllib.request.urlopen(estaticos.FULLCALENDAR_CDN + nombre, timeout=30) as respuesta, \
+                            open(ruta, 'wb') as archivo:
+                        shutil.copyfileobj(respuesta, archivo)
+            except OSError as error:
+                raise CommandError(f"No se pudo obtener {nombre}: {error}")
+            self.stdout.write(f"  {nombre} ({os.path.getsize(ruta) // 1024} KB)")
+
+        estaticos.fullcalendar_vendorizado.cache_clear()
+        self.stdout.write(self.style.SUCCESS(f"FullCalendar copiado en {destino}."))
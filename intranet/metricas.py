@@ -0,0 +1,238 @@
+# intranet/metricas.py
+
+# Métricas por vista (MetricasMiddleware en intranet/middleware.py).
+# Por cada nombre de ruta (dashboard, eventos_json, reporte_solicitudes...)
+# se acumula: histograma de latencia, consultas SQL y su tiempo, tiempo de
+# renderizado de plantillas y bytes de respuesta. La vista metricas_view las
+# publica en el formato de texto de Prometheus.
+#
+# Los valores viven en memoria de cada proceso: con varios workers cada uno
+# expone los suyos (Prometheus los distingue por instancia al hacer scrape
+# de cada worker, o se suman con sum() por vista).
+#
+# Opcional: con METRICAS_LENTAS_MS se guarda el SQL de las peticiones que
+# superan ese tiempo, se escribe en el logger 'intranet.metricas' y se
+# conservan las METRICAS_LENTAS_GUARDAR peores para consultarlas con peores().
+
+import heapq
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import base as plantillas
+
+logger = logging.getLogger(__name__)
+
+# Límites del histograma de latencia, en segundos (los de Prometheus por defecto)
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Ruta que no resolvió (404 de URL inexistente)
+SIN_RUTA = 'sin_ruta'
+
+# Consultas que se guardan por petición lenta (las más lentas)
+CONSULTAS_POR_LENTA = 20
+
+_lock = threading.Lock()
+_vistas = {}
+_peores = []     # heap de (duración, secuencia, detalle)
+_secuencia = 0
+
+# Medición de la petición en curso (la llenan _medir_consulta y el renderizado)
+peticion_actual = ContextVar('metricas_peticion', default=None)
+
+
+class Medicion:
+    def __init__(self, guardar_sql=False):
+        self.consultas = 0
+        self.sql_segundos = 0.0
+        self.plantillas_segundos = 0.0
+        self.profundidad_plantillas = 0
+        self.sql = [] if guardar_sql else None
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    # execute_wrapper permanente de cada conexión (ver instalar()); fuera de una petición no mide
+    medicion = peticion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        medicion.consultas += 1
+        medicion.sql_segundos += duracion
+        if medicion.sql is not None:
+            medicion.sql.append((duracion, sql))
+
+
+def _agregar_a_conexion(sender, connection, **kwargs):
+    # Al principio de la lista: connection.execute_wrapper() saca el último al terminar
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _medir_consulta)
+
+
+class _Vista:
+    def __init__(self):
+        self.buckets = [0] * len(LIMITES)
+        self.peticiones = 0
+        self.segundos = 0.0
+        self.consultas = 0
+        self.sql_segundos = 0.0
+        self.plantillas_segundos = 0.0
+        self.bytes = 0
+        self.estados = {}
+
+
+def lentas_ms():
+    return getattr(settings, 'METRICAS_LENTAS_MS', None)
+
+
+def registrar(vista, duracion, medicion, estado, tamano, metodo='', ruta=''):
+    """Suma una petición a las métricas de `vista` (y al registro de lentas si corresponde)."""
+    global _secuencia
+    clase = f'{estado // 100}xx'
+    with _lock:
+        datos = _vistas.get(vista)
+        if datos is None:
+            datos = _vistas[vista] = _Vista()
+        for i, limite in enumerate(LIMITES):
+            if duracion <= limite:
+                datos.buckets[i] += 1
+                break
+        datos.peticiones += 1
+        datos.segundos += duracion
+        datos.consultas += medicion.consultas
+        datos.sql_segundos += medicion.sql_segundos
+        datos.plantillas_segundos += medicion.plantillas_segundos
+        datos.bytes += tamano
+        datos.estados[clase] = datos.estados.get(clase, 0) + 1
+
+    umbral = lentas_ms()
+    if umbral is None or medicion.sql is None or duracion * 1000 < umbral:
+        return
+    sql = [
+        {'ms': round(d * 1000, 2), 'sql': s}
+        for d, s in heapq.nlargest(CONSULTAS_POR_LENTA, medicion.sql, key=lambda c: c[0])
+    ]
+    detalle = {
+        'vista': vista, 'metodo': metodo, 'ruta': ruta, 'estado': estado,
+        'ms': round(duracion * 1000, 1), 'consultas': medicion.consultas,
+        'sql_ms': round(medicion.sql_segundos * 1000, 1), 'sql': sql,
+    }
+    logger.warning(
+        "Petición lenta: %s %s (%s) %.0f ms, %d consultas (%.0f ms SQL)\n%s",
+        metodo, ruta, vista, detalle['ms'], medicion.consultas, detalle['sql_ms'],
+        '\n'.join(f"  {c['ms']:>8.2f} ms  {c['sql']}" for c in sql),
+    )
+    with _lock:
+        _secuencia += 1
+        entrada = (duracion, _secuencia, detalle)
+        if len(_peores) < getattr(settings, 'METRICAS_LENTAS_GUARDAR', 10):
+            heapq.heappush(_peores, entrada)
+        elif _peores and duracion > _peores[0][0]:
+            heapq.heapreplace(_peores, entrada)
+
+
+def peores():
+    """Detalle (con SQL) de las peticiones más lentas registradas, de la peor a la mejor."""
+    with _lock:
+        return [detalle for _, _, detalle in sorted(_peores, reverse=True)]
+
+
+def reiniciar():
+    global _secuencia
+    with _lock:
+        _vistas.clear()
+        _peores.clear()
+        _secuencia = 0
+
+
+# --- Tiempo de plantillas ---
+
+_render_original = plantillas.Template.render
+
+
+def _render_medido(self, context):
+    medicion = peticion_actual.get()
+    if medicion is None:
+        return _render_original(self, context)
+    # Un {% include %} vuelve a pasar por aquí: solo se mide la plantilla exterior
+    medicion.profundidad_plantillas += 1
+    inicio = time.perf_counter()
+    try:
+        return _render_original(self, context)
+    finally:
+        medicion.profundidad_plantillas -= 1
+        if medicion.profundidad_plantillas == 0:
+            medicion.plantillas_segundos += time.perf_counter() - inicio
+
+
+def instalar():
+    """
+    Mide consultas y renderizado de plantillas (se llama una vez desde IntranetConfig.ready).
+    Las consultas se miden en cada conexión nueva y no con execute_wrapper() por petición:
+    en una vista async las consultas corren en otro thread, con otra conexión.
+    """
+    connection_created.connect(_agregar_a_conexion, dispatch_uid='metricas_consultas')
+    for conexion in connections.all(initialized_only=True):
+        _agregar_a_conexion(None, conexion)
+    if plantillas.Template.render is not _render_medido:
+        plantillas.Template.render = _render_medido
+
+
+# --- Formato de texto de Prometheus ---
+
+def _etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def prometheus():
+    with _lock:
+        vistas = {
+            nombre: (list(d.buckets), d.peticiones, d.segundos, d.consultas, d.sql_segundos,
+                     d.plantillas_segundos, d.bytes, dict(d.estados))
+            for nombre, d in sorted(_vistas.items())
+        }
+
+    lineas = [
+        '# HELP intranet_peticion_segundos Latencia de la petición por vista.',
+        '# TYPE intranet_peticion_segundos histogram',
+    ]
+    for nombre, (buckets, peticiones, segundos, *_resto) in vistas.items():
+        vista = _etiqueta(nombre)
+        acumulado = 0
+        for limite, cantidad in zip(LIMITES, buckets):
+            acumulado += cantidad
+            lineas.append(f'intranet_peticion_segundos_bucket{{vista="{vista}",le="{limite}"}} {acumulado}')
+        lineas.append(f'intranet_peticion_segundos_bucket{{vista="{vista}",le="+Inf"}} {peticiones}')
+        lineas.append(f'intranet_peticion_segundos_sum{{vista="{vista}"}} {_numero(segundos)}')
+        lineas.append(f'intranet_peticion_segundos_count{{vista="{vista}"}} {peticiones}')
+
+    lineas += [
+        '# HELP intranet_respuestas_total Respuestas por vista y clase de código HTTP.',
+        '# TYPE intranet_respuestas_total counter',
+    ]
+    for nombre, datos in vistas.items():
+        for clase, cantidad in sorted(datos[7].items()):
+            lineas.append(f'intranet_respuestas_total{{vista="{_etiqueta(nombre)}",estado="{clase}"}} {cantidad}')
+
+    contadores = [
+        (3, 'intranet_consultas_sql_total', 'Consultas SQL ejecutadas por vista.'),
+        (4, 'intranet_sql_segundos_total', 'Tiempo en consultas SQL por vista.'),
+        (5, 'intranet_plantillas_segundos_total', 'Tiempo de renderizado de plantillas por vista.'),
+        (6, 'intranet_respuesta_bytes_total', 'Bytes de respuesta por vista (Content-Length en streaming).'),
+    ]
+    for indice, metrica, ayuda in contadores:
+        lineas += [f'# HELP {metrica} {ayuda}', f'# TYPE {metrica} counter']
+        for nombre, datos in vistas.items():
+            lineas.append(f'{metrica}{{vista="{_etiqueta(nombre)}"}} {_numero(datos[indice])}')
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,96 @@
+# intranet/middleware.py
+
+# Los middlewares de la intranet funcionan en sync y en async: bajo ASGI las
+# vistas async (dashboard, documentos, historial, eventos) no se pasan a un
+# thread solo porque un middleware de la cadena sea síncrono.
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import auditoria, metricas
+
+
+class AuditoriaMiddleware:
+    """
+    Deja disponible la petición (y con ella el usuario) para las señales de
+    auditoría (intranet/signals.py), que no reciben el request.
+    Debe ir después de AuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = auditoria.peticion_actual.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            auditoria.peticion_actual.reset(token)
+
+    async def __acall__(self, request):
+        token = auditoria.peticion_actual.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            auditoria.peticion_actual.reset(token)
+
+
+class MetricasMiddleware:
+    """
+    Mide cada petición y la suma a las métricas de su vista (intranet/metricas.py):
+    latencia, consultas SQL y su tiempo, renderizado de plantillas y bytes.
+    Va primero en MIDDLEWARE para que la latencia incluya al resto de middlewares.
+    En respuestas en streaming se mide hasta entregar la respuesta, no el envío completo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = metricas.Medicion(guardar_sql=metricas.lentas_ms() is not None)
+        token = metricas.peticion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metricas.peticion_actual.reset(token)
+        self._registrar(request, response, medicion, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        # Las consultas de la vista corren en un thread (sync_to_async) que copia el contexto:
+        # el ContextVar llega allí y las cuenta igual
+        medicion = metricas.Medicion(guardar_sql=metricas.lentas_ms() is not None)
+        token = metricas.peticion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metricas.peticion_actual.reset(token)
+        self._registrar(request, response, medicion, time.perf_counter() - inicio)
+        return response
+
+    def _registrar(self, request, response, medicion, duracion):
+        match = getattr(request, 'resolver_match', None)
+        vista = (match.url_name or match.view_name) if match else metricas.SIN_RUTA
+        if response.streaming:
+            tamano = int(response.get('Content-Length') or 0)
+        else:
+            tamano = len(response.content)
+        metricas.registrar(
+            vista, duracion, medicion, response.status_code, tamano,
+            metodo=request.method, ruta=request.path,
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0004_alter_eventos_calendario_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventos_calendario',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='eventos_calendario',
+            index=models.Index(fields=['fecha_inicio', 'fecha_fin'], name='eventos_ventana_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0005_eventos_calendario_fecha_modificacion_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logs_auditoria',
+            index=models.Index(fields=['fecha_hora', 'id'], name='logs_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logs_auditoria',
+            index=models.Index(fields=['id_usuario_actor', 'fecha_hora', 'id'], name='logs_actor_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logs_auditoria',
+            index=models.Index(fields=['accion', 'fecha_hora', 'id'], name='logs_accion_fecha_idx'),
+        ),
+    ]
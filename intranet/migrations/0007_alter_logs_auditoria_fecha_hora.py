@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0006_logs_auditoria_indices'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logs_auditoria',
+            name='fecha_hora',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
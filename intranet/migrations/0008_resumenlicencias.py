@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0007_alter_logs_auditoria_fecha_hora'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenLicencias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('dias_totales', models.IntegerField(default=0)),
+                ('id_funcionario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_licencias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Resumen de Licencias',
+                'constraints': [models.UniqueConstraint(fields=('id_funcionario', 'mes'), name='resumen_funcionario_mes_unico')],
+            },
+        ),
+    ]
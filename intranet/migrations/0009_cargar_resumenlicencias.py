@@ -0,0 +1,45 @@
+# Carga inicial de ResumenLicencias a partir de las licencias existentes.
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations
+
+
+def cargar_resumen(apps, schema_editor):
+    Licencias = apps.get_model('intranet', 'Licencias')
+    ResumenLicencias = apps.get_model('intranet', 'ResumenLicencias')
+
+    totales = defaultdict(int)
+    licencias = Licencias.objects.values_list('id_funcionario_id', 'fecha_inicio', 'fecha_fin')
+    for funcionario_id, fecha_inicio, fecha_fin in licencias.iterator(chunk_size=2000):
+        actual = fecha_inicio
+        while actual <= fecha_fin:
+            mes = actual.replace(day=1)
+            siguiente_mes = (mes + timedelta(days=32)).replace(day=1)
+            hasta = min(fecha_fin, siguiente_mes - timedelta(days=1))
+            totales[(funcionario_id, mes)] += (hasta - actual).days + 1
+            actual = siguiente_mes
+
+    ResumenLicencias.objects.bulk_create(
+        [
+            ResumenLicencias(id_funcionario_id=funcionario_id, mes=mes, dias_totales=dias)
+            for (funcionario_id, mes), dias in totales.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def vaciar_resumen(apps, schema_editor):
+    apps.get_model('intranet', 'ResumenLicencias').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0008_resumenlicencias'),
+    ]
+
+    operations = [
+        migrations.RunPython(cargar_resumen, vaciar_resumen),
+    ]
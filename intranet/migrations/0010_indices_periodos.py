@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0009_cargar_resumenlicencias'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='licencias',
+            index=models.Index(fields=['id_funcionario', 'fecha_inicio', 'fecha_fin'], name='licencias_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudespermiso',
+            index=models.Index(fields=['id_funcionario_solicitante', 'fecha_inicio', 'fecha_fin'], name='solicitudes_periodo_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Índice de texto completo para Documentos y Comunicados (ver intranet/busqueda.py).
+# La tabla no es un modelo: su estructura depende del motor de base de datos.
+
+from django.db import migrations
+
+
+def crear_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE intranet_busqueda USING fts5("
+            "tipo UNINDEXED, objeto_id UNINDEXED, titulo, cuerpo, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO intranet_busqueda (tipo, objeto_id, titulo, cuerpo) "
+            "SELECT 'documento', id, titulo, COALESCE(categoria, '') FROM intranet_documentos "
+            "UNION ALL SELECT 'comunicado', id, titulo, cuerpo FROM intranet_comunicados"
+        )
+    elif vendor == 'postgresql':
+        # unaccent es una extensión "trusted" desde PostgreSQL 13: basta con ser dueño de la base
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        schema_editor.execute(
+            "CREATE TABLE intranet_busqueda ("
+            "id bigserial PRIMARY KEY, tipo varchar(20) NOT NULL, objeto_id bigint NOT NULL, "
+            "titulo text NOT NULL, cuerpo text NOT NULL, vector tsvector NOT NULL, "
+            "UNIQUE (tipo, objeto_id))"
+        )
+        schema_editor.execute("CREATE INDEX intranet_busqueda_vector_idx ON intranet_busqueda USING GIN (vector)")
+        schema_editor.execute(
+            "INSERT INTO intranet_busqueda (tipo, objeto_id, titulo, cuerpo, vector) "
+            "SELECT tipo, id, titulo, cuerpo, "
+            "setweight(to_tsvector('spanish', unaccent(titulo)), 'A') || "
+            "setweight(to_tsvector('spanish', unaccent(cuerpo)), 'D') "
+            "FROM (SELECT 'documento' AS tipo, id, titulo, COALESCE(categoria, '') AS cuerpo FROM intranet_documentos "
+            "UNION ALL SELECT 'comunicado', id, titulo, cuerpo FROM intranet_comunicados) AS origen"
+        )
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS intranet_busqueda")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0011_archivoalmacenado'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
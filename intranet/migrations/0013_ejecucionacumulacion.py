@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0012_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionAcumulacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.PositiveIntegerField(unique=True)),
+                ('fecha_ejecucion', models.DateTimeField(auto_now_add=True)),
+                ('funcionarios_afectados', models.IntegerField(default=0)),
+                ('detalle', models.TextField(blank=True)),
+                ('ejecutado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Ejecuciones de Acumulación',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0013_ejecucionacumulacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioSolicitud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(max_length=50)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('id_solicitud', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios', to='intranet.solicitudespermiso')),
+            ],
+            options={
+                'verbose_name_plural': 'Cambios de Solicitudes',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0014_cambiosolicitud'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorPanel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=80)),
+                ('dia', models.DateField(blank=True, null=True)),
+                ('valor', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Contadores del Panel',
+                'constraints': [models.UniqueConstraint(fields=('clave', 'dia'), name='contador_clave_dia_unico'), models.UniqueConstraint(condition=models.Q(('dia__isnull', True)), fields=('clave',), name='contador_clave_sin_dia_unico')],
+            },
+        ),
+    ]
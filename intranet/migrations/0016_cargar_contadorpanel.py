@@ -0,0 +1,59 @@
+# Carga inicial de ContadorPanel a partir de las solicitudes, licencias y documentos existentes.
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def cargar_contadores(apps, schema_editor):
+    SolicitudesPermiso = apps.get_model('intranet', 'SolicitudesPermiso')
+    Licencias = apps.get_model('intranet', 'Licencias')
+    Documentos = apps.get_model('intranet', 'Documentos')
+    ContadorPanel = apps.get_model('intranet', 'ContadorPanel')
+
+    hoy = timezone.localdate()
+    filas = []
+
+    pendientes = (
+        SolicitudesPermiso.objects.filter(estado='Pendiente')
+        .values_list('tipo_permiso').annotate(cantidad=Count('pk')).order_by()
+    )
+    for tipo, cantidad in pendientes:
+        filas.append(ContadorPanel(clave=f'pendientes:{tipo}', dia=None, valor=cantidad))
+
+    licencias = defaultdict(int)
+    periodos = Licencias.objects.filter(fecha_fin__gte=hoy).filter(fecha_fin__gte=F('fecha_inicio'))
+    for inicio, fin in periodos.values_list('fecha_inicio', 'fecha_fin').iterator(chunk_size=2000):
+        licencias[max(inicio, hoy)] += 1
+        licencias[fin + timedelta(days=1)] -= 1
+    for dia, cantidad in licencias.items():
+        if cantidad:
+            filas.append(ContadorPanel(clave='licencias', dia=dia, valor=cantidad))
+
+    documentos = (
+        Documentos.objects.filter(fecha_carga__date__gte=hoy - timedelta(days=hoy.weekday()))
+        .annotate(dia=TruncDate('fecha_carga')).values_list('dia').annotate(cantidad=Count('pk')).order_by()
+    )
+    for dia, cantidad in documentos:
+        filas.append(ContadorPanel(clave='documentos', dia=dia, valor=cantidad))
+
+    ContadorPanel.objects.bulk_create(filas, batch_size=1000)
+
+
+def vaciar_contadores(apps, schema_editor):
+    apps.get_model('intranet', 'ContadorPanel').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intranet', '0015_contadorpanel'),
+    ]
+
+    operations = [
+        migrations.RunPython(cargar_contadores, vaciar_contadores),
+    ]
@@ -0,0 +1,129 @@
+# intranet/miniaturas.py
+
+# Miniaturas de fotos de licencias y vistas previas (primera página) de
+# documentos. Se generan en segundo plano, en un pool de procesos, después
+# de guardar el archivo; quedan en disco al lado del original:
+#   archivos/ab/cd/<hash>.jpg  ->  archivos/ab/cd/<hash>.jpg.thumb.jpg
+# La extensión original queda en el nombre: x.jpg y x.pdf (o el mismo hash
+# subido con dos extensiones) no comparten miniatura.
+#
+# Pillow es opcional (imágenes) y para PDFs se usa pdftoppm (poppler-utils)
+# si está instalado. Sin ellos simplemente no se generan miniaturas.
+
+import atexit
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SUFIJO = '.thumb.jpg'
+TAMANO = (320, 320)
+CALIDAD = 70
+
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+EXTENSIONES_PDF = ('.pdf',)
+
+_pool = None
+
+
+def nombre_miniatura(nombre):
+    return nombre + SUFIJO
+
+
+def soportado(nombre):
+    extension = os.path.splitext(nombre or '')[1].lower()
+    if extension in EXTENSIONES_IMAGEN:
+        return Image is not None
+    if extension in EXTENSIONES_PDF:
+        return shutil.which('pdftoppm') is not None
+    return False
+
+
+def generar(origen, destino):
+    """
+    Genera la miniatura de `origen` en `destino` (rutas absolutas).
+    Corre en el proceso hijo: no usa la base de datos ni nada de Django.
+    """
+    if os.path.exists(destino):
+        return destino
+    extension = os.path.splitext(origen)[1].lower()
+    temporal = destino + '.tmp'
+
+    if extension in EXTENSIONES_PDF:
+        # pdftoppm agrega la extensión .jpg al nombre de salida
+        subprocess.run(
+            ['pdftoppm', '-jpeg', '-jpegopt', f'quality={CALIDAD}', '-f', '1', '-l', '1',
+             '-scale-to', str(max(TAMANO)), '-singlefile', origen, temporal],
+            check=True, capture_output=True, timeout=60,
+        )
+        os.replace(temporal + '.jpg', destino)
+    else:
+        with Image.open(origen) as imagen:
+            # Las fotos de celular suelen venir rotadas por EXIF
+            imagen = ImageOps.exif_transpose(imagen)
+            imagen.thumbnail(TAMANO)
+            imagen.convert('RGB').save(temporal, 'JPEG', quality=CALIDAD, optimize=True)
+        os.replace(temporal, destino)
+    return destino
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        # 'spawn' para no copiar al hijo los hilos ni las conexiones del proceso web
+        _pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'MINIATURAS_PROCESOS', 2),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def _registrar_error(futuro):
+    error = futuro.exception()
+    if error is not None:
+        logger.warning("No se pudo generar la miniatura: %s", error)
+
+
+def encolar(nombre):
+    """Pide la miniatura del archivo `nombre` (relativo al storage) si corresponde."""
+    if not nombre or not soportado(nombre):
+        return None
+    origen = default_storage.path(nombre)
+    destino = default_storage.path(nombre_miniatura(nombre))
+    if os.path.exists(destino):
+        return None
+
+    if not getattr(settings, 'MINIATURAS_ASINCRONAS', True):
+        try:
+            return generar(origen, destino)
+        except Exception as error:
+            logger.warning("No se pudo generar la miniatura de %s: %s", nombre, error)
+            return None
+
+    futuro = _obtener_pool().submit(generar, origen, destino)
+    futuro.add_done_callback(_registrar_error)
+    return futuro
+
+
+def encolar_al_confirmar(nombre):
+    # El archivo recién subido solo es definitivo cuando se confirma la transacción
+    transaction.on_commit(lambda: encolar(nombre))
+
+
+def existe_miniatura(nombre):
+    """Indica si la miniatura del archivo ya fue generada."""
+    return bool(nombre) and default_storage.exists(nombre_miniatura(nombre))
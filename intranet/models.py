@@ -24,6 +24,37 @@ class Dias_Administrativos(models.Model):
     vacaciones_restantes = models.IntegerField(default=20)
     admin_restantes = models.IntegerField(default=5)
 
+# Registro de las acumulaciones anuales de días (intranet/acumulacion.py).
+# Una fila por año: la restricción única impide aplicar dos veces el mismo período.
+class EjecucionAcumulacion(models.Model):
+    periodo = models.PositiveIntegerField(unique=True) # Año al que corresponde la acumulación
+    fecha_ejecucion = models.DateTimeField(auto_now_add=True)
+    ejecutado_por = models.ForeignKey(Funcionarios, on_delete=models.SET_NULL, null=True, blank=True)
+    funcionarios_afectados = models.IntegerField(default=0)
+    detalle = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Acumulación {self.periodo} ({self.funcionarios_afectados} funcionarios)"
+
+    class Meta:
+        verbose_name_plural = "Ejecuciones de Acumulación"
+
+# Archivos subidos guardados por contenido (intranet/storage.py).
+# Un mismo archivo puede estar referenciado por varios Documentos, Licencias
+# o Solicitudes; 'referencias' cuenta cuántos lo usan.
+class ArchivoAlmacenado(models.Model):
+    ruta = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    tamano = models.BigIntegerField()
+    referencias = models.IntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.ruta} ({self.referencias} referencias)"
+
+    class Meta:
+        verbose_name_plural = "Archivos Almacenados"
+
 # 4. Tabla: Documentos
 class Documentos(models.Model):
     titulo = models.CharField(max_length=255)
@@ -50,6 +81,8 @@ class Eventos_Calendario(models.Model):
     fecha_inicio = models.DateField() 
     fecha_fin = models.DateField(null=True, blank=True)
     tipo_evento = models.CharField(max_length=50, blank=True, null=True)
+    # Se usa para responder Last-Modified/ETag en el feed JSON del calendario
+    fecha_modificacion = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.titulo} ({self.fecha_inicio})"
@@ -58,15 +91,28 @@ class Eventos_Calendario(models.Model):
         # Esto es necesario porque tu tabla ya existe con guiones bajos en el nombre
         db_table = 'intranet_eventos_calendario' 
         verbose_name_plural = "Eventos del Calendario"
+        # FullCalendar pide los eventos por ventana de fechas (start/end)
+        indexes = [
+            models.Index(fields=['fecha_inicio', 'fecha_fin'], name='eventos_ventana_idx'),
+        ]
 
 # [cite_start]7. Tabla: Logs_Auditoria (Soporta RF18) [cite: 237]
 # Almacena los cambios de roles y accesos
 class Logs_Auditoria(models.Model):
-    fecha_hora = models.DateTimeField(auto_now_add=True)
+    # default (y no auto_now_add) para conservar la hora de la acción aunque el log se guarde después en lote
+    fecha_hora = models.DateTimeField(default=timezone.now)
     id_usuario_actor = models.ForeignKey(Funcionarios, on_delete=models.SET_NULL, null=True, blank=True)
     accion = models.CharField(max_length=255)
     detalle = models.TextField(blank=True, null=True)
 
+    class Meta:
+        # El visor de logs pagina por cursor sobre (fecha_hora, id) y filtra por actor/acción
+        indexes = [
+            models.Index(fields=['fecha_hora', 'id'], name='logs_fecha_id_idx'),
+            models.Index(fields=['id_usuario_actor', 'fecha_hora', 'id'], name='logs_actor_fecha_idx'),
+            models.Index(fields=['accion', 'fecha_hora', 'id'], name='logs_accion_fecha_idx'),
+        ]
+
 # --- MODELO BASADO EN EL "DOCUMENTO MAESTRO" (Requisito Extra) ---
 
 # [cite_start]8. Tabla: Licencias (Requisito "Documento Maestro") [cite: 53-54]
@@ -81,6 +127,26 @@ class Licencias(models.Model):
     ruta_foto_licencia = models.FileField(upload_to='licencias/')
     fecha_registro = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Búsqueda de períodos que se cruzan por funcionario (intranet/solapamientos.py)
+        indexes = [
+            models.Index(fields=['id_funcionario', 'fecha_inicio', 'fecha_fin'], name='licencias_periodo_idx'),
+        ]
+
+# Resumen de días de licencia por funcionario y mes (reporte_licencias).
+# Se mantiene de forma incremental desde intranet/resumen.py al crear,
+# modificar o eliminar Licencias; no se edita a mano.
+class ResumenLicencias(models.Model):
+    id_funcionario = models.ForeignKey(Funcionarios, on_delete=models.CASCADE, related_name='resumen_licencias')
+    mes = models.DateField() # Siempre el día 1 del mes
+    dias_totales = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Resumen de Licencias"
+        constraints = [
+            models.UniqueConstraint(fields=['id_funcionario', 'mes'], name='resumen_funcionario_mes_unico'),
+        ]
+
 class SolicitudesPermiso(models.Model):
     # Este modelo registra la solicitud que el funcionario envía (HU4)
     id_funcionario_solicitante = models.ForeignKey(Funcionarios, on_delete=models.CASCADE, related_name='solicitudes_enviadas')
@@ -96,4 +162,44 @@ class SolicitudesPermiso(models.Model):
         return f"Solicitud de {self.id_funcionario_solicitante.username} ({self.estado})"
 
     class Meta:
-        verbose_name_plural = "Solicitudes de Permiso"
\ No newline at end of file
+        verbose_name_plural = "Solicitudes de Permiso"
+        indexes = [
+            models.Index(fields=['id_funcionario_solicitante', 'fecha_inicio', 'fecha_fin'], name='solicitudes_periodo_idx'),
+        ]
+# Registro de cambios de SolicitudesPermiso (creación, aprobación, rechazo) para el
+# flujo de notificaciones de la Subdirección (intranet/notificaciones.py).
+# El id creciente hace de secuencia: el cliente pide los cambios posteriores al último que vio.
+class CambioSolicitud(models.Model):
+    id_solicitud = models.ForeignKey(SolicitudesPermiso, on_delete=models.CASCADE, related_name='cambios')
+    estado = models.CharField(max_length=50)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Solicitud {self.id_solicitud_id}: {self.estado}"
+
+    class Meta:
+        verbose_name_plural = "Cambios de Solicitudes"
+
+# Contadores del panel de la Subdirección (intranet/contadores.py), mantenidos por señales
+# y por las operaciones en lote. Cada fila es (clave, día opcional, valor):
+#   'pendientes:<tipo_permiso>' sin día: solicitudes pendientes de ese tipo.
+#   'licencias' por día: +1 el día que empieza una licencia y -1 el día siguiente a su fin
+#     (las activas de hoy son la suma hasta hoy).
+#   'documentos' por día: documentos cargados ese día.
+class ContadorPanel(models.Model):
+    clave = models.CharField(max_length=80)
+    dia = models.DateField(null=True, blank=True)
+    valor = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.clave} {self.dia or ''}: {self.valor}"
+
+    class Meta:
+        verbose_name_plural = "Contadores del Panel"
+        constraints = [
+            models.UniqueConstraint(fields=['clave', 'dia'], name='contador_clave_dia_unico'),
+            # NULL no choca con NULL en la restricción anterior: una fila sin día por clave
+            models.UniqueConstraint(
+                fields=['clave'], condition=models.Q(dia__isnull=True), name='contador_clave_sin_dia_unico'
+            ),
+        ]
@@ -0,0 +1,146 @@
+# intranet/notificaciones.py
+
+# Notificaciones en vivo de SolicitudesPermiso para la bandeja de la
+# Subdirección (server-sent events, vista solicitudes_eventos_view).
+#
+# Cada creación, aprobación o rechazo agrega una fila a CambioSolicitud
+# (desde signals.py o, para las operaciones en lote, desde solicitudes.py)
+# y al confirmar la transacción incrementa un contador en la caché. Cada
+# conexión abierta solo lee ese contador una vez por segundo; la tabla se
+# consulta cuando el contador cambia (y cada RESPALDO segundos por si la
+# caché es local de otro proceso), pidiendo solo los cambios posteriores al
+# último enviado.
+#
+# El flujo es un generador async: bajo ASGI las conexiones abiertas no
+# ocupan un worker. Las lecturas van a threads compartidos
+# (thread_sensitive=False), no a uno por conexión. Bajo WSGI cada cliente
+# conectado ocuparía un thread.
+
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+
+from .models import CambioSolicitud
+
+CLAVE_CONTADOR = 'notificaciones:solicitudes'
+
+INTERVALO = 1.0             # segundos entre lecturas del contador
+RESPALDO = 15               # segundos máximos sin revisar la tabla
+LATIDO = 20                 # comentario SSE para que proxies no corten la conexión ociosa
+DURACION_MAXIMA = 30 * 60   # luego el navegador reconecta solo (con Last-Event-ID)
+REINTENTO_MS = 3000
+LOTE = 200
+# Un id menor puede confirmarse después que uno mayor (transacciones en paralelo):
+# se vuelve a mirar este margen hacia atrás y se descartan los ya enviados
+MARGEN = 50
+
+# estado -> nombre del evento SSE
+EVENTOS = {'Pendiente': 'nueva', 'Aprobado': 'aprobada', 'Rechazado': 'rechazada'}
+
+CAMPOS = {
+    'id': 'pk',
+    'solicitud': 'id_solicitud_id',
+    'estado': 'estado',
+    'fecha': 'fecha',
+    'tipo': 'id_solicitud__tipo_permiso',
+    'fecha_inicio': 'id_solicitud__fecha_inicio',
+    'fecha_fin': 'id_solicitud__fecha_fin',
+    'dias': 'id_solicitud__dias_solicitados',
+    'fecha_solicitud': 'id_solicitud__fecha_solicitud',
+    'justificativo': 'id_solicitud__justificativo_archivo',
+    'username': 'id_solicitud__id_funcionario_solicitante__username',
+    'nombre': 'id_solicitud__id_funcionario_solicitante__first_name',
+    'apellido': 'id_solicitud__id_funcionario_solicitante__last_name',
+}
+
+
+def _incrementar():
+    try:
+        cache.incr(CLAVE_CONTADOR)
+    except ValueError:
+        cache.set(CLAVE_CONTADOR, 1, None)
+
+
+def registrar(cambios):
+    """cambios: [(solicitud_id, estado)]. Se avisa a los flujos abiertos al confirmar la transacción."""
+    if not cambios:
+        return
+    CambioSolicitud.objects.bulk_create(
+        [CambioSolicitud(id_solicitud_id=solicitud_id, estado=estado) for solicitud_id, estado in cambios]
+    )
+    transaction.on_commit(_incrementar)
+
+
+def ultimo_id():
+    return CambioSolicitud.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+
+
+def _leer(funcion, *args):
+    # Corre en un thread compartido, fuera de una petición: las conexiones se cuidan aquí
+    close_old_connections()
+    try:
+        return funcion(*args)
+    finally:
+        close_old_connections()
+
+
+def _cambios_desde(desde):
+    return list(
+        CambioSolicitud.objects.filter(pk__gt=desde).order_by('pk').values(*CAMPOS.values())[:LOTE]
+    )
+
+
+def _evento(fila):
+    datos = {nombre: fila[campo] for nombre, campo in CAMPOS.items()}
+    datos['justificativo'] = bool(datos['justificativo'])
+    for campo in ('fecha', 'fecha_inicio', 'fecha_fin', 'fecha_solicitud'):
+        datos[campo] = datos[campo].isoformat() if datos[campo] else None
+    evento = EVENTOS.get(fila['estado'], 'cambio')
+    return f"id: {fila['pk']}\nevent: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+async def flujo(desde=None, duracion=DURACION_MAXIMA):
+    """
+    Generador async de texto SSE con los cambios posteriores al id `desde`
+    (None: solo los que ocurran desde ahora).
+    """
+    leer = sync_to_async(_leer, thread_sensitive=False)
+    leer_contador = sync_to_async(cache.get, thread_sensitive=False)
+
+    if desde is None:
+        desde = await leer(ultimo_id)
+    ultimo = desde
+    enviados = set()
+    contador = await leer_contador(CLAVE_CONTADOR)
+    yield f"retry: {REINTENTO_MS}\n\n"
+
+    ahora = time.monotonic()
+    fin, revisado, escrito = ahora + duracion, None, ahora
+    while ahora < fin:
+        actual = await leer_contador(CLAVE_CONTADOR)
+        if actual != contador or revisado is None or ahora - revisado >= RESPALDO:
+            contador, revisado = actual, ahora
+            # 1. Cambios nuevos (y los del margen que se hayan confirmado tarde)
+            filas = await leer(_cambios_desde, max(ultimo - MARGEN, desde))
+            for fila in filas:
+                if fila['pk'] in enviados:
+                    continue
+                enviados.add(fila['pk'])
+                ultimo = max(ultimo, fila['pk'])
+                escrito = ahora
+                yield _evento(fila)
+            enviados = {pk for pk in enviados if pk > ultimo - MARGEN}
+            # 2. Si quedaron más de un lote, se siguen leyendo sin esperar
+            if len(filas) == LOTE:
+                revisado = None
+                continue
+        if ahora - escrito >= LATIDO:
+            escrito = ahora
+            yield ": latido\n\n"
+        await asyncio.sleep(INTERVALO)
+        ahora = time.monotonic()
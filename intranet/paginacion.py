@@ -0,0 +1,68 @@
+# intranet/paginacion.py
+
+# Paginación por cursor (keyset) para tablas que solo crecen (logs, historiales).
+# En vez de OFFSET, cada página continúa desde la última fila de la anterior,
+# así la página 1000 cuesta lo mismo que la primera si existe un índice
+# sobre (campo_orden, id).
+
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _valor(fila, campo):
+    # Sirve tanto para instancias de modelo como para filas de .values()
+    if isinstance(fila, dict):
+        return fila[campo]
+    return getattr(fila, campo)
+
+
+def codificar_cursor(valor, pk):
+    """Convierte (valor del campo de orden, pk) en un token opaco para la URL."""
+    texto = f"{valor.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """
+    Devuelve (valor, pk) a partir del token. Si el token es inválido
+    retorna None y se muestra la primera página.
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        texto = base64.urlsafe_b64decode(cursor + relleno).decode()
+        valor_str, pk_str = texto.rsplit('|', 1)
+        valor = parse_datetime(valor_str) if 'T' in valor_str else parse_date(valor_str)
+        if valor is None:
+            return None
+        return valor, int(pk_str)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def paginar_keyset(queryset, cursor, por_pagina, campo='fecha_hora', pk='id'):
+    """
+    Retorna (filas, cursor_siguiente) ordenando de más nuevo a más antiguo
+    por (campo, pk). cursor_siguiente es None en la última página.
+    """
+    queryset = queryset.order_by(f'-{campo}', f'-{pk}')
+
+    posicion = decodificar_cursor(cursor)
+    if posicion:
+        valor, ultimo_pk = posicion
+        # El filtro redundante campo <= valor permite usar el índice como rango
+        queryset = queryset.filter(**{f'{campo}__lte': valor}).filter(
+            Q(**{f'{campo}__lt': valor}) | Q(**{f'{pk}__lt': ultimo_pk})
+        )
+
+    # Se pide una fila extra solo para saber si existe una página siguiente
+    filas = list(queryset[:por_pagina + 1])
+    siguiente = None
+    if len(filas) > por_pagina:
+        filas = filas[:por_pagina]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(_valor(ultima, campo), _valor(ultima, pk))
+    return filas, siguiente
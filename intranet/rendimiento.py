@@ -0,0 +1,287 @@
+# intranet/rendimiento.py
+
+# Benchmark de las vistas de la intranet (comando medir_rendimiento).
+# Siembra un volumen configurable de datos, recorre todas las rutas de
+# intranet/urls.py con el cliente de pruebas usando el rol que corresponde
+# y mide por vista: latencia p50/p95, cantidad y tiempo de consultas SQL,
+# memoria máxima y tamaño de la respuesta. El resultado es un JSON que se
+# puede comparar con el de una corrida anterior para detectar regresiones.
+
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import django
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import datos_sinteticos, urls
+from .models import Documentos, Funcionarios, SolicitudesPermiso
+
+ADMIN = 'admin'
+SUBDIRECCION = 'subdireccion'
+FUNCIONARIO = 'funcionario'
+ANONIMO = 'anonimo'
+
+# Volúmenes por defecto (tamaño de un CESFAM grande con varios años de historia)
+VOLUMENES = datos_sinteticos.VOLUMENES
+
+# Rol con el que se visita cada ruta; las que no están aquí, como funcionario
+ROLES = {
+    'login': ANONIMO,
+    'index': ANONIMO,
+    'roles_gestion': ADMIN,
+    'logs_auditoria': ADMIN,
+    'metricas': ADMIN,
+    'gestion_calendario': SUBDIRECCION,
+    'gestion_dias': SUBDIRECCION,
+    'gestion_documentos': SUBDIRECCION,
+    'gestion_licencias': SUBDIRECCION,
+    'reporte_licencias': SUBDIRECCION,
+    'reporte_solicitudes': SUBDIRECCION,
+    'reporte_conflictos': SUBDIRECCION,
+    'exportar_licencias': SUBDIRECCION,
+    'exportar_solicitudes': SUBDIRECCION,
+    'aprobar_solicitud': SUBDIRECCION,
+    'procesar_solicitudes_lote': SUBDIRECCION,
+    'api_pendientes': SUBDIRECCION,
+}
+
+# Rutas que no se miden: cerrar sesión invalidaría la sesión del rol y el flujo
+# de notificaciones (SSE) no termina hasta DURACION_MAXIMA
+OMITIDAS = {'logout', 'solicitudes_eventos'}
+
+
+def sembrar(volumenes=None, semilla=0):
+    """
+    Crea los usuarios del benchmark y los datos sintéticos (intranet/datos_sinteticos.py).
+    Retorna {rol: usuario} con los usuarios que se usan para visitar las vistas.
+    """
+    usuarios = {
+        ADMIN: Funcionarios.objects.create_superuser('bench-admin', 'bench-admin@cesfam.cl', 'bench'),
+        SUBDIRECCION: Funcionarios.objects.create_user(
+            'bench-subdireccion', 'bench-subdireccion@cesfam.cl', 'bench', is_staff=True
+        ),
+        FUNCIONARIO: Funcionarios.objects.create_user('bench-funcionario', 'bench-funcionario@cesfam.cl', 'bench'),
+    }
+    datos_sinteticos.generar(
+        volumenes, semilla=semilla, prefijo='bench-',
+        funcionarios_extra=[u.pk for u in usuarios.values()], subdireccion_extra=[usuarios[SUBDIRECCION].pk],
+    )
+
+    # Un documento con archivo real (1 MB) para medir la descarga protegida
+    documento = Documentos(titulo='Manual de descarga', categoria='Manuales', id_autor_carga=usuarios[SUBDIRECCION])
+    documento.ruta_archivo.save('manual.pdf', ContentFile(bytes(range(256)) * 4096), save=True)
+
+    return usuarios
+
+
+def _argumentos():
+    """Variantes de URL por nombre de ruta: [(sufijo del caso, kwargs, query string)]."""
+    solicitud = SolicitudesPermiso.objects.filter(estado='Aprobado').order_by('pk').first()
+    documento = Documentos.objects.exclude(ruta_archivo='documentos/sintetico.pdf').order_by('-pk').first()
+    hoy = date.today()
+    mes = hoy.replace(day=1)
+    return {
+        'exportar_licencias': [('csv', {'formato': 'csv'}, ''), ('xlsx', {'formato': 'xlsx'}, '')],
+        'exportar_solicitudes': [('csv', {'formato': 'csv'}, ''), ('xlsx', {'formato': 'xlsx'}, '')],
+        # Ya aprobada: la vista solo redirige, el benchmark no cambia datos
+        'aprobar_solicitud': [('', {'solicitud_id': solicitud.pk if solicitud else 0}, '')],
+        'descargar_archivo': [('documento', {'tipo': 'documento', 'pk': documento.pk if documento else 0}, '')],
+        'eventos_json': [
+            ('', {}, ''),
+            ('mes', {}, f"start={mes.isoformat()}&end={(mes + timedelta(days=42)).isoformat()}"),
+        ],
+        'buscar': [('protocolo', {}, 'q=protocolo')],
+        'buscar_json': [('vacunacion', {}, 'q=vacunacion')],
+        'documentos': [('', {}, ''), ('busqueda', {}, 'q=guia')],
+        'logs_auditoria': [('', {}, ''), ('accion', {}, 'accion=Cambio+de+Rol')],
+        'metricas': [('', {}, ''), ('lentas', {}, 'lentas=1')],
+        'api_solicitudes': [('', {}, ''), ('campos', {}, 'campos=id,estado&limite=100')],
+        'api_pendientes': [('', {}, ''), ('limite', {}, 'limite=100')],
+    }
+
+
+def casos():
+    """[(nombre del caso, url, rol)] para todas las rutas de intranet/urls.py."""
+    variantes = _argumentos()
+    resultado = []
+    for patron in urls.urlpatterns:
+        if not isinstance(patron, URLPattern) or patron.name in OMITIDAS:
+            continue
+        rol = ROLES.get(patron.name, FUNCIONARIO)
+        if patron.name in variantes:
+            opciones = variantes[patron.name]
+        elif patron.pattern.converters:
+            raise ValueError(f"La ruta '{patron.name}' tiene parámetros: agréguela a _argumentos()")
+        else:
+            opciones = [('', {}, '')]
+        for sufijo, kwargs, query in opciones:
+            url = reverse(patron.name, kwargs=kwargs) + (f"?{query}" if query else '')
+            nombre = f"{patron.name}[{sufijo}]" if sufijo else patron.name
+            resultado.append((nombre, url, rol))
+    return resultado
+
+
+def _percentil(valores, p):
+    # Rango más cercano: con pocas repeticiones no se interpola
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def _pedir(cliente, url):
+    respuesta = cliente.get(url)
+    if respuesta.streaming:
+        tamano = sum(len(parte) for parte in respuesta.streaming_content)
+    else:
+        tamano = len(respuesta.content)
+    respuesta.close()
+    return respuesta.status_code, tamano
+
+
+def medir(usuarios, repeticiones=20, calentamiento=2):
+    """Mide cada caso. Retorna {nombre: métricas}."""
+    clientes = {ANONIMO: Client()}
+    for rol, usuario in usuarios.items():
+        clientes[rol] = Client()
+        clientes[rol].force_login(usuario)
+
+    resultados = {}
+    for nombre, url, rol in casos():
+        cliente = clientes[rol]
+        cache.clear()
+        for _ in range(calentamiento):
+            _pedir(cliente, url)
+
+        tiempos, consultas, tiempos_sql = [], [], []
+        for _ in range(repeticiones):
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                estado, tamano = _pedir(cliente, url)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(len(capturadas))
+            tiempos_sql.append(sum(float(q['time']) for q in capturadas.captured_queries) * 1000)
+
+        # La memoria se mide aparte: tracemalloc hace mucho más lenta la petición
+        tracemalloc.start()
+        _pedir(cliente, url)
+        memoria_pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        resultados[nombre] = {
+            'url': url,
+            'rol': rol,
+            'estado': estado,
+            'p50_ms': round(_percentil(tiempos, 50), 3),
+            'p95_ms': round(_percentil(tiempos, 95), 3),
+            'media_ms': round(statistics.fmean(tiempos), 3),
+            'consultas': int(statistics.median(consultas)),
+            'sql_ms': round(statistics.median(tiempos_sql), 3),
+            'memoria_pico_kb': round(memoria_pico / 1024, 1),
+            'bytes': tamano,
+        }
+    return resultados
+
+
+def informe(resultados, volumenes, repeticiones):
+    return {
+        'fecha': timezone.now().isoformat(),
+        'entorno': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'motor_bd': connection.vendor,
+            'maquina': platform.machine(),
+        },
+        'volumenes': volumenes,
+        'repeticiones': repeticiones,
+        'vistas': resultados,
+    }
+
+
+def comparar(anterior, actual, tolerancia=20.0, minimo_ms=2.0):
+    """
+    Lista de regresiones entre dos informes: p95 más lento que `tolerancia` %
+    (y al menos `minimo_ms`, para no alarmarse por ruido), más consultas o
+    una vista que antes respondía bien y ahora falla.
+    """
+    regresiones = []
+    for nombre, metricas in actual['vistas'].items():
+        previa = anterior.get('vistas', {}).get(nombre)
+        if previa is None:
+            continue
+        if previa['estado'] < 400 <= metricas['estado']:
+            regresiones.append(f"{nombre}: ahora responde {metricas['estado']} (antes {previa['estado']})")
+        if metricas['consultas'] > previa['consultas']:
+            regresiones.append(f"{nombre}: {previa['consultas']} -> {metricas['consultas']} consultas")
+        diferencia = metricas['p95_ms'] - previa['p95_ms']
+        if diferencia > minimo_ms and diferencia > previa['p95_ms'] * tolerancia / 100:
+            regresiones.append(f"{nombre}: p95 {previa['p95_ms']:.1f} -> {metricas['p95_ms']:.1f} ms")
+    return regresiones
+
+
+# --- Costo de conexión por petición ---
+
+# Modos que compara medir_conexiones(): (nombre, CONN_MAX_AGE, CONN_HEALTH_CHECKS)
+MODOS_CONEXION = [
+    ('por_peticion', 0, False),
+    ('persistente', 600, True),
+]
+
+
+def medir_conexiones(peticiones=500, alias=DEFAULT_DB_ALIAS):
+    """
+    Simula `peticiones` ciclos request_started -> consulta -> request_finished
+    (las señales con las que Django cierra o conserva la conexión) en cada
+    modo de MODOS_CONEXION, contra la base de datos configurada.
+    Retorna {modo: métricas}; con OPTIONS['pool'] 'conexiones' cuenta las
+    tomadas del pool.
+    """
+    conexion = connections[alias]
+    original = {clave: conexion.settings_dict[clave] for clave in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+    abiertas = []
+
+    def contar(sender, connection, **kwargs):
+        if connection.alias == alias:
+            abiertas.append(connection)
+
+    connection_created.connect(contar)
+    resultados = {}
+    try:
+        for modo, max_age, health_checks in MODOS_CONEXION:
+            conexion.close()
+            conexion.settings_dict.update(CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=health_checks)
+            abiertas.clear()
+            tiempos = []
+            for _ in range(peticiones):
+                inicio = time.perf_counter()
+                request_started.send(sender=__name__)
+                with conexion.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                request_finished.send(sender=__name__)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            resultados[modo] = {
+                'conn_max_age': max_age,
+                'conexiones': len(abiertas),
+                'p50_ms': round(_percentil(tiempos, 50), 3),
+                'p95_ms': round(_percentil(tiempos, 95), 3),
+                'media_ms': round(statistics.fmean(tiempos), 3),
+            }
+    finally:
+        connection_created.disconnect(contar)
+        conexion.close()
+        conexion.settings_dict.update(original)
+
+    base = resultados[MODOS_CONEXION[0][0]]['media_ms']
+    for datos in resultados.values():
+        datos['ahorro_ms'] = round(base - datos['media_ms'], 3)
+    return resultados
@@ -0,0 +1,136 @@
+# intranet/resumen.py
+
+# Mantenimiento incremental de ResumenLicencias (días de licencia por
+# funcionario y mes). Cada alta/baja/cambio de Licencias suma o resta solo
+# los días de esa licencia, así reporte_licencias lee totales ya calculados
+# en vez de recorrer todo el historial.
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Licencias, ResumenLicencias
+
+
+def _fecha(valor):
+    # Las vistas crean Licencias con fechas en texto ('2025-10-20')
+    if isinstance(valor, str):
+        return date.fromisoformat(valor)
+    return valor
+
+
+def dias_por_mes(fecha_inicio, fecha_fin):
+    """
+    Reparte los días (inclusive) de un período entre los meses que abarca.
+    Retorna {primer_dia_del_mes: dias}.
+    """
+    fecha_inicio, fecha_fin = _fecha(fecha_inicio), _fecha(fecha_fin)
+    resultado = {}
+    actual = fecha_inicio
+    while actual <= fecha_fin:
+        mes = actual.replace(day=1)
+        siguiente_mes = (mes + timedelta(days=32)).replace(day=1)
+        hasta = min(fecha_fin, siguiente_mes - timedelta(days=1))
+        resultado[mes] = (hasta - actual).days + 1
+        actual = siguiente_mes
+    return resultado
+
+
+def _deltas(licencias, signo):
+    deltas = defaultdict(int)
+    for licencia in licencias:
+        for mes, dias in dias_por_mes(licencia.fecha_inicio, licencia.fecha_fin).items():
+            deltas[(licencia.id_funcionario_id, mes)] += signo * dias
+    return deltas
+
+
+def _sumar_fila(funcionario_id, mes, dias):
+    filas = ResumenLicencias.objects.filter(id_funcionario_id=funcionario_id, mes=mes)
+    if filas.update(dias_totales=F('dias_totales') + dias):
+        return
+    try:
+        with transaction.atomic():
+            ResumenLicencias.objects.create(id_funcionario_id=funcionario_id, mes=mes, dias_totales=dias)
+    except IntegrityError:
+        # Otra petición creó la fila entre el UPDATE y el INSERT
+        filas.update(dias_totales=F('dias_totales') + dias)
+
+
+def _aplicar(deltas):
+    """
+    Suma cada delta {(funcionario_id, mes): dias} a su fila. Las mismas sentencias
+    para una licencia que para un lote (procesar_solicitudes): se leen las filas
+    existentes, se suman con un UPDATE ... CASE y las que faltan van en un bulk_create.
+    """
+    deltas = {clave: dias for clave, dias in deltas.items() if dias}
+    if not deltas:
+        return
+    filas = ResumenLicencias.objects.filter(
+        id_funcionario_id__in={funcionario_id for funcionario_id, _ in deltas},
+        mes__in={mes for _, mes in deltas},
+    ).values_list('pk', 'id_funcionario_id', 'mes')
+    existentes = {(funcionario_id, mes): pk for pk, funcionario_id, mes in filas if (funcionario_id, mes) in deltas}
+    if existentes:
+        ResumenLicencias.objects.filter(pk__in=existentes.values()).update(dias_totales=F('dias_totales') + Case(
+            *[When(pk=pk, then=Value(deltas[clave])) for clave, pk in existentes.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+
+    # Sin fila no hay nada que restar (p. ej. el funcionario se está eliminando en cascada)
+    nuevas = {clave: dias for clave, dias in deltas.items() if clave not in existentes and dias > 0}
+    if not nuevas:
+        return
+    try:
+        with transaction.atomic():
+            ResumenLicencias.objects.bulk_create([
+                ResumenLicencias(id_funcionario_id=funcionario_id, mes=mes, dias_totales=dias)
+                for (funcionario_id, mes), dias in nuevas.items()
+            ])
+    except IntegrityError:
+        # Otra petición creó alguna de las filas entre la lectura y el INSERT
+        for (funcionario_id, mes), dias in nuevas.items():
+            _sumar_fila(funcionario_id, mes, dias)
+
+
+def sumar_licencias(licencias):
+    """Suma al resumen los días de las licencias (también sirve después de bulk_create)."""
+    _aplicar(_deltas(licencias, 1))
+
+
+def restar_licencias(licencias):
+    _aplicar(_deltas(licencias, -1))
+
+
+def cambiar_licencia(licencia, funcionario_anterior, inicio_anterior, fin_anterior):
+    """Mueve los días de una licencia editada desde su período anterior al nuevo."""
+    anterior = Licencias(id_funcionario_id=funcionario_anterior, fecha_inicio=inicio_anterior, fecha_fin=fin_anterior)
+    deltas = _deltas([anterior], -1)
+    for clave, dias in _deltas([licencia], 1).items():
+        deltas[clave] += dias
+    _aplicar(deltas)
+
+
+@transaction.atomic
+def recalcular_resumen():
+    """
+    Reconstruye el resumen completo desde Licencias (carga inicial o si se
+    sospecha una desviación). Recorre la tabla una sola vez por bloques.
+    """
+    totales = defaultdict(int)
+    licencias = Licencias.objects.values_list('id_funcionario_id', 'fecha_inicio', 'fecha_fin')
+    for funcionario_id, fecha_inicio, fecha_fin in licencias.iterator(chunk_size=2000):
+        for mes, dias in dias_por_mes(fecha_inicio, fecha_fin).items():
+            totales[(funcionario_id, mes)] += dias
+
+    ResumenLicencias.objects.all().delete()
+    ResumenLicencias.objects.bulk_create(
+        [
+            ResumenLicencias(id_funcionario_id=funcionario_id, mes=mes, dias_totales=dias)
+            for (funcionario_id, mes), dias in totales.items()
+        ],
+        batch_size=1000,
+    )
+    return len(totales)
@@ -0,0 +1,286 @@
+# intranet/signals.py
+
+# Receptores de señales de la app. Se conectan en IntranetConfig.ready().
+
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import auditoria, busqueda, contadores, miniaturas, notificaciones, resumen
+from .dias_habiles import invalidar_feriados
+from .storage import sumar_referencias
+from .cache import invalidar_balances, invalidar_comunicados
+from .models import (
+    Comunicados, Dias_Administrativos, Documentos, Eventos_Calendario, Funcionarios, Licencias, Roles,
+    SolicitudesPermiso,
+)
+
+request_finished.connect(auditoria.vaciar_si_corresponde, dispatch_uid='auditoria_vaciar')
+
+
+# --- Auditoría (RF18) ---
+# post_init guarda los valores originales en la instancia, así post_save puede
+# saber qué cambió sin volver a consultar la base de datos.
+
+def _valores(instance, *campos):
+    # Se lee __dict__ para no disparar consultas por campos diferidos (.only()/.defer())
+    return tuple(instance.__dict__.get(campo) for campo in campos)
+
+ROL = ('id_rol_id', 'is_staff', 'is_superuser')
+DIAS = ('vacaciones_restantes', 'admin_restantes')
+
+
+@receiver(post_init, sender=Funcionarios)
+def _funcionario_original(sender, instance, **kwargs):
+    instance._rol_original = _valores(instance, *ROL)
+
+
+@receiver(post_save, sender=Funcionarios)
+def auditar_cambio_rol(sender, instance, created, **kwargs):
+    rol_actual = _valores(instance, *ROL)
+    if not created and rol_actual != instance._rol_original:
+        rol_id, staff, superuser = rol_actual
+        auditoria.registrar(
+            auditoria.CAMBIO_ROL,
+            f"'{instance.username}': rol={rol_id}, staff={staff}, superusuario={superuser}",
+        )
+    instance._rol_original = rol_actual
+
+
+@receiver(post_save, sender=Roles)
+def auditar_rol(sender, instance, created, **kwargs):
+    accion = 'creado' if created else 'modificado'
+    auditoria.registrar(auditoria.CAMBIO_ROL, f"Rol '{instance.nombre_rol}' {accion}")
+
+
+@receiver(post_delete, sender=Roles)
+def auditar_rol_eliminado(sender, instance, **kwargs):
+    auditoria.registrar(auditoria.CAMBIO_ROL, f"Rol '{instance.nombre_rol}' eliminado")
+
+
+@receiver(post_init, sender=SolicitudesPermiso)
+def _solicitud_original(sender, instance, **kwargs):
+    instance._estado_original = instance.__dict__.get('estado')
+
+
+@receiver(post_save, sender=SolicitudesPermiso)
+def auditar_solicitud(sender, instance, created, **kwargs):
+    if created and instance.justificativo_archivo:
+        auditoria.registrar(
+            auditoria.CARGA_JUSTIFICATIVO,
+            f"Solicitud {instance.pk}: {instance.justificativo_archivo.name}",
+        )
+    elif not created and instance.__dict__.get('estado') != instance._estado_original:
+        accion = auditoria.APROBACION_SOLICITUD if instance.estado == 'Aprobado' else auditoria.RECHAZO_SOLICITUD
+        auditoria.registrar(
+            accion, auditoria.detalle_solicitud(instance, instance._estado_original, instance.estado)
+        )
+    instance._estado_original = instance.__dict__.get('estado')
+
+
+@receiver(post_init, sender=Dias_Administrativos)
+def _dias_originales(sender, instance, **kwargs):
+    instance._dias_originales = _valores(instance, *DIAS)
+
+
+@receiver(post_save, sender=Dias_Administrativos)
+def auditar_dias(sender, instance, created, **kwargs):
+    dias_actuales = _valores(instance, *DIAS)
+    if not created and dias_actuales != instance._dias_originales:
+        auditoria.registrar(
+            auditoria.MODIFICACION_DIAS,
+            auditoria.detalle_dias(instance.pk, instance._dias_originales, dias_actuales),
+        )
+    instance._dias_originales = dias_actuales
+
+
+@receiver(post_save, sender=Documentos)
+def auditar_documento(sender, instance, created, **kwargs):
+    if created:
+        auditoria.registrar(
+            auditoria.CARGA_DOCUMENTO,
+            f"Documento '{instance.titulo}' ({instance.ruta_archivo.name})",
+        )
+
+
+@receiver(post_save, sender=Licencias)
+def auditar_licencia(sender, instance, created, **kwargs):
+    if created:
+        auditoria.registrar(auditoria.CARGA_LICENCIA, auditoria.detalle_licencia(instance))
+
+
+# --- Índice de búsqueda (intranet/busqueda.py) ---
+
+@receiver(post_save, sender=Documentos, dispatch_uid='busqueda_documento_save')
+@receiver(post_save, sender=Comunicados, dispatch_uid='busqueda_comunicado_save')
+def indexar_busqueda(sender, instance, **kwargs):
+    busqueda.indexar(instance)
+
+
+@receiver(post_delete, sender=Documentos, dispatch_uid='busqueda_documento_delete')
+@receiver(post_delete, sender=Comunicados, dispatch_uid='busqueda_comunicado_delete')
+def quitar_busqueda(sender, instance, **kwargs):
+    busqueda.quitar(instance)
+
+
+# --- Caché del dashboard ---
+
+@receiver(post_save, sender=Comunicados, dispatch_uid='cache_comunicados_save')
+@receiver(post_delete, sender=Comunicados, dispatch_uid='cache_comunicados_delete')
+def invalidar_cache_comunicados(sender, instance, **kwargs):
+    invalidar_comunicados()
+
+
+@receiver(post_save, sender=Dias_Administrativos, dispatch_uid='cache_balance_save')
+@receiver(post_delete, sender=Dias_Administrativos, dispatch_uid='cache_balance_delete')
+def invalidar_cache_balance(sender, instance, created=False, **kwargs):
+    # Un registro recién creado no puede estar en caché (la caché se llena leyendo el registro)
+    if not created:
+        invalidar_balances([instance.pk])
+
+
+# --- Resumen de días de licencia ---
+
+LICENCIA = ('id_funcionario_id', 'fecha_inicio', 'fecha_fin')
+
+
+@receiver(post_init, sender=Licencias, dispatch_uid='resumen_licencia_init')
+def _licencia_original(sender, instance, **kwargs):
+    instance._periodo_original = _valores(instance, *LICENCIA)
+
+
+@receiver(post_save, sender=Licencias, dispatch_uid='resumen_licencia_save')
+def actualizar_resumen_licencia(sender, instance, created, **kwargs):
+    periodo_actual = _valores(instance, *LICENCIA)
+    if created:
+        resumen.sumar_licencias([instance])
+    elif periodo_actual != instance._periodo_original and None not in instance._periodo_original:
+        resumen.cambiar_licencia(instance, *instance._periodo_original)
+    instance._periodo_original = periodo_actual
+
+
+@receiver(post_delete, sender=Licencias, dispatch_uid='resumen_licencia_delete')
+def descontar_resumen_licencia(sender, instance, **kwargs):
+    resumen.restar_licencias([instance])
+
+
+# --- Feriados (días hábiles) ---
+
+@receiver(post_save, sender=Eventos_Calendario, dispatch_uid='feriados_save')
+@receiver(post_delete, sender=Eventos_Calendario, dispatch_uid='feriados_delete')
+def invalidar_cache_feriados(sender, instance, **kwargs):
+    invalidar_feriados()
+
+
+# --- Notificaciones a la Subdirección (intranet/notificaciones.py) ---
+
+@receiver(post_init, sender=SolicitudesPermiso, dispatch_uid='notificaciones_solicitud_init')
+def _solicitud_notificada(sender, instance, **kwargs):
+    instance._estado_notificado = instance.__dict__.get('estado')
+
+
+@receiver(post_save, sender=SolicitudesPermiso, dispatch_uid='notificaciones_solicitud_save')
+def notificar_solicitud(sender, instance, created, **kwargs):
+    estado = instance.__dict__.get('estado')
+    if created or estado != instance._estado_notificado:
+        notificaciones.registrar([(instance.pk, estado)])
+    instance._estado_notificado = estado
+
+
+# --- Contadores del panel de la Subdirección (intranet/contadores.py) ---
+# Si un valor original no se cargó (.only()/.defer()) no se puede saber el delta:
+# se omite y el comando reconciliar_contadores corrige la diferencia.
+
+SOLICITUD_PANEL = ('estado', 'tipo_permiso')
+PERIODO = ('fecha_inicio', 'fecha_fin')
+
+
+@receiver(post_init, sender=SolicitudesPermiso, dispatch_uid='contadores_solicitud_init')
+def _solicitud_contada(sender, instance, **kwargs):
+    instance._panel_original = _valores(instance, *SOLICITUD_PANEL)
+
+
+@receiver(post_save, sender=SolicitudesPermiso, dispatch_uid='contadores_solicitud_save')
+def contar_solicitud(sender, instance, created, **kwargs):
+    actual = _valores(instance, *SOLICITUD_PANEL)
+    if created:
+        contadores.cambiar_solicitud(None, actual)
+    elif actual != instance._panel_original and None not in instance._panel_original + actual:
+        contadores.cambiar_solicitud(instance._panel_original, actual)
+    instance._panel_original = actual
+
+
+@receiver(post_delete, sender=SolicitudesPermiso, dispatch_uid='contadores_solicitud_delete')
+def descontar_solicitud(sender, instance, **kwargs):
+    if None not in instance._panel_original:
+        contadores.cambiar_solicitud(instance._panel_original, None)
+
+
+@receiver(post_init, sender=Licencias, dispatch_uid='contadores_licencia_init')
+def _licencia_contada(sender, instance, **kwargs):
+    instance._panel_periodo = _valores(instance, *PERIODO)
+
+
+@receiver(post_save, sender=Licencias, dispatch_uid='contadores_licencia_save')
+def contar_licencia(sender, instance, created, **kwargs):
+    actual = _valores(instance, *PERIODO)
+    if created:
+        contadores.sumar_licencias([instance])
+    elif actual != instance._panel_periodo and None not in instance._panel_periodo:
+        contadores.cambiar_licencia(instance, *instance._panel_periodo)
+    instance._panel_periodo = actual
+
+
+@receiver(post_delete, sender=Licencias, dispatch_uid='contadores_licencia_delete')
+def descontar_licencia(sender, instance, **kwargs):
+    contadores.sumar_licencias([instance], -1)
+
+
+@receiver(post_save, sender=Documentos, dispatch_uid='contadores_documento_save')
+def contar_documento(sender, instance, created, **kwargs):
+    if created:
+        contadores.sumar_documentos([instance])
+
+
+@receiver(post_delete, sender=Documentos, dispatch_uid='contadores_documento_delete')
+def descontar_documento(sender, instance, **kwargs):
+    if instance.fecha_carga:
+        contadores.sumar_documentos([instance], -1)
+
+
+# --- Referencias de archivos (almacenamiento deduplicado) ---
+
+CAMPOS_ARCHIVO = {
+    Documentos: 'ruta_archivo',
+    Licencias: 'ruta_foto_licencia',
+    SolicitudesPermiso: 'justificativo_archivo',
+}
+
+
+def _nombre_archivo(instance):
+    archivo = instance.__dict__.get(CAMPOS_ARCHIVO[type(instance)])
+    return getattr(archivo, 'name', archivo) or ''
+
+
+def _archivo_original(sender, instance, **kwargs):
+    instance._archivo_original = _nombre_archivo(instance)
+
+
+def _contar_referencia(sender, instance, created, **kwargs):
+    actual = _nombre_archivo(instance)
+    anterior = '' if created else instance._archivo_original
+    if actual != anterior:
+        sumar_referencias([actual], 1)
+        sumar_referencias([anterior], -1)
+        miniaturas.encolar_al_confirmar(actual)
+    instance._archivo_original = actual
+
+
+def _descontar_referencia(sender, instance, **kwargs):
+    sumar_referencias([_nombre_archivo(instance)], -1)
+
+
+for modelo in CAMPOS_ARCHIVO:
+    post_init.connect(_archivo_original, sender=modelo, dispatch_uid=f'archivo_init_{modelo.__name__}')
+    post_save.connect(_contar_referencia, sender=modelo, dispatch_uid=f'archivo_save_{modelo.__name__}')
+    post_delete.connect(_descontar_referencia, sender=modelo, dispatch_uid=f'archivo_delete_{modelo.__name__}')
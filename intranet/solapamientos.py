@@ -0,0 +1,112 @@
+# intranet/solapamientos.py
+
+# Detección de períodos que se cruzan (solicitudes aprobadas y licencias)
+# para un mismo funcionario. Las consultas usan los índices
+# (funcionario, fecha_inicio, fecha_fin) de SolicitudesPermiso y Licencias.
+
+import heapq
+from collections import defaultdict, namedtuple
+
+from .models import Licencias, SolicitudesPermiso
+
+Periodo = namedtuple('Periodo', ['funcionario_id', 'fecha_inicio', 'fecha_fin', 'origen', 'pk', 'detalle'])
+
+SOLICITUD = 'solicitud'
+LICENCIA = 'licencia'
+
+
+def _se_cruzan(a_inicio, a_fin, b_inicio, b_fin):
+    return a_inicio <= b_fin and b_inicio <= a_fin
+
+
+def _solicitudes_vigentes(estados=('Aprobado',)):
+    # Una solicitud de licencia aprobada ya está representada por su fila en Licencias
+    return SolicitudesPermiso.objects.filter(estado__in=estados).exclude(
+        estado='Aprobado', tipo_permiso='licencia'
+    )
+
+
+def periodos_en_rango(funcionario_ids, fecha_inicio, fecha_fin):
+    """
+    Solicitudes aprobadas y licencias de los funcionarios que se cruzan con
+    [fecha_inicio, fecha_fin]. Dos consultas, sin importar el historial.
+    """
+    periodos = []
+    solicitudes = _solicitudes_vigentes().filter(
+        id_funcionario_solicitante__in=funcionario_ids, fecha_inicio__lte=fecha_fin, fecha_fin__gte=fecha_inicio
+    ).values_list('id_funcionario_solicitante_id', 'fecha_inicio', 'fecha_fin', 'pk', 'tipo_permiso')
+    for funcionario_id, inicio, fin, pk, tipo in solicitudes:
+        periodos.append(Periodo(funcionario_id, inicio, fin, SOLICITUD, pk, tipo))
+
+    licencias = Licencias.objects.filter(
+        id_funcionario__in=funcionario_ids, fecha_inicio__lte=fecha_fin, fecha_fin__gte=fecha_inicio
+    ).values_list('id_funcionario_id', 'fecha_inicio', 'fecha_fin', 'pk')
+    for funcionario_id, inicio, fin, pk in licencias:
+        periodos.append(Periodo(funcionario_id, inicio, fin, LICENCIA, pk, 'licencia'))
+    return periodos
+
+
+def conflictos(funcionario_id, fecha_inicio, fecha_fin):
+    """Períodos ya aprobados/registrados del funcionario que chocan con el nuevo."""
+    return periodos_en_rango([funcionario_id], fecha_inicio, fecha_fin)
+
+
+def solicitudes_en_conflicto(solicitudes):
+    """
+    Para aprobar en lote: retorna los pk de las solicitudes que chocan con un
+    período existente o con otra solicitud del mismo lote aprobada antes (por pk).
+    """
+    if not solicitudes:
+        return set()
+    funcionario_ids = {s.id_funcionario_solicitante_id for s in solicitudes}
+    existentes = periodos_en_rango(
+        funcionario_ids,
+        min(s.fecha_inicio for s in solicitudes),
+        max(s.fecha_fin for s in solicitudes),
+    )
+    ocupados = defaultdict(list)
+    for periodo in existentes:
+        ocupados[periodo.funcionario_id].append((periodo.fecha_inicio, periodo.fecha_fin))
+
+    en_conflicto = set()
+    for solicitud in sorted(solicitudes, key=lambda s: s.pk):
+        propios = ocupados[solicitud.id_funcionario_solicitante_id]
+        if any(_se_cruzan(solicitud.fecha_inicio, solicitud.fecha_fin, inicio, fin) for inicio, fin in propios):
+            en_conflicto.add(solicitud.pk)
+        else:
+            propios.append((solicitud.fecha_inicio, solicitud.fecha_fin))
+    return en_conflicto
+
+
+def _periodos_ordenados():
+    # Ambas consultas vienen ordenadas por (funcionario, fecha_inicio) y se mezclan sin cargar todo en memoria
+    solicitudes = _solicitudes_vigentes(estados=('Aprobado', 'Pendiente')).order_by(
+        'id_funcionario_solicitante_id', 'fecha_inicio', 'pk'
+    ).values_list('id_funcionario_solicitante_id', 'fecha_inicio', 'fecha_fin', 'pk', 'tipo_permiso', 'estado')
+    licencias = Licencias.objects.order_by('id_funcionario_id', 'fecha_inicio', 'pk').values_list(
+        'id_funcionario_id', 'fecha_inicio', 'fecha_fin', 'pk'
+    )
+    return heapq.merge(
+        (Periodo(f, i, fin, SOLICITUD, pk, f"{tipo} ({estado})")
+         for f, i, fin, pk, tipo, estado in solicitudes.iterator(chunk_size=2000)),
+        (Periodo(f, i, fin, LICENCIA, pk, 'licencia') for f, i, fin, pk in licencias.iterator(chunk_size=2000)),
+        key=lambda p: (p.funcionario_id, p.fecha_inicio),
+    )
+
+
+def pares_en_conflicto():
+    """
+    Genera todos los pares de períodos que se cruzan, de todos los funcionarios,
+    con una sola pasada ordenada (barrido) en vez de comparar todos contra todos.
+    """
+    funcionario_actual = None
+    activos = []
+    for periodo in _periodos_ordenados():
+        if periodo.funcionario_id != funcionario_actual:
+            funcionario_actual = periodo.funcionario_id
+            activos = []
+        # Los períodos que terminaron antes de este inicio ya no pueden cruzarse con nada más
+        activos = [a for a in activos if a.fecha_fin >= periodo.fecha_inicio]
+        for activo in activos:
+            yield activo, periodo
+        activos.append(periodo)
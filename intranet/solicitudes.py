@@ -0,0 +1,119 @@
+# intranet/solicitudes.py
+
+# Aprobación y rechazo de SolicitudesPermiso, individual o en lote.
+# Todo el lote se procesa en una transacción con un número fijo de
+# sentencias, sin importar cuántas solicitudes se seleccionen.
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import auditoria, contadores, notificaciones
+from .cache import invalidar_balances
+from .resumen import sumar_licencias
+from .solapamientos import solicitudes_en_conflicto
+from .storage import sumar_referencias
+from .models import Dias_Administrativos, Licencias, SolicitudesPermiso
+
+# tipo_permiso -> campo de Dias_Administrativos que se descuenta al aprobar
+CAMPOS_BALANCE = {
+    'vacaciones': 'vacaciones_restantes',
+    'administrativo': 'admin_restantes',
+}
+
+APROBAR = 'aprobar'
+RECHAZAR = 'rechazar'
+ESTADOS = {APROBAR: 'Aprobado', RECHAZAR: 'Rechazado'}
+
+
+def _descontar_balances(descuentos):
+    """
+    descuentos: {campo: {funcionario_id: dias}}.
+    Un UPDATE por campo de balance; cada funcionario recibe su total con CASE.
+    """
+    for campo, por_funcionario in descuentos.items():
+        total = Case(
+            *[
+                When(id_funcionario=funcionario_id, then=Value(dias))
+                for funcionario_id, dias in por_funcionario.items()
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        Dias_Administrativos.objects.filter(id_funcionario__in=por_funcionario.keys()).update(
+            **{campo: F(campo) - total}
+        )
+
+
+@transaction.atomic
+def procesar_solicitudes(ids, accion, usuario):
+    """
+    Aprueba o rechaza las solicitudes 'Pendiente' de la lista `ids`.
+    Al aprobar: registra las licencias médicas y descuenta los días del balance.
+    Retorna la lista de solicitudes procesadas (las que no estaban pendientes, o
+    que al aprobar se cruzan con otro período del funcionario, se ignoran).
+    """
+    nuevo_estado = ESTADOS[accion]
+
+    # 1. Bloquear las filas para que dos subdirectores no procesen la misma solicitud
+    solicitudes = list(
+        SolicitudesPermiso.objects.select_for_update()
+        .filter(pk__in=ids, estado='Pendiente')
+        .order_by('pk')
+    )
+    if not solicitudes:
+        return []
+
+    if accion == APROBAR:
+        # Las que se cruzan con una solicitud aprobada o una licencia quedan Pendientes
+        en_conflicto = solicitudes_en_conflicto(solicitudes)
+        solicitudes = [s for s in solicitudes if s.pk not in en_conflicto]
+        if not solicitudes:
+            return []
+
+        licencias = []
+        descuentos = defaultdict(lambda: defaultdict(int))
+
+        for solicitud in solicitudes:
+            # 2. Licencia Médica: crea el registro en Licencias (no descuenta días)
+            if solicitud.tipo_permiso == 'licencia':
+                licencias.append(Licencias(
+                    id_funcionario_id=solicitud.id_funcionario_solicitante_id,
+                    id_subdireccion_carga=usuario,
+                    fecha_inicio=solicitud.fecha_inicio,
+                    fecha_fin=solicitud.fecha_fin,
+                    # El archivo subido en la solicitud se traslada a la licencia
+                    ruta_foto_licencia=solicitud.justificativo_archivo.name,
+                ))
+            # 3. Días/Vacaciones: se acumula el descuento por funcionario y campo
+            elif solicitud.tipo_permiso in CAMPOS_BALANCE:
+                campo = CAMPOS_BALANCE[solicitud.tipo_permiso]
+                descuentos[campo][solicitud.id_funcionario_solicitante_id] += solicitud.dias_solicitados
+
+        _descontar_balances(descuentos)
+        invalidar_balances({pk for por_funcionario in descuentos.values() for pk in por_funcionario})
+        Licencias.objects.bulk_create(licencias)
+        # bulk_create no dispara post_save: el resumen de días y las referencias al archivo se actualizan aquí
+        sumar_licencias(licencias)
+        contadores.sumar_licencias(licencias)
+        sumar_referencias([licencia.ruta_foto_licencia.name for licencia in licencias])
+
+    # 4. Cambiar el estado de todas en una sola sentencia
+    SolicitudesPermiso.objects.filter(pk__in=[s.pk for s in solicitudes]).update(estado=nuevo_estado)
+
+    # update()/bulk_create() no disparan señales: la auditoría, las notificaciones y los contadores se registran aquí
+    notificaciones.registrar([(solicitud.pk, nuevo_estado) for solicitud in solicitudes])
+    contadores.sumar_solicitudes(solicitudes, -1)
+    accion_log = auditoria.APROBACION_SOLICITUD if accion == APROBAR else auditoria.RECHAZO_SOLICITUD
+    for solicitud in solicitudes:
+        auditoria.registrar(
+            accion_log, auditoria.detalle_solicitud(solicitud, 'Pendiente', nuevo_estado), actor=usuario
+        )
+    if accion == APROBAR:
+        for licencia in licencias:
+            auditoria.registrar(auditoria.CARGA_LICENCIA, auditoria.detalle_licencia(licencia), actor=usuario)
+
+    for solicitud in solicitudes:
+        solicitud.estado = nuevo_estado
+    return solicitudes
@@ -0,0 +1,105 @@
+# intranet/storage.py
+
+# Almacenamiento de archivos subidos direccionado por contenido.
+# Cada archivo se guarda una sola vez en archivos/ab/cd/<sha256>.<ext>,
+# sin importar cuántas veces se suba ni desde qué formulario. Las carpetas
+# de dos niveles mantienen pocos archivos por directorio.
+# Las referencias de cada archivo se cuentan en ArchivoAlmacenado
+# (ver intranet/signals.py); los que quedan sin referencias se borran con
+# el comando purgar_archivos.
+
+import hashlib
+import os
+import tempfile
+from collections import Counter, defaultdict
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+PREFIJO = 'archivos'
+
+
+def ruta_para(sha256, extension):
+    return f"{PREFIJO}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension.lower()}"
+
+
+def es_deduplicado(nombre):
+    return bool(nombre) and nombre.startswith(PREFIJO + '/')
+
+
+class AlmacenamientoDeduplicado(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final lo decide el contenido (ver _save), no hace falta buscar uno libre
+        return name
+
+    def _save(self, name, content):
+        from .models import ArchivoAlmacenado
+
+        extension = os.path.splitext(name)[1]
+        directorio_tmp = self.path(os.path.join(PREFIJO, 'tmp'))
+        os.makedirs(directorio_tmp, exist_ok=True)
+
+        # 1. Se copia a un temporal calculando el hash en el mismo recorrido
+        sha256 = hashlib.sha256()
+        tamano = 0
+        fd, ruta_tmp = tempfile.mkstemp(dir=directorio_tmp)
+        try:
+            with os.fdopen(fd, 'wb') as destino:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    sha256.update(chunk)
+                    destino.write(chunk)
+                    tamano += len(chunk)
+
+            nombre = ruta_para(sha256.hexdigest(), extension)
+            ruta_final = self.path(nombre)
+
+            # 2. Registro del archivo, antes de decidir si se reutiliza el que ya existe.
+            #    Se renueva fecha_creacion: purgar_archivos solo borra registros viejos y los
+            #    bloquea mientras borra, así no borra un archivo que esta subida va a usar
+            #    (las referencias las suman las señales al guardar el modelo).
+            self._registrar(ArchivoAlmacenado, nombre, sha256.hexdigest(), tamano)
+
+            # 3. Si ya existe el mismo contenido, se descarta el temporal
+            if os.path.exists(ruta_final):
+                os.remove(ruta_tmp)
+            else:
+                os.makedirs(os.path.dirname(ruta_final), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(ruta_tmp, self.file_permissions_mode)
+                os.replace(ruta_tmp, ruta_final)
+        except BaseException:
+            if os.path.exists(ruta_tmp):
+                os.remove(ruta_tmp)
+            raise
+        return nombre
+
+    @staticmethod
+    def _registrar(modelo, nombre, sha256, tamano):
+        if modelo.objects.filter(ruta=nombre).update(fecha_creacion=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                modelo.objects.create(ruta=nombre, sha256=sha256, tamano=tamano)
+        except IntegrityError:
+            # Otra subida del mismo contenido lo registró entre el UPDATE y el INSERT
+            pass
+
+
+def sumar_referencias(nombres, cantidad=1):
+    """
+    Suma (o resta, con cantidad negativa) una referencia por cada nombre.
+    Los archivos antiguos (fuera de archivos/) no se cuentan. Un UPDATE por cada
+    cantidad de repeticiones distinta (en un lote casi siempre uno solo).
+    """
+    from .models import ArchivoAlmacenado
+
+    por_veces = defaultdict(list)
+    for nombre, veces in Counter(n for n in nombres if es_deduplicado(n)).items():
+        por_veces[veces].append(nombre)
+    for veces, rutas in por_veces.items():
+        ArchivoAlmacenado.objects.filter(ruta__in=rutas).update(referencias=F('referencias') + cantidad * veces)
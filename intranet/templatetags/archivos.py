@@ -0,0 +1,11 @@
+from django import template
+
+from intranet.miniaturas import existe_miniatura
+
+register = template.Library()
+
+
+@register.filter
+def tiene_miniatura(archivo):
+    """{% if licencia.ruta_foto_licencia|tiene_miniatura %} ... {% endif %}"""
+    return existe_miniatura(getattr(archivo, 'name', archivo))
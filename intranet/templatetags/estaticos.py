@@ -0,0 +1,14 @@
+from django import template
+from django.templatetags.static import static
+
+from intranet.estaticos import FULLCALENDAR_CDN, FULLCALENDAR_DIRECTORIO, fullcalendar_vendorizado
+
+register = template.Library()
+
+
+@register.simple_tag
+def fullcalendar(nombre):
+    """{% fullcalendar 'main.min.js' %}: la copia local si está vendorizada, si no la del CDN."""
+    if fullcalendar_vendorizado(nombre):
+        return static(FULLCALENDAR_DIRECTORIO + nombre)
+    return FULLCALENDAR_CDN + nombre
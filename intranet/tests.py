@@ -1,3 +1,1146 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import os
+import tempfile
+import zipfile
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import auditoria, contadores, importar_dias, metricas, notificaciones, rendimiento
+from .models import (
+    ArchivoAlmacenado, CambioSolicitud, Comunicados, ContadorPanel, Dias_Administrativos, Documentos,
+    EjecucionAcumulacion, Eventos_Calendario, Funcionarios, Licencias, Logs_Auditoria, SolicitudesPermiso,
+)
+
+
+# Sin buffer de auditoría en los tests: cada log se escribe al confirmarse su transacción,
+# en la BD de prueba y antes de que un TransactionTestCase vacíe las tablas. Así no queda
+# nada pendiente para el vaciado al apagar el proceso (que ya apuntaría a la BD real).
+_sin_buffer_auditoria = override_settings(AUDITORIA_LOTE=1)
+
+
+def setUpModule():
+    _sin_buffer_auditoria.enable()
+
+
+def tearDownModule():
+    auditoria.vaciar()
+    _sin_buffer_auditoria.disable()
+
+
+# --- Regresión de consultas (N+1) en reportes e historial ---
+
+class ConsultasReportesTest(TestCase):
+    """
+    Cada vista debe ejecutar la misma cantidad de consultas con pocas filas
+    que con cientos de filas. Si una plantilla vuelve a recorrer una FK sin
+    select_related, la cantidad crece con las filas y el test falla.
+    """
+    POCAS = 3
+    MUCHAS = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Funcionarios.objects.create_superuser('admin@cesfam.cl', 'admin@cesfam.cl', 'clave-admin')
+        cls.subdireccion = Funcionarios.objects.create_user(
+            'subdireccion@cesfam.cl', 'subdireccion@cesfam.cl', 'clave-sub', is_staff=True
+        )
+        cls.funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+
+    def _sembrar(self, cantidad):
+        # Cada fila apunta a un funcionario distinto para que un N+1 no quede oculto por la caché de la FK
+        desde = Funcionarios.objects.count()
+        funcionarios = Funcionarios.objects.bulk_create([
+            Funcionarios(username=f'func{i}@cesfam.cl', first_name=f'Nombre{i}', last_name=f'Apellido{i}')
+            for i in range(desde, desde + cantidad)
+        ])
+        hoy = datetime.date(2025, 11, 1)
+        Licencias.objects.bulk_create([
+            Licencias(id_funcionario=f, id_subdireccion_carga=self.subdireccion, fecha_inicio=hoy,
+                      fecha_fin=hoy, ruta_foto_licencia='licencias/foto.jpg')
+            for f in funcionarios
+        ])
+        Licencias.objects.bulk_create([
+            Licencias(id_funcionario=self.funcionario, id_subdireccion_carga=f, fecha_inicio=hoy,
+                      fecha_fin=hoy, ruta_foto_licencia='licencias/foto.jpg')
+            for f in funcionarios
+        ])
+        SolicitudesPermiso.objects.bulk_create([
+            SolicitudesPermiso(id_funcionario_solicitante=f, tipo_permiso='vacaciones', fecha_inicio=hoy,
+                               fecha_fin=hoy, dias_solicitados=1, estado='Pendiente')
+            for f in funcionarios
+        ])
+        Logs_Auditoria.objects.bulk_create([
+            Logs_Auditoria(id_usuario_actor=f, accion='Cambio de Rol', detalle='Prueba')
+            for f in funcionarios
+        ])
+
+    def _contar_consultas(self, usuario, url_name):
+        self.client.force_login(usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(consultas)
+
+    def _assert_consultas_constantes(self, usuario, url_name):
+        self._sembrar(self.POCAS)
+        pocas = self._contar_consultas(usuario, url_name)
+        self._sembrar(self.MUCHAS - self.POCAS)
+        muchas = self._contar_consultas(usuario, url_name)
+        self.assertEqual(
+            pocas, muchas,
+            f"{url_name}: {pocas} consultas con {self.POCAS} filas y {muchas} con {self.MUCHAS} (N+1)"
+        )
+
+    def test_reporte_licencias(self):
+        self._assert_consultas_constantes(self.subdireccion, 'reporte_licencias')
+
+    def test_reporte_solicitudes(self):
+        self._assert_consultas_constantes(self.subdireccion, 'reporte_solicitudes')
+
+    def test_logs_auditoria(self):
+        self._assert_consultas_constantes(self.admin, 'logs_auditoria')
+
+    def test_historial_personal(self):
+        self._assert_consultas_constantes(self.funcionario, 'historial_personal')
+
+    def test_filtro_fecha_imposible_se_ignora(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(reverse('logs_auditoria'), {'desde': '2025-02-30', 'hasta': '2025-02-31'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.client.force_login(self.subdireccion)
+        for nombre in ('exportar_solicitudes', 'exportar_licencias'):
+            respuesta = self.client.get(reverse(nombre, args=['csv']), {'desde': '2025-02-30'})
+            self.assertEqual(respuesta.status_code, 200, nombre)
+
+    def test_filtro_hasta_ultimo_dia_posible(self):
+        self._sembrar(self.POCAS)
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(reverse('logs_auditoria'), {'desde': '0001-01-01', 'hasta': '9999-12-31'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.context['logs']), self.POCAS)
+
+
+class MiniaturasTest(TestCase):
+    def test_miniatura_conserva_la_extension(self):
+        from .miniaturas import nombre_miniatura
+
+        self.assertNotEqual(nombre_miniatura('archivos/ab/cd/x.jpg'), nombre_miniatura('archivos/ab/cd/x.pdf'))
+
+
+# --- Benchmark (intranet/rendimiento.py) ---
+
+class RendimientoTest(TestCase):
+    """
+    El benchmark recorre todas las rutas de intranet/urls.py; con pocos datos
+    cada una debe responder sin error, así una ruta nueva sin caso (o rota)
+    se detecta aquí y no recién en la corrida de medir_rendimiento.
+    """
+
+    def test_todas_las_vistas_responden(self):
+        volumenes = {nombre: 5 for nombre in rendimiento.VOLUMENES}
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            usuarios = rendimiento.sembrar(volumenes)
+            resultados = rendimiento.medir(usuarios, repeticiones=1, calentamiento=0)
+
+        self.assertEqual({nombre for nombre, _, _ in rendimiento.casos()}, set(resultados))
+        for nombre, metricas in resultados.items():
+            self.assertLess(metricas['estado'], 400, f"{nombre} ({metricas['url']}) respondió {metricas['estado']}")
+
+
+# --- Métricas por vista (intranet/metricas.py) ---
+
+class MetricasTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Funcionarios.objects.create_superuser('admin@cesfam.cl', 'admin@cesfam.cl', 'clave-admin')
+
+    def setUp(self):
+        metricas.reiniciar()
+        self.client.force_login(self.admin)
+
+    def test_prometheus_por_vista(self):
+        self.client.get(reverse('logs_auditoria'))
+        texto = self.client.get(reverse('metricas')).content.decode()
+
+        self.assertIn('intranet_peticion_segundos_count{vista="logs_auditoria"} 1', texto)
+        self.assertIn('intranet_respuestas_total{vista="logs_auditoria",estado="2xx"} 1', texto)
+        consultas = next(
+            linea for linea in texto.splitlines()
+            if linea.startswith('intranet_consultas_sql_total{vista="logs_auditoria"}')
+        )
+        self.assertGreater(int(consultas.split()[-1]), 0)
+        plantillas = next(
+            linea for linea in texto.splitlines()
+            if linea.startswith('intranet_plantillas_segundos_total{vista="logs_auditoria"}')
+        )
+        self.assertGreater(float(plantillas.split()[-1]), 0)
+
+    @override_settings(METRICAS_LENTAS_MS=0)
+    def test_peticiones_lentas_con_sql(self):
+        with self.assertLogs('intranet.metricas', 'WARNING'):
+            self.client.get(reverse('logs_auditoria'))
+            lentas = self.client.get(reverse('metricas'), {'lentas': 1}).json()['peticiones']
+        self.assertEqual(lentas[0]['vista'], 'logs_auditoria')
+        self.assertTrue(any('intranet_logs_auditoria' in c['sql'] for c in lentas[0]['sql']))
+
+
+# --- API JSON (intranet/api.py) ---
+
+class ApiTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        hoy = datetime.date(2025, 11, 3)
+        ahora = datetime.datetime(2025, 11, 3, 9, tzinfo=datetime.timezone.utc)
+        SolicitudesPermiso.objects.bulk_create([
+            # Misma fecha_solicitud en pares: el cursor debe desempatar por id
+            SolicitudesPermiso(id_funcionario_solicitante=cls.funcionario, tipo_permiso='vacaciones',
+                               fecha_inicio=hoy, fecha_fin=hoy, dias_solicitados=1, estado='Pendiente',
+                               fecha_solicitud=ahora - datetime.timedelta(days=i // 2))
+            for i in range(7)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.funcionario)
+
+    def test_paginacion_por_cursor_y_campos(self):
+        ids, parametros = [], {'campos': 'id,estado', 'limite': 3}
+        while True:
+            datos = self.client.get(reverse('api_solicitudes'), parametros).json()
+            for fila in datos['datos']:
+                self.assertEqual(set(fila), {'id', 'estado'})
+            ids += [fila['id'] for fila in datos['datos']]
+            if not datos['siguiente']:
+                break
+            parametros['cursor'] = datos['siguiente']
+
+        esperados = SolicitudesPermiso.objects.order_by('-fecha_solicitud', '-id').values_list('id', flat=True)
+        self.assertEqual(ids, list(esperados))
+
+    def test_campo_desconocido(self):
+        respuesta = self.client.get(reverse('api_solicitudes'), {'campos': 'id,password'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('password', respuesta.json()['error'])
+
+    def test_sin_sesion_o_sin_permiso_responde_json(self):
+        respuesta = self.client.get(reverse('api_pendientes'))
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertIn('error', respuesta.json())
+        self.client.logout()
+        respuesta = self.client.get(reverse('api_balance'))
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(respuesta['Content-Type'], 'application/json')
+
+
+# --- Vistas async bajo ASGI ---
+
+class VistasAsyncTest(TestCase):
+    """
+    Con AsyncClient la petición pasa por ASGIHandler y toda la cadena de
+    middlewares en modo async: una consulta síncrona escondida (por ejemplo
+    leer request.user en la plantilla) falla con SynchronousOnlyOperation.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        Comunicados.objects.create(titulo='Aviso', cuerpo='Texto', id_autor=cls.funcionario)
+        Eventos_Calendario.objects.create(titulo='Reunión', fecha_inicio=datetime.date(2025, 11, 3))
+        SolicitudesPermiso.objects.create(
+            id_funcionario_solicitante=cls.funcionario, tipo_permiso='vacaciones',
+            fecha_inicio=datetime.date(2025, 11, 3), fecha_fin=datetime.date(2025, 11, 3), dias_solicitados=1,
+        )
+
+    async def test_vistas_async(self):
+        await self.async_client.aforce_login(self.funcionario)
+        for nombre in ('dashboard', 'documentos', 'historial_personal', 'eventos_json'):
+            respuesta = await self.async_client.get(reverse(nombre))
+            self.assertEqual(respuesta.status_code, 200, nombre)
+
+    async def test_eventos_json_304(self):
+        await self.async_client.aforce_login(self.funcionario)
+        primera = await self.async_client.get(reverse('eventos_json'))
+        segunda = await self.async_client.get(reverse('eventos_json'), headers={'if-none-match': primera['ETag']})
+        self.assertEqual(segunda.status_code, 304)
+        self.assertEqual(segunda['ETag'], primera['ETag'])
+
+    async def test_fecha_imposible_se_ignora(self):
+        await self.async_client.aforce_login(self.funcionario)
+        respuesta = await self.async_client.get(reverse('eventos_json'), {'start': '2025-02-30', 'end': '2025-13-01'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 1)
+
+    async def test_sin_sesion_redirige(self):
+        respuesta = await self.async_client.get(reverse('dashboard'))
+        self.assertEqual(respuesta.status_code, 302)
+
+
+# --- Notificaciones en vivo (SSE) ---
+
+class NotificacionesTest(TransactionTestCase):
+    """El flujo lee la tabla desde otros threads: se necesitan datos confirmados."""
+
+    def _eventos(self, desde):
+        async def leer():
+            return [parte async for parte in notificaciones.flujo(desde, duracion=0.2)]
+        return asyncio.run(leer())
+
+    def test_nueva_y_aprobada(self):
+        from .solicitudes import APROBAR, procesar_solicitudes
+
+        funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        jefe = Funcionarios.objects.create_user('jefe@cesfam.cl', 'jefe@cesfam.cl', 'clave-jefe', is_staff=True)
+        inicio = notificaciones.ultimo_id()
+        solicitud = SolicitudesPermiso.objects.create(
+            id_funcionario_solicitante=funcionario, tipo_permiso='administrativo',
+            fecha_inicio=datetime.date(2025, 11, 3), fecha_fin=datetime.date(2025, 11, 3), dias_solicitados=1,
+        )
+        # Guardar sin cambiar el estado no es un cambio
+        solicitud.save()
+
+        partes = self._eventos(inicio)
+        self.assertTrue(partes[0].startswith('retry:'))
+        self.assertEqual(len(partes), 2)
+        self.assertIn('event: nueva', partes[1])
+        self.assertIn('"username": "ana@cesfam.cl"', partes[1])
+
+        # Desde el último id solo llega lo posterior, también desde el camino en lote (update())
+        procesar_solicitudes([solicitud.pk], APROBAR, jefe)
+        partes = self._eventos(CambioSolicitud.objects.get(estado='Pendiente').pk)
+        self.assertEqual(len(partes), 2)
+        self.assertIn('event: aprobada', partes[1])
+        self.assertIn(f'"solicitud": {solicitud.pk}', partes[1])
+
+    def test_vista_solo_subdireccion(self):
+        funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        self.client.force_login(funcionario)
+        respuesta = self.client.get(reverse('solicitudes_eventos'))
+        self.assertEqual(respuesta.status_code, 302)
+
+
+# --- Contadores del panel de la Subdirección ---
+
+class ContadoresTest(TestCase):
+    """Los contadores mantenidos deben coincidir con lo que la reconciliación recalcula."""
+
+    def setUp(self):
+        self.funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        self.jefe = Funcionarios.objects.create_user('jefe@cesfam.cl', 'jefe@cesfam.cl', 'clave-jefe', is_staff=True)
+        self.hoy = timezone.localdate()
+
+    def _solicitud(self, tipo, dia):
+        return SolicitudesPermiso.objects.create(
+            id_funcionario_solicitante=self.funcionario, tipo_permiso=tipo,
+            fecha_inicio=dia, fecha_fin=dia, dias_solicitados=1,
+        )
+
+    def test_senales_y_lote_sin_desviacion(self):
+        from .solicitudes import RECHAZAR, procesar_solicitudes
+
+        primera = self._solicitud('administrativo', datetime.date(2025, 11, 3))
+        self._solicitud('administrativo', datetime.date(2025, 11, 4))
+        vacaciones = self._solicitud('vacaciones', datetime.date(2025, 11, 5))
+        # Fechas en texto, como las crea gestion_licencias
+        licencia = Licencias.objects.create(
+            id_funcionario=self.funcionario, fecha_inicio=str(self.hoy - datetime.timedelta(days=2)),
+            fecha_fin=str(self.hoy + datetime.timedelta(days=2)), ruta_foto_licencia='licencias/a.pdf',
+        )
+        Licencias.objects.create(
+            id_funcionario=self.funcionario, fecha_inicio=self.hoy + datetime.timedelta(days=5),
+            fecha_fin=self.hoy + datetime.timedelta(days=6), ruta_foto_licencia='licencias/b.pdf',
+        )
+        Documentos.objects.create(titulo='Protocolo', ruta_archivo='documentos/protocolo.pdf')
+
+        # Cambio de estado uno a uno (señal) y en lote (update())
+        primera.estado = 'Aprobado'
+        primera.save()
+        procesar_solicitudes([vacaciones.pk], RECHAZAR, self.jefe)
+
+        with self.assertNumQueries(1):
+            panel = contadores.panel()
+        self.assertEqual(panel['pendientes'], {'administrativo': 1})
+        self.assertEqual(panel['licencias_activas'], 1)
+        self.assertEqual(panel['documentos_semana'], 1)
+        self.assertEqual(contadores.reconciliar(), {})
+
+        # La licencia activa termina ayer: deja de contarse hoy
+        licencia.fecha_fin = self.hoy - datetime.timedelta(days=1)
+        licencia.save()
+        self.assertEqual(contadores.panel()['licencias_activas'], 0)
+        self.assertEqual(contadores.panel(self.hoy + datetime.timedelta(days=5))['licencias_activas'], 1)
+        self.assertEqual(contadores.reconciliar(), {})
+
+    def test_reconciliar_corrige_desviacion(self):
+        self._solicitud('administrativo', datetime.date(2025, 11, 3))
+        ContadorPanel.objects.filter(clave='pendientes:administrativo').update(valor=7)
+
+        self.assertEqual(contadores.reconciliar(), {
+            'total_pendientes': (7, 1), 'pendientes:administrativo': (7, 1),
+        })
+        self.assertEqual(contadores.panel()['total_pendientes'], 1)
+
+    def test_dashboard_subdireccion(self):
+        self._solicitud('vacaciones', datetime.date(2025, 11, 3))
+        self.client.force_login(self.jefe)
+        respuesta = self.client.get(reverse('dashboard'))
+        self.assertContains(respuesta, 'Solicitudes Pendientes')
+        self.assertEqual(respuesta.context['panel']['pendientes'], {'vacaciones': 1})
+
+
+# --- Carga masiva de días (intranet/importar_dias.py) ---
+
+class ImportarDiasTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+
+    def _importar(self, contenido, nombre='dias.csv', **opciones):
+        return importar_dias.importar(importar_dias.leer_filas(io.BytesIO(contenido), nombre), **opciones)
+
+    def test_utf8_invalido_al_final_no_guarda_nada(self):
+        contenido = b'funcionario;vacaciones_restantes\nana@cesfam.cl;10\n' + b'x\xff;2\n'
+        with self.assertRaises(importar_dias.ArchivoInvalido):
+            self._importar(contenido, tamano_lote=1)
+        self.assertFalse(Dias_Administrativos.objects.exists())
+
+    def test_xlsx_danado_al_final_no_guarda_nada(self):
+        filas = ''.join(
+            f'<row><c t="inlineStr"><is><t>{a}</t></is></c><c t="inlineStr"><is><t>{b}</t></is></c></row>'
+            for a, b in [('funcionario', 'vacaciones_restantes'), ('ana@cesfam.cl', '10')]
+        )
+        hoja = (
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            f'{filas}<row><c t="inlineStr"><is><t>x</t></is>'   # XML cortado a mitad de la hoja
+        )
+        contenido = io.BytesIO()
+        with zipfile.ZipFile(contenido, 'w') as libro:
+            libro.writestr('xl/worksheets/sheet1.xml', hoja)
+
+        with self.assertRaises(importar_dias.ArchivoInvalido):
+            self._importar(contenido.getvalue(), nombre='dias.xlsx', tamano_lote=1)
+        self.assertFalse(Dias_Administrativos.objects.exists())
+
+    def test_id_no_valido_es_error_de_fila(self):
+        contenido = 'funcionario;vacaciones_restantes\n²;1\n{};1\nana@cesfam.cl;10\n'.format('9' * 30).encode()
+        resultado = self._importar(contenido)
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual([e.mensaje for e in resultado.errores], ["Funcionario no encontrado."] * 2)
+
+
+# --- Almacenamiento deduplicado (intranet/storage.py) ---
+
+class AlmacenamientoTest(TestCase):
+
+    def test_subida_repetida_protege_huerfano_de_la_purga(self):
+        from django.core.files.base import ContentFile
+        from django.core.management import call_command
+
+        from .storage import AlmacenamientoDeduplicado
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            almacenamiento = AlmacenamientoDeduplicado()
+            nombre = almacenamiento.save('a.pdf', ContentFile(b'contenido'))
+            otro = almacenamiento.save('c.pdf', ContentFile(b'otro contenido'))
+            # Huérfanos viejos: la purga los borraría...
+            ArchivoAlmacenado.objects.update(
+                fecha_creacion=timezone.now() - datetime.timedelta(days=1)
+            )
+            # ...pero una subida del mismo contenido lo vuelve a usar antes de sumar su referencia
+            self.assertEqual(almacenamiento.save('b.pdf', ContentFile(b'contenido')), nombre)
+            call_command('purgar_archivos', stdout=io.StringIO())
+            self.assertTrue(ArchivoAlmacenado.objects.filter(ruta=nombre).exists())
+            self.assertTrue(almacenamiento.exists(nombre))
+            self.assertFalse(almacenamiento.exists(otro))
+
+
+# --- Acumulación anual (intranet/acumulacion.py) ---
+
+class AcumulacionTest(TestCase):
+
+    def setUp(self):
+        self.nueva = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        self.con_saldo = Funcionarios.objects.create_user('beto@cesfam.cl', 'beto@cesfam.cl', 'clave-beto')
+        self.con_poco = Funcionarios.objects.create_user('carla@cesfam.cl', 'carla@cesfam.cl', 'clave-carla')
+        Dias_Administrativos.objects.create(id_funcionario=self.con_saldo, vacaciones_restantes=25, admin_restantes=1)
+        Dias_Administrativos.objects.create(id_funcionario=self.con_poco, vacaciones_restantes=3, admin_restantes=0)
+
+    def _saldos(self):
+        return {
+            d.id_funcionario_id: (d.vacaciones_restantes, d.admin_restantes)
+            for d in Dias_Administrativos.objects.all()
+        }
+
+    def test_balance_nuevo_recibe_un_solo_ano(self):
+        from .acumulacion import acumular
+
+        ejecucion = acumular(2026)
+        self.assertEqual(self._saldos()[self.nueva.pk], (20, 5))
+        self.assertIn('"balances_creados": 1', ejecucion.detalle)
+
+    def test_arrastre_con_tope(self):
+        from .acumulacion import acumular
+
+        acumular(2026)
+        saldos = self._saldos()
+        # Se conservan como máximo 20 días del año anterior
+        self.assertEqual(saldos[self.con_saldo.pk], (40, 5))
+        self.assertEqual(saldos[self.con_poco.pk], (23, 5))
+
+    def test_segunda_ejecucion_del_mismo_ano_no_aplica(self):
+        from .acumulacion import acumular
+
+        self.assertIsNotNone(acumular(2026))
+        antes = self._saldos()
+        self.assertIsNone(acumular(2026))
+        self.assertEqual(self._saldos(), antes)
+        self.assertEqual(EjecucionAcumulacion.objects.filter(periodo=2026).count(), 1)
+
+
+# --- Exportaciones en streaming (intranet/exportar.py) ---
+
+class ExportacionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.jefe = Funcionarios.objects.create_user('jefe@cesfam.cl', 'jefe@cesfam.cl', 'clave-jefe', is_staff=True)
+        cls.funcionario = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        SolicitudesPermiso.objects.bulk_create([
+            SolicitudesPermiso(id_funcionario_solicitante=cls.funcionario, tipo_permiso='vacaciones',
+                               fecha_inicio=datetime.date(2025, 11, 3 + i), fecha_fin=datetime.date(2025, 11, 3 + i),
+                               dias_solicitados=1, estado='Aprobado' if i % 2 else 'Pendiente')
+            for i in range(5)
+        ])
+
+    def _filas_csv(self, contenido):
+        import csv
+
+        return list(csv.reader(io.StringIO(contenido.decode('utf-8-sig')), delimiter=';'))
+
+    def test_csv_con_filtros(self):
+        self.client.force_login(self.jefe)
+        respuesta = self.client.get(reverse('exportar_solicitudes', args=['csv']), {'estado': 'Pendiente'})
+        self.assertFalse(respuesta.is_async)
+        filas = self._filas_csv(b''.join(respuesta.streaming_content))
+
+        self.assertEqual(filas[0][:2], ['ID', 'Funcionario'])
+        esperados = SolicitudesPermiso.objects.filter(estado='Pendiente').order_by('fecha_solicitud', 'pk')
+        self.assertEqual([int(fila[0]) for fila in filas[1:]], [s.pk for s in esperados])
+        self.assertEqual({fila[-1] for fila in filas[1:]}, {'Pendiente'})
+
+    async def test_asgi_entrega_por_bloques(self):
+        from unittest import mock
+
+        from . import exportar
+
+        await self.async_client.aforce_login(self.jefe)
+        with mock.patch.object(exportar, 'FILAS_POR_ENVIO', 1):
+            respuesta = await self.async_client.get(reverse('exportar_solicitudes', args=['csv']))
+            self.assertTrue(respuesta.is_async)
+            bloques = [bloque async for bloque in respuesta.streaming_content]
+        # Encabezado + una fila por bloque, más el cierre: no un solo bloque con el archivo entero
+        self.assertEqual(len(bloques), 6)
+        self.assertEqual(len(self._filas_csv(b''.join(bloques))), 6)
+
+        respuesta = await self.async_client.get(reverse('exportar_licencias', args=['xlsx']))
+        contenido = b''.join([bloque async for bloque in respuesta.streaming_content])
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo:
+            self.assertIn(b'<sheetData>', archivo.read('xl/worksheets/sheet1.xml'))
+
+
+# --- Descargas protegidas (intranet/descargas.py) ---
+
+class DescargasTest(TestCase):
+    CONTENIDO = b'0123456789' * 10
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=self.media.name, DESCARGAS_SENDFILE=None)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        os.makedirs(os.path.join(self.media.name, 'licencias'))
+        with open(os.path.join(self.media.name, 'licencias', 'foto.pdf'), 'wb') as archivo:
+            archivo.write(self.CONTENIDO)
+        self.duenio = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        self.otro = Funcionarios.objects.create_user('beto@cesfam.cl', 'beto@cesfam.cl', 'clave-beto')
+        self.jefe = Funcionarios.objects.create_user('jefe@cesfam.cl', 'jefe@cesfam.cl', 'clave-jefe', is_staff=True)
+        licencia = Licencias.objects.create(
+            id_funcionario=self.duenio, fecha_inicio=datetime.date(2025, 11, 3),
+            fecha_fin=datetime.date(2025, 11, 4), ruta_foto_licencia='licencias/foto.pdf',
+        )
+        self.url = reverse('descargar_archivo', args=['licencia', licencia.pk])
+
+    def _get(self, **encabezados):
+        return self.client.get(self.url, headers=encabezados)
+
+    def test_completo_y_solo_dueno_o_subdireccion(self):
+        self.client.force_login(self.duenio)
+        respuesta = self._get()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO)
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+
+        self.client.force_login(self.otro)
+        self.assertEqual(self._get().status_code, 404)
+        self.client.force_login(self.jefe)
+        self.assertEqual(self._get().status_code, 200)
+
+    def test_rangos(self):
+        self.client.force_login(self.duenio)
+        respuesta = self._get(range='bytes=10-19')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO[10:20])
+
+        respuesta = self._get(range='bytes=-5')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO[-5:])
+
+        respuesta = self._get(range='bytes=100-')
+        self.assertEqual(respuesta.status_code, 416)
+        self.assertEqual(respuesta['Content-Range'], 'bytes */100')
+
+    def test_condicionales(self):
+        self.client.force_login(self.duenio)
+        etag = self._get()['ETag']
+        self.assertEqual(self._get(if_none_match=etag).status_code, 304)
+
+        # If-Range con la versión vigente: tramo; con otra: archivo completo
+        self.assertEqual(self._get(range='bytes=0-9', if_range=etag).status_code, 206)
+        respuesta = self._get(range='bytes=0-9', if_range='"otra-version"')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.CONTENIDO)
+
+    async def test_asgi_por_bloques(self):
+        from unittest import mock
+
+        from . import descargas
+
+        await self.async_client.aforce_login(self.duenio)
+        with mock.patch.object(descargas, 'BLOQUE', 8):
+            respuesta = await self.async_client.get(self.url, headers={'range': 'bytes=10-29'})
+            self.assertTrue(respuesta.is_async)
+            bloques = [bloque async for bloque in respuesta.streaming_content]
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Length'], '20')
+        self.assertEqual([len(bloque) for bloque in bloques], [8, 8, 4])
+        self.assertEqual(b''.join(bloques), self.CONTENIDO[10:30])
+
+
+# --- Estáticos de producción (intranet/estaticos.py) ---
+
+class EstaticosTest(TestCase):
+
+    def _collectstatic(self, directorios):
+        from django.core.management import call_command
+
+        destino = tempfile.TemporaryDirectory()
+        self.addCleanup(destino.cleanup)
+        with override_settings(
+            STATIC_ROOT=destino.name, STATICFILES_DIRS=directorios,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'intranet.estaticos.EstaticosComprimidos'}},
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        return destino.name
+
+    def test_sin_fullcalendar_no_se_publica(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        with self.assertRaisesMessage(ImproperlyConfigured, 'vendorizar_fullcalendar'):
+            self._collectstatic([])
+
+    def test_con_fullcalendar_hash_y_gzip(self):
+        from . import estaticos
+
+        with tempfile.TemporaryDirectory() as origen:
+            for nombre in estaticos.FULLCALENDAR_ARCHIVOS:
+                ruta = os.path.join(origen, estaticos.FULLCALENDAR_DIRECTORIO, nombre)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                with open(ruta, 'w') as archivo:
+                    archivo.write('/* fullcalendar */\n' * 100)
+            destino = self._collectstatic([origen])
+
+        with open(os.path.join(destino, 'staticfiles.json')) as manifiesto:
+            publicado = json.load(manifiesto)['paths'][estaticos.FULLCALENDAR_DIRECTORIO + 'main.min.js']
+        self.assertNotEqual(publicado, estaticos.FULLCALENDAR_DIRECTORIO + 'main.min.js')
+        self.assertTrue(os.path.exists(os.path.join(destino, publicado + '.gz')))
+
+
+# --- Buffer de auditoría (intranet/auditoria.py) ---
+
+@override_settings(AUDITORIA_LOTE=3, AUDITORIA_INTERVALO=60)
+class AuditoriaBufferTest(TestCase):
+    """Con buffer real (el resto del módulo usa AUDITORIA_LOTE=1)."""
+
+    def setUp(self):
+        auditoria.vaciar()
+        self.addCleanup(auditoria.vaciar)
+
+    def _registrar(self, cantidad):
+        with self.captureOnCommitCallbacks(execute=True):
+            for numero in range(cantidad):
+                auditoria.registrar(auditoria.CAMBIO_ROL, f'Acción {numero}')
+
+    def test_se_escribe_al_llenar_el_lote(self):
+        self._registrar(2)
+        self.assertEqual(auditoria.pendientes(), 2)
+        self.assertFalse(Logs_Auditoria.objects.exists())
+
+        with self.assertNumQueries(1):
+            self._registrar(1)
+        self.assertEqual(auditoria.pendientes(), 0)
+        self.assertEqual(Logs_Auditoria.objects.count(), 3)
+
+    def test_se_escribe_al_pasar_el_intervalo(self):
+        from unittest import mock
+
+        self._registrar(1)
+        with mock.patch.object(auditoria, 'close_old_connections'):
+            auditoria.vaciar_si_corresponde(sender=None)
+            self.assertEqual(auditoria.pendientes(), 1)
+
+            with mock.patch.object(auditoria, '_ultimo_vaciado', auditoria._ultimo_vaciado - 61):
+                auditoria.vaciar_si_corresponde(sender=None)
+        self.assertEqual(auditoria.pendientes(), 0)
+        self.assertEqual(Logs_Auditoria.objects.count(), 1)
+
+    def test_rollback_no_deja_log(self):
+        from django.db import transaction
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    auditoria.registrar(auditoria.CAMBIO_ROL, 'Revertida')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(auditoria.pendientes(), 0)
+        auditoria.vaciar()
+        self.assertFalse(Logs_Auditoria.objects.exists())
+
+    def test_al_apagar_se_vacia(self):
+        self._registrar(2)
+        auditoria._vaciar_al_salir()
+        self.assertEqual(Logs_Auditoria.objects.count(), 2)
+
+
+# --- Aprobación en lote (intranet/solicitudes.py) ---
+
+class SolicitudesLoteTest(TestCase):
+
+    def setUp(self):
+        self.jefe = Funcionarios.objects.create_user('jefe@cesfam.cl', 'jefe@cesfam.cl', 'clave-jefe', is_staff=True)
+        self.ana = self._funcionario('ana')
+        self.beto = self._funcionario('beto')
+
+    def _funcionario(self, nombre):
+        funcionario = Funcionarios.objects.create_user(f'{nombre}@cesfam.cl', f'{nombre}@cesfam.cl', 'clave')
+        Dias_Administrativos.objects.create(id_funcionario=funcionario, vacaciones_restantes=20, admin_restantes=5)
+        return funcionario
+
+    def _solicitud(self, funcionario, tipo, inicio, dias, **campos):
+        return SolicitudesPermiso(
+            id_funcionario_solicitante=funcionario, tipo_permiso=tipo, fecha_inicio=inicio,
+            fecha_fin=inicio + datetime.timedelta(days=dias - 1), dias_solicitados=dias, **campos,
+        )
+
+    def _saldo(self, funcionario):
+        dias = Dias_Administrativos.objects.get(id_funcionario=funcionario)
+        return dias.vacaciones_restantes, dias.admin_restantes
+
+    def test_descuentos_por_campo_y_licencias(self):
+        from .models import ResumenLicencias
+        from .solicitudes import APROBAR, procesar_solicitudes
+
+        archivo = 'archivos/ab/cd/' + 'a' * 64 + '.pdf'
+        ArchivoAlmacenado.objects.create(ruta=archivo, sha256='a' * 64, tamano=10)
+        noviembre = datetime.date(2025, 11, 3)
+        solicitudes = SolicitudesPermiso.objects.bulk_create([
+            self._solicitud(self.ana, 'vacaciones', noviembre, 3),
+            self._solicitud(self.ana, 'administrativo', noviembre + datetime.timedelta(days=7), 1),
+            self._solicitud(self.beto, 'vacaciones', noviembre, 2),
+            self._solicitud(self.beto, 'licencia', noviembre + datetime.timedelta(days=14), 2,
+                            justificativo_archivo=archivo),
+            self._solicitud(self.beto, 'administrativo', noviembre + datetime.timedelta(days=21), 1,
+                            estado='Rechazado'),
+        ])
+
+        procesadas = procesar_solicitudes([s.pk for s in solicitudes], APROBAR, self.jefe)
+
+        self.assertEqual(len(procesadas), 4)
+        self.assertEqual(self._saldo(self.ana), (17, 4))
+        self.assertEqual(self._saldo(self.beto), (18, 5))
+        licencia = Licencias.objects.get()
+        self.assertEqual(
+            (licencia.id_funcionario, licencia.id_subdireccion_carga, licencia.fecha_inicio, licencia.fecha_fin),
+            (self.beto, self.jefe, datetime.date(2025, 11, 17), datetime.date(2025, 11, 18)),
+        )
+        self.assertEqual(licencia.ruta_foto_licencia.name, archivo)
+        self.assertEqual(ArchivoAlmacenado.objects.get(ruta=archivo).referencias, 1)
+        self.assertEqual(ResumenLicencias.objects.get(id_funcionario=self.beto).dias_totales, 2)
+        self.assertEqual(
+            list(SolicitudesPermiso.objects.order_by('pk').values_list('estado', flat=True)),
+            ['Aprobado'] * 4 + ['Rechazado'],
+        )
+
+    def test_solo_pendientes(self):
+        from .solicitudes import APROBAR, RECHAZAR, procesar_solicitudes
+
+        solicitud = self._solicitud(self.ana, 'vacaciones', datetime.date(2025, 11, 3), 2)
+        solicitud.save()
+        self.assertEqual(len(procesar_solicitudes([solicitud.pk], APROBAR, self.jefe)), 1)
+        # Ya aprobada: ni se rechaza ni se descuenta dos veces
+        self.assertEqual(procesar_solicitudes([solicitud.pk], RECHAZAR, self.jefe), [])
+        self.assertEqual(procesar_solicitudes([solicitud.pk], APROBAR, self.jefe), [])
+        self.assertEqual(self._saldo(self.ana), (18, 5))
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.estado, 'Aprobado')
+
+    def _consultas_al_aprobar(self, cantidad):
+        from .solicitudes import APROBAR, procesar_solicitudes
+
+        inicio = datetime.date(2025, 11, 3)
+        solicitudes = []
+        for numero in range(cantidad):
+            funcionario = self._funcionario(f'lote{cantidad}-{numero}')
+            archivo = f'archivos/ab/cd/{numero:064d}.pdf'
+            solicitudes += [
+                self._solicitud(funcionario, 'vacaciones', inicio, 2),
+                self._solicitud(funcionario, 'administrativo', inicio + datetime.timedelta(days=3), 1),
+                self._solicitud(funcionario, 'licencia', inicio + datetime.timedelta(days=5 + numero), 3,
+                                justificativo_archivo=archivo),
+            ]
+        ids = [s.pk for s in SolicitudesPermiso.objects.bulk_create(solicitudes)]
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(len(procesar_solicitudes(ids, APROBAR, self.jefe)), len(ids))
+        return len(consultas)
+
+    def test_consultas_constantes(self):
+        # Un lote previo deja creadas filas de contadores: los dos lotes medidos actualizan y crean
+        self._consultas_al_aprobar(1)
+        pocas = self._consultas_al_aprobar(2)
+        muchas = self._consultas_al_aprobar(20)
+        self.assertEqual(pocas, muchas, f"{pocas} consultas con 2 funcionarios y {muchas} con 20")
+
+
+# --- Resumen de días de licencia (intranet/resumen.py) ---
+
+class ResumenLicenciasTest(TestCase):
+    """reporte_licencias lee ResumenLicencias: debe coincidir con sumar los días de Licencias."""
+
+    def setUp(self):
+        self.jefe = Funcionarios.objects.create_user('jefe@cesfam.cl', 'jefe@cesfam.cl', 'clave-jefe', is_staff=True)
+        self.ana = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        self.beto = Funcionarios.objects.create_user('beto@cesfam.cl', 'beto@cesfam.cl', 'clave-beto')
+        self.client.force_login(self.jefe)
+
+    def _licencia(self, funcionario, inicio, fin):
+        return Licencias.objects.create(
+            id_funcionario=funcionario, fecha_inicio=inicio, fecha_fin=fin, ruta_foto_licencia='licencias/a.pdf'
+        )
+
+    def _esperado(self):
+        por_funcionario, por_mes = {}, {}
+        for licencia in Licencias.objects.select_related('id_funcionario'):
+            dia = licencia.fecha_inicio
+            while dia <= licencia.fecha_fin:
+                usuario = licencia.id_funcionario.username
+                por_funcionario[usuario] = por_funcionario.get(usuario, 0) + 1
+                por_mes[dia.replace(day=1)] = por_mes.get(dia.replace(day=1), 0) + 1
+                dia += datetime.timedelta(days=1)
+        return sum(por_funcionario.values()), por_funcionario, por_mes
+
+    def _assert_reporte_coincide(self):
+        contexto = self.client.get(reverse('reporte_licencias')).context
+        total, por_funcionario, por_mes = self._esperado()
+        self.assertEqual(contexto['dias_totales'], total)
+        self.assertEqual(
+            {fila['id_funcionario__username']: fila['dias'] for fila in contexto['totales_funcionario']},
+            por_funcionario,
+        )
+        self.assertEqual({fila['mes']: fila['dias'] for fila in contexto['totales_mes']}, por_mes)
+
+    def test_crear_editar_y_eliminar(self):
+        # Cruza de octubre a noviembre
+        cruzada = self._licencia(self.ana, datetime.date(2025, 10, 30), datetime.date(2025, 11, 2))
+        otra = self._licencia(self.beto, datetime.date(2025, 11, 10), datetime.date(2025, 11, 14))
+        # Fechas en texto, como las crea gestion_licencias
+        self._licencia(self.ana, '2025-12-01', '2025-12-03')
+        self._assert_reporte_coincide()
+
+        cruzada.fecha_fin = datetime.date(2025, 11, 5)
+        cruzada.save()
+        self._assert_reporte_coincide()
+
+        # Cambio de funcionario: los días pasan de uno al otro
+        otra.id_funcionario = self.ana
+        otra.save()
+        self._assert_reporte_coincide()
+
+        cruzada.delete()
+        self._assert_reporte_coincide()
+
+
+# --- Días hábiles (intranet/dias_habiles.py) ---
+
+class DiasHabilesTest(TestCase):
+    LUNES = datetime.date(2025, 11, 3)
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from . import dias_habiles
+
+        cache.delete(dias_habiles.CLAVE_FERIADOS)
+        self.addCleanup(cache.delete, dias_habiles.CLAVE_FERIADOS)
+
+    def _dia(self, desplazamiento):
+        return self.LUNES + datetime.timedelta(days=desplazamiento)
+
+    def _feriado(self, inicio, fin=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Eventos_Calendario.objects.create(
+                titulo='Feriado', fecha_inicio=inicio, fecha_fin=fin, tipo_evento='Feriado'
+            )
+
+    def test_fines_de_semana_y_feriados(self):
+        from .dias_habiles import contar_dias_habiles, dias_solicitados
+
+        casos = [
+            (0, 4, 5),      # lunes a viernes
+            (4, 7, 2),      # viernes a lunes
+            (5, 6, 0),      # sábado y domingo
+            (0, 13, 10),    # dos semanas
+            (3, 2, 0),      # período al revés
+        ]
+        for inicio, fin, esperado in casos:
+            self.assertEqual(contar_dias_habiles(self._dia(inicio), self._dia(fin)), esperado, (inicio, fin))
+
+        self._feriado(self._dia(2))                 # miércoles
+        self._feriado(self._dia(5))                 # sábado: no cambia nada
+        self._feriado(self._dia(10), self._dia(11))  # jueves y viernes de la semana siguiente
+        self.assertEqual(contar_dias_habiles(self._dia(0), self._dia(4)), 4)
+        self.assertEqual(contar_dias_habiles(self._dia(0), self._dia(13)), 7)
+        # Licencias y otros permisos van en días corridos
+        self.assertEqual(dias_solicitados('licencia', self._dia(0), self._dia(13)), 14)
+        self.assertEqual(dias_solicitados('vacaciones', self._dia(0), self._dia(13)), 7)
+
+    def test_numpy_y_python_coinciden(self):
+        import random
+        from unittest import mock
+
+        from . import dias_habiles
+
+        if dias_habiles.np is None:
+            self.skipTest('numpy no está instalado')
+        self._feriado(self._dia(2))
+        self._feriado(self._dia(40), self._dia(44))
+        azar = random.Random(7)
+        inicios = [self._dia(azar.randint(-20, 80)) for _ in range(300)]
+        fines = [inicio + datetime.timedelta(days=azar.randint(-3, 40)) for inicio in inicios]
+
+        con_numpy = dias_habiles.contar_dias_habiles_lote(inicios, fines)
+        with mock.patch.object(dias_habiles, 'np', None):
+            sin_numpy = dias_habiles.contar_dias_habiles_lote(inicios, fines)
+        self.assertEqual(con_numpy, sin_numpy)
+        self.assertEqual(sin_numpy, [dias_habiles.contar_dias_habiles(i, f) for i, f in zip(inicios, fines)])
+
+    def test_cache_se_invalida_al_cambiar_un_feriado(self):
+        from .dias_habiles import contar_dias_habiles
+
+        semana = (self._dia(0), self._dia(4))
+        self.assertEqual(contar_dias_habiles(*semana), 5)   # queda en caché sin feriados
+        feriado = self._feriado(self._dia(1))
+        self.assertEqual(contar_dias_habiles(*semana), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            feriado.fecha_inicio = self._dia(7)
+            feriado.save()
+        self.assertEqual(contar_dias_habiles(*semana), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            feriado.fecha_inicio = self._dia(3)
+            feriado.save()
+        self.assertEqual(contar_dias_habiles(*semana), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            feriado.delete()
+        self.assertEqual(contar_dias_habiles(*semana), 5)
+
+
+# --- Solapamientos (intranet/solapamientos.py) ---
+
+class SolapamientosTest(TestCase):
+
+    def setUp(self):
+        self.ana = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+        self.beto = Funcionarios.objects.create_user('beto@cesfam.cl', 'beto@cesfam.cl', 'clave-beto')
+        # Ana: vacaciones aprobadas del 3 al 5 y licencia del 10 al 12 de noviembre
+        self.vacaciones = self._solicitud(self.ana, 3, 5, 'Aprobado')
+        self.licencia = Licencias.objects.create(
+            id_funcionario=self.ana, fecha_inicio=self._dia(10), fecha_fin=self._dia(12),
+            ruta_foto_licencia='licencias/a.pdf',
+        )
+
+    def _dia(self, dia):
+        return datetime.date(2025, 11, dia)
+
+    def _solicitud(self, funcionario, inicio, fin, estado='Pendiente'):
+        return SolicitudesPermiso.objects.create(
+            id_funcionario_solicitante=funcionario, tipo_permiso='vacaciones', fecha_inicio=self._dia(inicio),
+            fecha_fin=self._dia(fin), dias_solicitados=1, estado=estado,
+        )
+
+    def test_conflictos(self):
+        from .solapamientos import LICENCIA, SOLICITUD, conflictos
+
+        def origenes(inicio, fin, funcionario=self.ana):
+            return [(p.origen, p.pk) for p in conflictos(funcionario.pk, self._dia(inicio), self._dia(fin))]
+
+        # Períodos contiguos no chocan
+        self.assertEqual(origenes(1, 2), [])
+        self.assertEqual(origenes(6, 9), [])
+        self.assertEqual(origenes(5, 6), [(SOLICITUD, self.vacaciones.pk)])
+        self.assertEqual(origenes(12, 14), [(LICENCIA, self.licencia.pk)])
+        self.assertEqual(len(origenes(1, 30)), 2)
+        # Otro funcionario y las solicitudes pendientes no cuentan
+        self._solicitud(self.ana, 20, 22)
+        self.assertEqual(origenes(21, 21), [])
+        self.assertEqual(origenes(4, 4, self.beto), [])
+
+    def test_formulario_rechaza_fechas_cruzadas(self):
+        self.client.force_login(self.ana)
+        url = reverse('gestion_solicitudes')
+        respuesta = self.client.post(url, {'tipo_permiso': 'vacaciones', 'fecha_inicio': '2025-11-11',
+                                           'fecha_fin': '2025-11-14'})
+        self.assertContains(respuesta, 'Las fechas se cruzan')
+        self.assertFalse(SolicitudesPermiso.objects.filter(estado='Pendiente').exists())
+
+        respuesta = self.client.post(url, {'tipo_permiso': 'vacaciones', 'fecha_inicio': '2025-11-13',
+                                           'fecha_fin': '2025-11-14'})
+        self.assertRedirects(respuesta, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertTrue(SolicitudesPermiso.objects.filter(estado='Pendiente').exists())
+
+    def test_lote_choca_consigo_mismo(self):
+        from .solapamientos import solicitudes_en_conflicto
+
+        primera = self._solicitud(self.beto, 3, 5)
+        cruzada = self._solicitud(self.beto, 5, 7)
+        contigua = self._solicitud(self.beto, 6, 8)
+        contra_licencia = self._solicitud(self.ana, 9, 10)
+        # La de menor pk gana; la contigua a la primera no choca porque la cruzada no se aprueba
+        self.assertEqual(
+            solicitudes_en_conflicto([primera, cruzada, contigua, contra_licencia]), {cruzada.pk, contra_licencia.pk}
+        )
+
+    def test_barrido_igual_a_comparar_todos(self):
+        from .solapamientos import LICENCIA, SOLICITUD, pares_en_conflicto
+
+        self._solicitud(self.ana, 4, 11)              # cruza las vacaciones y la licencia
+        self._solicitud(self.ana, 13, 14)             # contigua a la licencia
+        self._solicitud(self.beto, 1, 30)
+        self._solicitud(self.beto, 10, 10, 'Rechazado')
+        Licencias.objects.create(id_funcionario=self.beto, fecha_inicio=self._dia(15), fecha_fin=self._dia(16),
+                                 ruta_foto_licencia='licencias/b.pdf')
+
+        periodos = [
+            (s.id_funcionario_solicitante_id, s.fecha_inicio, s.fecha_fin, (SOLICITUD, s.pk))
+            for s in SolicitudesPermiso.objects.filter(estado__in=('Aprobado', 'Pendiente'))
+        ] + [(l.id_funcionario_id, l.fecha_inicio, l.fecha_fin, (LICENCIA, l.pk)) for l in Licencias.objects.all()]
+        esperados = {
+            frozenset((a[3], b[3]))
+            for i, a in enumerate(periodos) for b in periodos[i + 1:]
+            if a[0] == b[0] and a[1] <= b[2] and b[1] <= a[2]
+        }
+        obtenidos = {frozenset(((a.origen, a.pk), (b.origen, b.pk))) for a, b in pares_en_conflicto()}
+        self.assertEqual(obtenidos, esperados)
+        self.assertEqual(len(esperados), 3)
+
+        jefe = Funcionarios.objects.create_user('jefe@cesfam.cl', 'jefe@cesfam.cl', 'clave-jefe', is_staff=True)
+        self.client.force_login(jefe)
+        self.assertEqual(len(self.client.get(reverse('reporte_conflictos')).context['conflictos']), 3)
+
+
+# --- Búsqueda de texto completo (intranet/busqueda.py) ---
+
+class BusquedaTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.autor = Funcionarios.objects.create_user('ana@cesfam.cl', 'ana@cesfam.cl', 'clave-ana')
+
+    def setUp(self):
+        from . import busqueda
+
+        if not busqueda.disponible():
+            self.skipTest(f'sin índice de texto completo en {connection.vendor}')
+
+    def _comunicado(self, titulo, cuerpo):
+        return Comunicados.objects.create(titulo=titulo, cuerpo=cuerpo, id_autor=self.autor)
+
+    def _buscar(self, texto, **opciones):
+        from . import busqueda
+
+        return [(r.tipo, r.objeto.pk) for r in busqueda.buscar(texto, **opciones)]
+
+    def test_sin_tildes_y_por_prefijo(self):
+        campana = self._comunicado('Campaña de Vacunación', 'Influenza en el CESFAM')
+        self._comunicado('Reunión de equipo', 'Sala de reuniones')
+
+        self.assertEqual(self._buscar('vacunacion'), [('comunicado', campana.pk)])
+        self.assertEqual(self._buscar('CAMPANA'), [('comunicado', campana.pk)])
+        self.assertEqual(self._buscar('vacu'), [('comunicado', campana.pk)])
+        self.assertEqual(self._buscar('vacunación influenza'), [('comunicado', campana.pk)])
+        self.assertEqual(self._buscar('vacunación farmacia'), [])
+
+    def test_titulo_pesa_mas_que_el_cuerpo(self):
+        from . import busqueda
+
+        en_cuerpo = self._comunicado('Aviso general', 'Recuerden el protocolo de vacunación del lunes')
+        en_titulo = self._comunicado('Protocolo de vacunación', 'Detalles en el documento adjunto')
+        resultados = busqueda.buscar('vacunación')
+
+        self.assertEqual([r.objeto.pk for r in resultados], [en_titulo.pk, en_cuerpo.pk])
+        self.assertGreater(resultados[0].rango, resultados[1].rango)
+        self.assertIn('<mark>', resultados[1].fragmento)
+
+    def test_indice_al_editar_y_eliminar(self):
+        documento = Documentos.objects.create(titulo='Protocolo', categoria='Vacunación',
+                                              ruta_archivo='documentos/p.pdf')
+        comunicado = self._comunicado('Vacunación escolar', 'Colegios de la comuna')
+        self.assertEqual(self._buscar('vacunacion', tipos=['documento']), [('documento', documento.pk)])
+        self.assertEqual(len(self._buscar('vacunacion')), 2)
+
+        comunicado.titulo = 'Control sano'
+        comunicado.save()
+        self.assertEqual(self._buscar('vacunacion'), [('documento', documento.pk)])
+        self.assertEqual(self._buscar('control'), [('comunicado', comunicado.pk)])
+
+        documento.delete()
+        comunicado.delete()
+        self.assertEqual(self._buscar('vacunacion'), [])
+        self.assertEqual(self._buscar('control'), [])
+
+
+# --- Datos sintéticos (comando generar_datos) ---
+
+class GenerarDatosTest(TestCase):
+
+    def test_sin_funcionarios_se_rechaza(self):
+        from django.core.management import CommandError, call_command
+
+        for opciones in ({'funcionarios': 0}, {'escala': 0.0001}):
+            with self.subTest(**opciones), self.assertRaises(CommandError):
+                call_command('generar_datos', stdout=io.StringIO(), **opciones)
+        self.assertFalse(Funcionarios.objects.filter(username__startswith='sint').exists())
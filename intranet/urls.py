@@ -6,6 +6,8 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('documentos/', views.documentos_view, name='documentos'),
+    path('buscar/', views.buscar_view, name='buscar'),
+    path('descargas/<str:tipo>/<int:pk>/', views.descargar_archivo_view, name='descargar_archivo'),
     path('calendario/', views.calendario_view, name='calendario'),
     path('manual/', views.manual_view, name='manual'),
     path('gestion/solicitudes/', views.gestion_solicitudes_view, name='gestion_solicitudes'),
@@ -20,6 +22,7 @@ urlpatterns = [
     # --- Vistas de Admin ---
     path('roles/gestion/', views.admin_roles_view, name='roles_gestion'), 
     path('logs/auditoria/', views.admin_logs_view, name='logs_auditoria'),
+    path('metricas/', views.metricas_view, name='metricas'),
 
     # --- Vistas de Subdirección (Gestión) ---
     path('gestion/calendario/', views.gestion_calendario_view, name='gestion_calendario'),
@@ -28,7 +31,12 @@ urlpatterns = [
     path('gestion/licencias/', views.gestion_licencias_view, name='gestion_licencias'),
     path('reporte/licencias/', views.reporte_licencias_view, name='reporte_licencias'),
     path('reportes/solicitudes/', views.reporte_solicitudes_view, name='reporte_solicitudes'),
+    path('reportes/solicitudes/eventos/', views.solicitudes_eventos_view, name='solicitudes_eventos'),
+    path('reportes/conflictos/', views.reporte_conflictos_view, name='reporte_conflictos'),
+    path('reporte/licencias/exportar/<str:formato>/', views.exportar_licencias_view, name='exportar_licencias'),
+    path('reportes/solicitudes/exportar/<str:formato>/', views.exportar_solicitudes_view, name='exportar_solicitudes'),
     path('gestion/solicitudes/aprobar/<int:solicitud_id>/', views.aprobar_solicitud_view, name='aprobar_solicitud'),
+    path('gestion/solicitudes/procesar-lote/', views.procesar_solicitudes_lote_view, name='procesar_solicitudes_lote'),
     
     # RUTA DE HISTORIAL PERSONAL
     path('mi-historial/', views.historial_personal_view, name='historial_personal'),
@@ -38,4 +46,12 @@ urlpatterns = [
 
    # RUTA API PARA EL CALENDARIO (AÑADIR ESTO)
     path('api/eventos/', views.eventos_json_view, name='eventos_json'),
+    path('api/buscar/', views.buscar_json_view, name='buscar_json'),
+
+    # API JSON de solo lectura para kiosco y clientes móviles
+    path('api/balance/', views.api_balance_view, name='api_balance'),
+    path('api/comunicados/', views.api_comunicados_view, name='api_comunicados'),
+    path('api/solicitudes/', views.api_solicitudes_view, name='api_solicitudes'),
+    path('api/licencias/', views.api_licencias_view, name='api_licencias'),
+    path('api/pendientes/', views.api_pendientes_view, name='api_pendientes'),
 ]
\ No newline at end of file
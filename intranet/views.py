@@ -2,13 +2,40 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.hashers import check_password
-from .models import Funcionarios, Dias_Administrativos, Comunicados, Documentos, Logs_Auditoria, Licencias, Roles, Logs_Auditoria, Eventos_Calendario, SolicitudesPermiso, Licencias
-from django.db.models import Sum, F
+from .models import Funcionarios, Dias_Administrativos, Comunicados, Documentos, Logs_Auditoria, Licencias, Roles, Logs_Auditoria, Eventos_Calendario, SolicitudesPermiso, Licencias, ResumenLicencias
+from django.db.models import Sum, F, Q, Count, Max
 from django.utils import timezone
-from datetime import datetime
+from django.utils.dateparse import parse_date
+from datetime import date, datetime, time, timedelta
+import hashlib
+import os
 from .forms import DiasAdministrativosForm
-from django.http import JsonResponse
+from .paginacion import paginar_keyset
+from .exportar import FORMATOS, en_async
+from .solicitudes import procesar_solicitudes, APROBAR, RECHAZAR
+from . import cache as cache_dashboard
+from . import api, busqueda, contadores, dias_habiles, importar_dias, metricas, notificaciones, solapamientos
+from .descargas import servir_archivo
+from .miniaturas import nombre_miniatura
+from itertools import islice
+from django.contrib import messages
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, Http404
+from django.core.handlers.asgi import ASGIRequest
+from django.views.decorators.cache import cache_control
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.contrib.auth.forms import AuthenticationForm
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+# Tamaño de página del visor de logs de auditoría
+LOGS_POR_PAGINA = 50
+# Filas que se leen de la BD por vuelta al exportar (cursor del lado del servidor en PostgreSQL)
+EXPORTACION_CHUNK = 2000
+# Máximo de pares que muestra el reporte de conflictos
+CONFLICTOS_MAXIMOS = 1000
+# Resultados por página del buscador
+RESULTADOS_POR_PAGINA = 20
+
 # --- Funciones de Ayuda (para proteger vistas) ---
 def es_admin(user):
     return user.is_superuser
@@ -49,36 +76,152 @@ def logout_view(request):
 
 # --- 2. Vistas Compartidas (Dashboard y Navegación) ---
 
+async def _usuario(request):
+    """
+    Usuario de la petición en las vistas async. request.user es perezoso y al leerlo
+    (en la vista o en la plantilla) haría una consulta síncrona: se reemplaza por el
+    usuario ya cargado con auser().
+    """
+    request.user = await request.auser()
+    return request.user
+
 @login_required(login_url='login')
-def dashboard_view(request):
+async def dashboard_view(request):
     """
     Vista única para el Dashboard de Funcionario y Subdirección/Admin.
-    Muestra los días restantes y comunicados.
+    Muestra los días restantes y comunicados. Es async: bajo ASGI no ocupa
+    un thread mientras espera a la caché o a la BD.
     """
-    # 1. Obtener Días Administrativos (Crear si no existen)
-    try:
-        dias = Dias_Administrativos.objects.get(id_funcionario=request.user)
-    except Dias_Administrativos.DoesNotExist:
-        # Crear un registro inicial si no existe
-        dias = Dias_Administrativos.objects.create(id_funcionario=request.user)
+    usuario = await _usuario(request)
+
+    # 1. Obtener Días Administrativos (Crear si no existen), desde la caché
+    dias_admin, dias_vacas = await cache_dashboard.abalance(usuario)
 
-    # 2. Obtener los últimos 3 Comunicados
-    comunicados = Comunicados.objects.all().order_by('-fecha_publicacion')[:3]
+    # 2. Obtener los últimos 3 Comunicados (caché compartida, se invalida al publicar)
+    comunicados = await cache_dashboard.aultimos_comunicados()
 
     # 3. Enviar datos al HTML
     context = {
-        'dias_admin': dias.admin_restantes,
-        'dias_vacas': dias.vacaciones_restantes,
+        'dias_admin': dias_admin,
+        'dias_vacas': dias_vacas,
         'comunicados': comunicados
     }
+    # 4. Subdirección: trabajo pendiente desde los contadores mantenidos (una consulta, sin COUNT)
+    if es_subdireccion(usuario):
+        context['panel'] = await contadores.apanel()
     # La misma plantilla (dashboard.html) se usa, y el menú se adapta por user.is_staff
     return render(request, 'dashboard.html', context)
 
 @login_required(login_url='login')
-def documentos_view(request):
-    # Obtener todos los documentos para listarlos
-    docs = Documentos.objects.all().order_by('-fecha_carga')
-    return render(request, 'documentos.html', {'documentos': docs})
+async def documentos_view(request):
+    await _usuario(request)
+    q = request.GET.get('q', '').strip()
+    if q:
+        # Búsqueda en el índice de texto, ordenada por relevancia (SQL propio de cada motor: en un thread)
+        resultados = await sync_to_async(busqueda.buscar)(
+            q, tipos=(busqueda.DOCUMENTO,), limite=RESULTADOS_POR_PAGINA * 5
+        )
+        docs = [r.objeto for r in resultados]
+    else:
+        # Obtener todos los documentos para listarlos
+        docs = [doc async for doc in Documentos.objects.all().order_by('-fecha_carga')]
+    return render(request, 'documentos.html', {'documentos': docs, 'q': q})
+
+def _busqueda(request):
+    """Lee ?q=&tipo=&pagina= y retorna (q, tipo, pagina, resultados, hay_siguiente)."""
+    q = request.GET.get('q', '').strip()
+    tipo = request.GET.get('tipo', '')
+    tipos = (tipo,) if tipo in (busqueda.DOCUMENTO, busqueda.COMUNICADO) else (busqueda.DOCUMENTO, busqueda.COMUNICADO)
+    try:
+        pagina = max(int(request.GET.get('pagina', 1)), 1)
+    except ValueError:
+        pagina = 1
+
+    # Se pide un resultado de más para saber si hay página siguiente sin contar el total
+    resultados = busqueda.buscar(
+        q, tipos=tipos, limite=RESULTADOS_POR_PAGINA + 1, desplazamiento=(pagina - 1) * RESULTADOS_POR_PAGINA
+    )
+    hay_siguiente = len(resultados) > RESULTADOS_POR_PAGINA
+    return q, tipo, pagina, resultados[:RESULTADOS_POR_PAGINA], hay_siguiente
+
+@login_required(login_url='login')
+def buscar_view(request):
+    """Buscador de documentos y comunicados, ordenado por relevancia."""
+    q, tipo, pagina, resultados, hay_siguiente = _busqueda(request)
+    context = {
+        'q': q,
+        'tipo': tipo,
+        'pagina': pagina,
+        'resultados': resultados,
+        'pagina_anterior': pagina - 1 if pagina > 1 else None,
+        'pagina_siguiente': pagina + 1 if hay_siguiente else None,
+    }
+    return render(request, 'buscar.html', context)
+
+@login_required(login_url='login')
+def buscar_json_view(request):
+    q, tipo, pagina, resultados, hay_siguiente = _busqueda(request)
+    data = []
+    for resultado in resultados:
+        objeto = resultado.objeto
+        if resultado.tipo == busqueda.DOCUMENTO:
+            fecha = objeto.fecha_carga
+            url = reverse('descargar_archivo', args=['documento', objeto.pk]) if objeto.ruta_archivo else ''
+        else:
+            fecha = objeto.fecha_publicacion
+            url = ''
+        data.append({
+            'tipo': resultado.tipo,
+            'id': objeto.pk,
+            'titulo': objeto.titulo,
+            'fragmento': resultado.fragmento,
+            'fecha': timezone.localtime(fecha).isoformat() if fecha else None,
+            'url': url,
+            'rango': resultado.rango,
+        })
+    return JsonResponse({'resultados': data, 'pagina': pagina, 'hay_siguiente': hay_siguiente})
+
+def _archivo_protegido(user, tipo, pk):
+    """
+    (FieldFile, nombre de descarga) si el usuario puede ver el archivo, si no Http404.
+    Documentos: cualquier funcionario. Licencias y justificativos: el dueño o Subdirección.
+    """
+    if tipo == 'documento':
+        doc = get_object_or_404(Documentos.objects.only('titulo', 'ruta_archivo'), pk=pk)
+        return doc.ruta_archivo, doc.titulo
+    if tipo == 'licencia':
+        objeto = get_object_or_404(Licencias.objects.only('id_funcionario_id', 'ruta_foto_licencia'), pk=pk)
+        duenio, archivo = objeto.id_funcionario_id, objeto.ruta_foto_licencia
+    elif tipo == 'justificativo':
+        objeto = get_object_or_404(
+            SolicitudesPermiso.objects.only('id_funcionario_solicitante_id', 'justificativo_archivo'), pk=pk
+        )
+        duenio, archivo = objeto.id_funcionario_solicitante_id, objeto.justificativo_archivo
+    else:
+        raise Http404("Tipo de archivo desconocido")
+    # Se responde 404 (no 403) para no revelar qué archivos existen
+    if duenio != user.pk and not es_subdireccion(user):
+        raise Http404("Archivo no encontrado")
+    return archivo, f"{tipo}-{pk}"
+
+@login_required(login_url='login')
+def descargar_archivo_view(request, tipo, pk):
+    """
+    Descarga protegida de archivos subidos. ?miniatura=1 entrega la miniatura
+    y ?descargar=1 fuerza la descarga en vez de abrirlo en el navegador.
+    """
+    archivo, nombre_descarga = _archivo_protegido(request.user, tipo, pk)
+    if not archivo:
+        raise Http404("Sin archivo")
+
+    nombre = archivo.name
+    if request.GET.get('miniatura'):
+        nombre = nombre_miniatura(nombre)
+        nombre_descarga = f"{nombre_descarga}-miniatura"
+    extension = os.path.splitext(nombre)[1].lower()
+    return servir_archivo(
+        request, nombre, nombre_descarga=f"{nombre_descarga}{extension}", adjunto=bool(request.GET.get('descargar'))
+    )
 
 @login_required(login_url='login')
 def calendario_view(request):
@@ -114,11 +257,18 @@ def gestion_solicitudes_view(request):
         fecha_inicio = datetime.strptime(inicio_str, '%Y-%m-%d').date()
         fecha_fin = datetime.strptime(fin_str, '%Y-%m-%d').date()
 
-        # 2. Calcular los días solicitados (diferencia de fechas)
-        diferencia = fecha_fin - fecha_inicio
-        dias_solicitados = diferencia.days + 1 # +1 para incluir el día de inicio
+        # 2. No se permite pedir días que se cruzan con una solicitud aprobada o una licencia
+        choques = solapamientos.conflictos(request.user.pk, fecha_inicio, fecha_fin)
+        if choques:
+            return render(request, 'gestion_solicitudes.html', {
+                'error': 'Las fechas se cruzan con un permiso aprobado o una licencia registrada.',
+                'conflictos': choques,
+            })
+
+        # 3. Calcular los días solicitados (días hábiles para vacaciones/administrativos)
+        dias_solicitados = dias_habiles.dias_solicitados(tipo, fecha_inicio, fecha_fin)
         
-        # 3. Guardar la solicitud en la base de datos
+        # 4. Guardar la solicitud en la base de datos
         SolicitudesPermiso.objects.create(
             id_funcionario_solicitante=request.user, # El usuario logueado
             tipo_permiso=tipo,
@@ -128,7 +278,7 @@ def gestion_solicitudes_view(request):
             estado='Pendiente'
         )
         
-        # 4. Redirigir al dashboard para ver el resultado
+        # 5. Redirigir al dashboard para ver el resultado
         return redirect('dashboard')
     
     # Si es GET, simplemente muestra el formulario
@@ -189,10 +339,29 @@ def gestion_calendario_view(request):
 
 @user_passes_test(es_subdireccion, login_url='login')
 def gestion_dias_view(request):
-    funcionarios = Funcionarios.objects.all().order_by('username')
-    
-    # 1. Lógica de PROCESAMIENTO (POST)
-    if request.method == 'POST':
+    # Solo las columnas que usa el desplegable
+    funcionarios = Funcionarios.objects.only('pk', 'username').order_by('username')
+    resultado_importacion = None
+    error_importacion = None
+
+    # 1a. Carga masiva desde CSV/XLSX (ver intranet/importar_dias.py)
+    if request.method == 'POST' and request.FILES.get('archivo_dias'):
+        archivo = request.FILES['archivo_dias']
+        try:
+            resultado_importacion = importar_dias.importar(
+                importar_dias.leer_filas(archivo, archivo.name),
+                usuario=request.user,
+                simular=bool(request.POST.get('simular')),
+            )
+        except importar_dias.ArchivoInvalido as error:
+            error_importacion = str(error)
+            # Si el archivo falló a mitad de lectura, lo ya guardado se muestra igual
+            parcial = getattr(error, 'resultado', None)
+            if parcial is not None and parcial.procesadas:
+                resultado_importacion = parcial
+
+    # 1b. Lógica de PROCESAMIENTO (POST) de un funcionario
+    elif request.method == 'POST':
         funcionario_id = request.POST.get('funcionario_id')
         
         # Buscamos o creamos el registro de días
@@ -216,7 +385,10 @@ def gestion_dias_view(request):
     
     context = {
         'funcionarios': funcionarios,
-        'form': form # Enviamos el formulario de Django a la plantilla
+        'form': form, # Enviamos el formulario de Django a la plantilla
+        'resultado_importacion': resultado_importacion,
+        'error_importacion': error_importacion,
+        'simulacion': bool(request.POST.get('simular')),
     }
     return render(request, 'gestion_dias.html', context)
 # intranet/views.py
@@ -261,15 +433,26 @@ def gestion_licencias_view(request):
 def reporte_licencias_view(request):
     """
     Vista para listar todas las licencias registradas (Lectura funcional).
+    Los días totales salen de ResumenLicencias, que se mantiene al crear o
+    eliminar licencias (ver intranet/resumen.py).
     """
     # 1. Se obtienen todas las licencias de la base de datos
-    licencias = Licencias.objects.all().order_by('-fecha_registro')
-    
+    #    select_related trae al funcionario en el mismo JOIN (evita N+1 en la plantilla)
+    licencias = Licencias.objects.select_related('id_funcionario').order_by('-fecha_registro')
+
+    # 2. Totales precalculados: por funcionario y por mes
+    #    (las filas que quedaron en 0 al editar o eliminar licencias no se muestran)
+    resumen = ResumenLicencias.objects.filter(dias_totales__gt=0)
+    totales_funcionario = resumen.values(
+        'id_funcionario__username'
+    ).annotate(dias=Sum('dias_totales')).order_by('-dias', 'id_funcionario__username')
+    totales_mes = resumen.values('mes').annotate(dias=Sum('dias_totales')).order_by('-mes')
+
     context = {
         'licencias': licencias,
-        # 2. Eliminamos la línea que causaba el FieldError. 
-        #    La suma de días es un cálculo complejo que haremos después si sobra tiempo.
-        'dias_totales': 0 
+        'dias_totales': resumen.aggregate(total=Sum('dias_totales'))['total'] or 0,
+        'totales_funcionario': totales_funcionario,
+        'totales_mes': totales_mes,
     }
     return render(request, 'reporte_licencias.html', context)
 
@@ -281,13 +464,103 @@ def reporte_solicitudes_view(request):
     Vista para que la Subdirección revise las solicitudes de permiso (solo lectura).
     """
     # Obtenemos todas las solicitudes que están en estado 'Pendiente'
-    solicitudes = SolicitudesPermiso.objects.filter(estado='Pendiente').order_by('-fecha_solicitud')
+    # select_related evita una consulta por fila al mostrar el nombre del solicitante
+    solicitudes = SolicitudesPermiso.objects.filter(estado='Pendiente').select_related(
+        'id_funcionario_solicitante'
+    ).order_by('-fecha_solicitud')
     
     context = {
-        'solicitudes': solicitudes
+        'solicitudes': solicitudes,
+        # Las notificaciones en vivo continúan desde aquí: nada queda entre la página y el flujo
+        'ultimo_cambio': notificaciones.ultimo_id(),
     }
     return render(request, 'reporte_solicitudes.html', context)
 
+@user_passes_test(es_subdireccion, login_url='login')
+async def solicitudes_eventos_view(request):
+    """
+    Flujo SSE con las solicitudes nuevas, aprobadas y rechazadas (intranet/notificaciones.py).
+    Al reconectar, el navegador envía Last-Event-ID y el flujo sigue desde ese cambio.
+    """
+    desde = request.headers.get('Last-Event-ID') or request.GET.get('desde', '')
+    response = StreamingHttpResponse(
+        notificaciones.flujo(int(desde) if desde.isdigit() else None), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: entregar cada evento sin acumularlos
+    return response
+
+def _filtrar_exportacion(queryset, request, campo_funcionario, filtrar_estado=False):
+    """
+    Filtros comunes de las exportaciones: rango de fechas (períodos que se cruzan
+    con el rango), funcionario (username) y, con filtrar_estado, estado.
+    """
+    desde = _fecha_parametro(request.GET.get('desde'))
+    hasta = _fecha_parametro(request.GET.get('hasta'))
+    funcionario = request.GET.get('funcionario', '').strip()
+    estado = request.GET.get('estado', '').strip()
+
+    if desde:
+        queryset = queryset.filter(fecha_fin__gte=desde)
+    if hasta:
+        queryset = queryset.filter(fecha_inicio__lte=hasta)
+    if funcionario:
+        queryset = queryset.filter(**{f'{campo_funcionario}__username': funcionario})
+    if estado and filtrar_estado:
+        queryset = queryset.filter(estado=estado)
+    return queryset
+
+def _respuesta_exportacion(request, formato, nombre, encabezados, filas):
+    """
+    Arma el StreamingHttpResponse para el formato pedido ('csv' o 'xlsx').
+    Bajo ASGI el contenido va como iterador async: uno síncrono se armaría completo en memoria.
+    """
+    if formato not in FORMATOS:
+        raise Http404("Formato de exportación no soportado")
+    generador, content_type = FORMATOS[formato]
+    contenido = generador(encabezados, filas)
+    if isinstance(request, ASGIRequest):
+        contenido = en_async(contenido)
+    response = StreamingHttpResponse(contenido, content_type=content_type)
+    fecha = timezone.localdate().strftime('%Y%m%d')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}_{fecha}.{formato}"'
+    return response
+
+@user_passes_test(es_subdireccion, login_url='login')
+def exportar_licencias_view(request, formato):
+    """
+    Exporta las licencias a CSV/XLSX en streaming. Las filas se leen de la BD
+    por bloques (iterator) y se envían al navegador a medida que se generan.
+    """
+    licencias = _filtrar_exportacion(Licencias.objects.all(), request, 'id_funcionario')
+    filas = licencias.order_by('fecha_inicio', 'pk').values_list(
+        'pk', 'id_funcionario__username', 'id_funcionario__first_name', 'id_funcionario__last_name',
+        'fecha_inicio', 'fecha_fin', 'id_subdireccion_carga__username', 'fecha_registro',
+    ).iterator(chunk_size=EXPORTACION_CHUNK)
+
+    encabezados = ['ID', 'Funcionario', 'Nombre', 'Apellido', 'Fecha Inicio', 'Fecha Fin',
+                   'Registrado Por', 'Fecha Registro']
+    return _respuesta_exportacion(request, formato, 'licencias', encabezados, filas)
+
+@user_passes_test(es_subdireccion, login_url='login')
+def exportar_solicitudes_view(request, formato):
+    """
+    Exporta las solicitudes de permiso a CSV/XLSX en streaming (todas las
+    que cumplan los filtros, no solo las pendientes).
+    """
+    solicitudes = _filtrar_exportacion(
+        SolicitudesPermiso.objects.all(), request, 'id_funcionario_solicitante', filtrar_estado=True
+    )
+    filas = solicitudes.order_by('fecha_solicitud', 'pk').values_list(
+        'pk', 'id_funcionario_solicitante__username', 'id_funcionario_solicitante__first_name',
+        'id_funcionario_solicitante__last_name', 'tipo_permiso', 'fecha_inicio', 'fecha_fin',
+        'dias_solicitados', 'fecha_solicitud', 'estado',
+    ).iterator(chunk_size=EXPORTACION_CHUNK)
+
+    encabezados = ['ID', 'Funcionario', 'Nombre', 'Apellido', 'Tipo', 'Desde', 'Hasta', 'Días',
+                   'Fecha Solicitud', 'Estado']
+    return _respuesta_exportacion(request, formato, 'solicitudes', encabezados, filas)
+
 @user_passes_test(es_subdireccion, login_url='login')
 def aprobar_solicitud_view(request, solicitud_id):
     """
@@ -295,44 +568,55 @@ def aprobar_solicitud_view(request, solicitud_id):
     los días del balance, según el tipo de solicitud.
     """
     if request.method == 'POST':
-        # 1. Obtener la solicitud
+        # 1. Verificar que la solicitud exista
         solicitud = get_object_or_404(SolicitudesPermiso, pk=solicitud_id)
-        
-        if solicitud.estado == 'Pendiente':
-            
-            # --- 2. Lógica para Licencia Médica (Crea un registro, no descuenta días) ---
-            if solicitud.tipo_permiso == 'licencia':
-                
-                # 2.1. Crear el registro en la tabla Licencias (historial)
-                Licencias.objects.create(
-                    id_funcionario=solicitud.id_funcionario_solicitante,
-                    id_subdireccion_carga=request.user, # Subdirector que aprueba
-                    fecha_inicio=solicitud.fecha_inicio,
-                    fecha_fin=solicitud.fecha_fin,
-                    # El archivo subido en el formulario de solicitud se traslada aquí
-                    ruta_foto_licencia=solicitud.justificativo_archivo 
-                )
-                
-            # --- 3. Lógica para Días/Vacaciones (Descuenta del balance) ---
-            elif solicitud.tipo_permiso in ['vacaciones', 'administrativo']:
-                
-                # 3.1. Determinar qué campo del balance actualizar
-                if solicitud.tipo_permiso == 'vacaciones':
-                    campo_balance = 'vacaciones_restantes'
-                else:
-                    campo_balance = 'admin_restantes'
-                    
-                # 3.2. ACTUALIZACIÓN ATÓMICA del balance
-                Dias_Administrativos.objects.filter(id_funcionario=solicitud.id_funcionario_solicitante).update(
-                    **{campo_balance: F(campo_balance) - solicitud.dias_solicitados}
-                )
 
-            # 4. Marcar la solicitud como aprobada
-            solicitud.estado = 'Aprobado'
-            solicitud.save()
+        # 2. Misma lógica que la aprobación en lote (bloqueo de fila + transacción)
+        procesadas = procesar_solicitudes([solicitud.pk], APROBAR, request.user)
+        if not procesadas and solicitud.estado == 'Pendiente':
+            messages.warning(
+                request,
+                f"La solicitud {solicitud.pk} se cruza con un permiso aprobado o una licencia y no fue aprobada."
+            )
 
     return redirect('reporte_solicitudes')
 
+@user_passes_test(es_subdireccion, login_url='login')
+def procesar_solicitudes_lote_view(request):
+    """
+    Aprueba o rechaza todas las solicitudes marcadas en la bandeja en una sola
+    transacción (ver intranet/solicitudes.py).
+    """
+    if request.method == 'POST':
+        accion = request.POST.get('accion')
+        ids = [int(pk) for pk in request.POST.getlist('solicitud_ids') if pk.isdigit()]
+
+        if accion in (APROBAR, RECHAZAR) and ids:
+            procesadas = procesar_solicitudes(ids, accion, request.user)
+            omitidas = len(ids) - len(procesadas)
+            if omitidas:
+                messages.warning(
+                    request,
+                    f"{omitidas} solicitud(es) no se procesaron (ya no estaban pendientes o se cruzan con otro período)."
+                )
+
+    return redirect('reporte_solicitudes')
+
+@user_passes_test(es_subdireccion, login_url='login')
+def reporte_conflictos_view(request):
+    """
+    Lista todos los pares de períodos (solicitudes aprobadas/pendientes y licencias)
+    que se cruzan para un mismo funcionario. Se calcula con una pasada ordenada.
+    """
+    pares = list(islice(solapamientos.pares_en_conflicto(), CONFLICTOS_MAXIMOS + 1))
+    funcionarios = Funcionarios.objects.in_bulk({a.funcionario_id for a, b in pares})
+
+    context = {
+        'conflictos': [(funcionarios.get(a.funcionario_id), a, b) for a, b in pares[:CONFLICTOS_MAXIMOS]],
+        'hay_mas': len(pares) > CONFLICTOS_MAXIMOS,
+    }
+    return render(request, 'reporte_conflictos.html', context)
+
 # --- 4. Vistas de Admin (Protegidas) ---
 
 @login_required(login_url='login') 
@@ -347,50 +631,197 @@ def admin_roles_view(request):
 @login_required(login_url='login') 
 @user_passes_test(es_admin, login_url='login')
 def admin_logs_view(request):
-    logs_list = Logs_Auditoria.objects.all().order_by('-fecha_hora')
+    """
+    Visor de logs paginado por cursor (fecha_hora, id), con filtros por actor,
+    acción y rango de fechas. Cada página cuesta lo mismo sin importar su profundidad.
+    """
+    logs_list = Logs_Auditoria.objects.select_related('id_usuario_actor')
+
+    # 1. Filtros (todos apoyados en los índices de Logs_Auditoria)
+    actor = request.GET.get('actor', '').strip()
+    accion = request.GET.get('accion', '').strip()
+    desde = _fecha_parametro(request.GET.get('desde'))
+    hasta = _fecha_parametro(request.GET.get('hasta'))
+
+    if actor:
+        logs_list = logs_list.filter(id_usuario_actor__username=actor)
+    if accion:
+        logs_list = logs_list.filter(accion=accion)
+    if desde:
+        logs_list = logs_list.filter(fecha_hora__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+    if hasta and hasta < date.max:
+        # 'hasta' incluye el día completo (con el último día posible no hay límite: el día siguiente no existe)
+        logs_list = logs_list.filter(
+            fecha_hora__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        )
+
+    # 2. Página actual a partir del cursor
+    logs_pagina, cursor_siguiente = paginar_keyset(
+        logs_list, request.GET.get('cursor'), LOGS_POR_PAGINA, campo='fecha_hora'
+    )
+
+    # 3. Links de navegación conservando los filtros
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+    url_siguiente = None
+    if cursor_siguiente:
+        parametros['cursor'] = cursor_siguiente
+        url_siguiente = f"?{parametros.urlencode()}"
+        parametros.pop('cursor')
+
     context = {
-        'logs': logs_list
+        'logs': logs_pagina,
+        'filtros': {'actor': actor, 'accion': accion, 'desde': desde, 'hasta': hasta},
+        'url_siguiente': url_siguiente,
+        'url_primera': f"?{parametros.urlencode()}" if request.GET.get('cursor') else None,
     }
     return render(request, 'admin_logs.html', context)
 
 # intranet/views.py
 
 @login_required(login_url='login')
-def historial_personal_view(request):
+async def historial_personal_view(request):
     """
     Vista para que el Funcionario vea su historial de solicitudes y licencias.
     """
+    usuario = await _usuario(request)
+
     # 1. Solicitudes de permiso: propias del usuario logueado
-    solicitudes = SolicitudesPermiso.objects.filter(id_funcionario_solicitante=request.user).order_by('-fecha_solicitud')
-    
+    solicitudes = [
+        sol async for sol in SolicitudesPermiso.objects.filter(
+            id_funcionario_solicitante=usuario
+        ).order_by('-fecha_solicitud')
+    ]
+
     # 2. Historial de licencias: licencias emitidas a este funcionario
-    licencias_recibidas = Licencias.objects.filter(id_funcionario=request.user).order_by('-fecha_inicio')
-    
+    #    (con quien la registró, en el mismo JOIN)
+    licencias_recibidas = [
+        lic async for lic in Licencias.objects.filter(id_funcionario=usuario).select_related(
+            'id_subdireccion_carga'
+        ).order_by('-fecha_inicio')
+    ]
+
     context = {
         'solicitudes': solicitudes,
         'licencias_recibidas': licencias_recibidas,
     }
     return render(request, 'historial_personal.html', context)
 
+def _fecha_parametro(valor):
+    """Fecha ISO de un parámetro GET, o None si falta o no existe (parse_date lanza ValueError con '2025-02-30')."""
+    try:
+        return parse_date(valor or '')
+    except ValueError:
+        return None
+
+def _eventos_ventana(request):
+    """
+    Filtra los eventos por la ventana que envía FullCalendar (?start=...&end=...).
+    'end' es exclusivo. Si no vienen los parámetros se devuelven todos los eventos.
+    """
+    eventos = Eventos_Calendario.objects.all()
+
+    # FullCalendar envía fechas ISO (ej: 2025-10-26T00:00:00-03:00), nos basta el día
+    inicio = _fecha_parametro((request.GET.get('start') or '')[:10])
+    fin = _fecha_parametro((request.GET.get('end') or '')[:10])
+
+    if fin:
+        eventos = eventos.filter(fecha_inicio__lt=fin)
+    if inicio:
+        # Un evento sin fecha_fin dura solo su día de inicio
+        eventos = eventos.filter(
+            Q(fecha_fin__gte=inicio) | Q(fecha_fin__isnull=True, fecha_inicio__gte=inicio)
+        )
+    return eventos
+
+def _eventos_etag(request, version):
+    ultima = version['ultima'].isoformat() if version['ultima'] else ''
+    clave = f"{request.GET.get('start', '')}|{request.GET.get('end', '')}|{version['total']}|{ultima}"
+    return quote_etag(hashlib.md5(clave.encode()).hexdigest())
+
 @login_required(login_url='login')
-def eventos_json_view(request):
+@cache_control(private=True, no_cache=True)
+async def eventos_json_view(request):
     """
     Vista que retorna los eventos del calendario en formato JSON para FullCalendar.
+    Solo se envían los eventos que se cruzan con la ventana visible y se responde
+    304 si nada cambió desde la última consulta del navegador.
     """
-    # 1. Obtener todos los eventos
-    eventos = Eventos_Calendario.objects.all()
-    
-    # 2. Adaptar los datos al formato específico que FullCalendar espera
-    data = []
-    for evento in eventos:
-        data.append({
-            'title': f"{evento.tipo_evento}: {evento.titulo}",
-            # Formato YYYY-MM-DD para FullCalendar
-            'start': evento.fecha_inicio.strftime('%Y-%m-%d'), 
-            # Si hay fecha fin, la usa, sino, usa la de inicio
-            'end': evento.fecha_fin.strftime('%Y-%m-%d') if evento.fecha_fin else evento.fecha_inicio.strftime('%Y-%m-%d'),
-            'color': '#f4a460' if evento.tipo_evento == 'Feriado' else '#1E4A7B',
-            'allDay': True,
-        })
-        
-    return JsonResponse(data, safe=False)
\ No newline at end of file
+    # 1. Versión de la ventana (cantidad y última modificación) en una consulta, para ETag y
+    #    Last-Modified. Se hace aquí y no con @condition, que llama a sus funciones en forma síncrona.
+    version = await _eventos_ventana(request).aaggregate(total=Count('pk'), ultima=Max('fecha_modificacion'))
+    etag = _eventos_etag(request, version)
+    ultima = int(version['ultima'].timestamp()) if version['ultima'] else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=ultima)
+    if response is None:
+        # 2. Obtener los eventos de la ventana solicitada (solo las columnas necesarias)
+        eventos = _eventos_ventana(request).values_list('titulo', 'fecha_inicio', 'fecha_fin', 'tipo_evento')
+
+        # 3. Adaptar los datos al formato específico que FullCalendar espera
+        data = []
+        async for titulo, fecha_inicio, fecha_fin, tipo_evento in eventos:
+            data.append({
+                'title': f"{tipo_evento}: {titulo}",
+                # Formato YYYY-MM-DD para FullCalendar
+                'start': fecha_inicio.strftime('%Y-%m-%d'),
+                # Si hay fecha fin, la usa, sino, usa la de inicio
+                'end': fecha_fin.strftime('%Y-%m-%d') if fecha_fin else fecha_inicio.strftime('%Y-%m-%d'),
+                'color': '#f4a460' if tipo_evento == 'Feriado' else '#1E4A7B',
+                'allDay': True,
+            })
+        response = JsonResponse(data, safe=False)
+
+    # 4. Igual que @condition: ETag y Last-Modified también en la respuesta 304
+    response.headers.setdefault('ETag', etag)
+    if ultima:
+        response.headers.setdefault('Last-Modified', http_date(ultima))
+    return response
+
+
+@login_required(login_url='login')
+@user_passes_test(es_admin, login_url='login')
+def metricas_view(request):
+    """
+    Métricas por vista en formato de texto de Prometheus (intranet/metricas.py).
+    Con ?lentas=1 entrega en JSON las peticiones más lentas con su SQL.
+    """
+    if request.GET.get('lentas'):
+        return JsonResponse({'umbral_ms': metricas.lentas_ms(), 'peticiones': metricas.peores()})
+    return HttpResponse(metricas.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# --- 5. API JSON de solo lectura (intranet/api.py) ---
+
+def _api_pagina(request, recurso, queryset):
+    try:
+        return api.respuesta(api.pagina(recurso, queryset, request.GET))
+    except api.ParametroInvalido as error:
+        return api.respuesta({'error': str(error)}, status=400)
+
+@api.requiere_usuario()
+def api_balance_view(request):
+    """Días restantes del usuario (lo mismo que muestra el dashboard), desde la caché."""
+    dias_admin, dias_vacas = cache_dashboard.balance(request.user)
+    return api.respuesta({'admin_restantes': dias_admin, 'vacaciones_restantes': dias_vacas})
+
+@api.requiere_usuario()
+def api_comunicados_view(request):
+    return _api_pagina(request, api.COMUNICADOS, Comunicados.objects.all())
+
+@api.requiere_usuario()
+def api_solicitudes_view(request):
+    """Solicitudes propias (?estado=Pendiente|Aprobado|Rechazado para filtrar)."""
+    solicitudes = SolicitudesPermiso.objects.filter(id_funcionario_solicitante=request.user)
+    if request.GET.get('estado'):
+        solicitudes = solicitudes.filter(estado=request.GET['estado'])
+    return _api_pagina(request, api.SOLICITUDES, solicitudes)
+
+@api.requiere_usuario()
+def api_licencias_view(request):
+    return _api_pagina(request, api.LICENCIAS, Licencias.objects.filter(id_funcionario=request.user))
+
+@api.requiere_usuario(es_subdireccion)
+def api_pendientes_view(request):
+    """Solicitudes de todos los funcionarios que esperan aprobación."""
+    return _api_pagina(request, api.PENDIENTES, SolicitudesPermiso.objects.filter(estado='Pendiente'))